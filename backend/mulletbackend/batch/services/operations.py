@@ -7,6 +7,7 @@ from django.db import transaction
 from django.db.models import Q
 
 from core.models import Goal, Milestone, Mode, Project, Task
+from core.services import closure
 from core.utils.archive_guard import destroy_or_archive
 from comments.services import soft_delete_comments_for_instance
 from timers.services import stop_active_if_targeting
@@ -118,6 +119,13 @@ def do_delete(selected: Selected, *, user) -> Dict[str, int]:
     return deleted
 
 
+def _sync_closure(selected: Selected) -> None:
+    """QuerySet.update() skips post_save, so re-hang moved subtrees in the closure index."""
+    for kind in ("project", "milestone", "task"):
+        if ids := selected.get(kind):
+            closure.sync_parents(kind, ids)
+
+
 @transaction.atomic
 def do_change_mode(selected: Selected, mode_id: int, *, user) -> Dict[str, int]:
     """
@@ -157,6 +165,7 @@ def do_change_mode(selected: Selected, mode_id: int, *, user) -> Dict[str, int]:
             mode_id=mode_id,
         )
 
+    _sync_closure(selected)
     return changed
 
 
@@ -256,4 +265,5 @@ def do_group_under(selected: Selected, parent_type: str, parent_id: int, *, user
     else:
         raise ValidationError("Invalid parentType.")
 
+    _sync_closure(selected)
     return changed
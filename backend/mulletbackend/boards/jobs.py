@@ -0,0 +1,275 @@
+# boards/jobs.py
+"""
+DB-backed queue for pin thumbnails (ThumbnailJob).
+
+Creating a pin (or refresh_meta) only enqueues a job and returns with
+thumbnail_status="pending"; the image / PDF render or the og:image download
+happens in run_pending_jobs(). With THUMBNAIL_JOBS_RUNNER="thread" (the
+default) that runs in one background thread per process, woken on commit,
+which stays up while any job is queued or running so retries and stale
+reclaims still happen; with "worker" it is left to
+`manage.py run_thumbnail_worker`.
+
+Rendered output is content-addressed (ThumbnailSet): the source is hashed
+first, and a hash that has been seen before just points the pin at the
+existing 160/320/640 JPEG + WebP variants.
+
+Jobs are claimed with SKIP LOCKED, retried with backoff, and a job left
+"running" by a crashed thread / worker is picked up again after STALE_AFTER.
+"""
+import logging
+import threading
+from datetime import timedelta
+from typing import List
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .linkmeta import try_fetch_favicon_url
+from .models import Pin, ThumbnailJob, ThumbnailSet
+from .thumbs import (
+    THUMB_SIZES,
+    SourceTooLarge,
+    download_image_thumb,
+    encode_variants,
+    hash_file,
+    load_image_thumb,
+    load_pdf_thumb,
+    variant_name,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=10)
+# A link whose og:image URL was downloaded this recently reuses that
+# ThumbnailSet without fetching it again.
+URL_REUSE_FOR = timedelta(days=7)
+# Finished (done / failed) jobs are kept this long for debugging.
+JOB_RETENTION = timedelta(days=7)
+UNFINISHED = ("queued", "running")
+MAX_IMAGE_URL = ThumbnailJob._meta.get_field("image_url").max_length
+
+
+def wants_file_thumbnail(pin: Pin) -> bool:
+    """Uploaded images and PDFs get a rendered thumbnail."""
+    if not pin.file:
+        return False
+    mt = (pin.mime_type or "").lower()
+    name = (pin.file.name or "").lower()
+    return pin.kind == "image" or mt.startswith("image/") or mt == "application/pdf" or name.endswith(".pdf")
+
+
+def _clean_image_url(image_url: str) -> str:
+    """
+    og:image comes from the remote page: anything that isn't a plain http(s)
+    URL that fits the column is dropped (the job falls back to the favicon).
+    """
+    image_url = (image_url or "").strip()
+    if len(image_url) > MAX_IMAGE_URL or urlparse(image_url).scheme not in ("http", "https"):
+        return ""
+    return image_url
+
+
+def enqueue_thumbnail(pin: Pin, *, image_url: str = "") -> ThumbnailJob:
+    """
+    Queue a thumbnail for the pin: from its uploaded file, or (image_url, or
+    the site's favicon when blank) for link pins.
+    """
+    source = "file" if wants_file_thumbnail(pin) else "url"
+    job = ThumbnailJob.objects.create(pin=pin, source=source, image_url=_clean_image_url(image_url))
+    if pin.thumbnail_status != "pending":
+        pin.thumbnail_status = "pending"
+        pin.save(update_fields=["thumbnail_status"])
+
+    if getattr(settings, "THUMBNAIL_JOBS_RUNNER", "thread") == "thread":
+        transaction.on_commit(_start_thread)
+    return job
+
+
+_thread = None
+_thread_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def _start_thread() -> None:
+    """Wake this process's job thread, starting it if it isn't running."""
+    global _thread
+    with _thread_lock:
+        _wake.set()
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=_thread_loop, name="thumbnail-jobs", daemon=True)
+        _thread.start()
+
+
+def _next_due_in():
+    """Seconds until the next queued retry or stale-job reclaim; None when nothing is unfinished."""
+    queued = ThumbnailJob.objects.filter(status="queued").order_by("run_after")
+    running = ThumbnailJob.objects.filter(status="running").order_by("locked_at")
+    due = [
+        *queued.values_list("run_after", flat=True)[:1],
+        *(locked_at + STALE_AFTER for locked_at in running.values_list("locked_at", flat=True)[:1]),
+    ]
+    if not due:
+        return None
+    return max((min(due) - timezone.now()).total_seconds(), 1)
+
+
+def _thread_loop() -> None:
+    """
+    Drain the queue, then sleep until the next retry / stale reclaim is due
+    (or an enqueue wakes us), until no job is left queued or running, so
+    backoff retries happen without waiting for another upload.
+    """
+    global _thread
+    try:
+        while True:
+            _wake.clear()
+            try:
+                run_pending_jobs()
+                delay = _next_due_in()
+            except Exception:
+                logger.exception("THUMB JOBS: background run failed")
+                delay = 30
+            if delay is None:
+                with _thread_lock:
+                    if not _wake.is_set():
+                        # Give up the slot before releasing the lock: a wake
+                        # after this point starts a new thread instead of
+                        # finding this one alive but on its way out.
+                        if _thread is threading.current_thread():
+                            _thread = None
+                        return
+                continue
+            connections.close_all()  # don't hold a DB connection while idle
+            _wake.wait(delay)
+    finally:
+        connections.close_all()
+
+
+def _claim(batch_size: int) -> List[ThumbnailJob]:
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            ThumbnailJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status="queued", run_after__lte=now)
+                | Q(status="running", locked_at__lt=now - STALE_AFTER)
+            )
+            .order_by("run_after")[:batch_size]
+        )
+        if jobs:
+            ThumbnailJob.objects.filter(id__in=[j.id for j in jobs]).update(
+                status="running", locked_at=now, attempts=F("attempts") + 1
+            )
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+def _store_variants(content_hash: str, load_image) -> ThumbnailSet:
+    """Render + store every variant for content_hash, unless another pin already did."""
+    existing = ThumbnailSet.objects.filter(content_hash=content_hash).first()
+    if existing is not None:
+        logger.debug("THUMB CACHE HIT: %s", content_hash)
+        return existing
+
+    img = load_image()
+    for (size, ext), content in encode_variants(img).items():
+        name = variant_name(content_hash, size, ext)
+        if default_storage.exists(name):
+            continue
+        saved = default_storage.save(name, content)
+        if saved != name:  # lost a race with another job rendering the same content
+            default_storage.delete(saved)
+
+    tset, _ = ThumbnailSet.objects.get_or_create(
+        content_hash=content_hash,
+        defaults={"width": img.width, "height": img.height},  # loaders already cap at the largest size
+    )
+    return tset
+
+
+def _render(job: ThumbnailJob, pin: Pin) -> None:
+    if job.source == "file":
+        mt = (pin.mime_type or "").lower()
+        name = (pin.file.name or "").lower()
+        loader = load_pdf_thumb if mt == "application/pdf" or name.endswith(".pdf") else load_image_thumb
+        tset = _store_variants(hash_file(pin.file), lambda: loader(pin.file))
+    else:
+        img_url = job.image_url or (try_fetch_favicon_url(pin.url) if pin.url else None)
+        if not img_url:
+            raise ValueError("no image to download")
+        # Newest first: when the image behind a URL changes, several sets share it.
+        tset = (
+            ThumbnailSet.objects.filter(source_url=img_url, updated_at__gte=timezone.now() - URL_REUSE_FOR)
+            .order_by("-updated_at")
+            .first()
+        )
+        if tset is None:
+            content, _ext = download_image_thumb(img_url)
+            tset = _store_variants(hash_file(content), lambda: load_image_thumb(content))
+            if tset.source_url != img_url:
+                tset.source_url = img_url
+                tset.save(update_fields=["source_url", "updated_at"])
+
+    pin.thumbnail_hash = tset.content_hash
+    # The legacy single `thumbnail` points at the shared 640px JPEG.
+    pin.thumbnail.name = variant_name(tset.content_hash, max(THUMB_SIZES), "jpg")
+    pin.thumbnail_status = "ready"
+    pin.save(update_fields=["thumbnail", "thumbnail_hash", "thumbnail_status"])
+    logger.debug("THUMB SAVED: %s", pin.thumbnail.name)
+
+
+def run_job(job: ThumbnailJob) -> bool:
+    pin = Pin.objects.filter(id=job.pin_id).first()
+    if pin is None:
+        ThumbnailJob.objects.filter(id=job.id).delete()
+        return False
+
+    try:
+        _render(job, pin)
+    except Exception as e:
+        gave_up = job.attempts >= MAX_ATTEMPTS or isinstance(e, SourceTooLarge)
+        logger.debug("THUMBNAIL GEN FAILED (job %s, attempt %s): %s", job.id, job.attempts, repr(e))
+        ThumbnailJob.objects.filter(id=job.id).update(
+            status="failed" if gave_up else "queued",
+            last_error=repr(e)[:2000],
+            run_after=timezone.now() + timedelta(seconds=30 * 2 ** job.attempts),
+            locked_at=None,
+        )
+        unfinished = ThumbnailJob.objects.filter(pin_id=pin.id, status__in=UNFINISHED).exclude(id=job.id)
+        if gave_up and not unfinished.exists():
+            # A refresh that fails leaves the thumbnail the pin already had.
+            pin.thumbnail_status = "ready" if pin.thumbnail else "failed"
+            pin.save(update_fields=["thumbnail_status"])
+        return False
+
+    ThumbnailJob.objects.filter(id=job.id).update(status="done", locked_at=None, last_error="")
+    return True
+
+
+def prune_finished_jobs(older_than: timedelta = JOB_RETENTION) -> int:
+    """Delete done / failed jobs older than older_than. Returns rows deleted."""
+    deleted, _ = ThumbnailJob.objects.filter(
+        status__in=("done", "failed"), created_at__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
+
+
+def run_pending_jobs(*, batch_size: int = 10) -> int:
+    """Work through everything that's due, then prune old finished jobs. Returns the number that succeeded."""
+    done = 0
+    while True:
+        jobs = _claim(batch_size)
+        if not jobs:
+            break
+        for job in jobs:
+            done += run_job(job)
+    prune_finished_jobs()
+    return done
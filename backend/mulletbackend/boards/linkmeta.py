@@ -1,13 +1,39 @@
 # boards/linkmeta.py
+"""
+Link previews for pins: page metadata (title / description / og:image) and
+the site favicon.
+
+Both lookups go through LinkMetaCache, shared by all users and keyed by the
+normalized URL, so a link anyone has pinned recently costs no DNS lookup,
+HTTP request or HTML parse. Successes live for LINK_META_CACHE_TTL, failures
+for LINK_META_FAILURE_TTL; hit / fetch counts are kept per row
+(`manage.py link_meta_stats`).
+"""
+import hashlib
 import ipaddress
+import logging
 import socket
-from urllib.parse import urljoin, urlparse
+from datetime import timedelta
+from typing import Callable, Dict, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
 
 import requests
 from bs4 import BeautifulSoup
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import LinkMetaCache
+
+logger = logging.getLogger(__name__)
 
 UA = {"User-Agent": "Mozilla/5.0", "Accept-Language": "en,en-GB;q=0.9"}
 
+# Query params that only track the click; dropped so shared links hit the same row.
+_TRACKING_PARAMS = ("fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid")
+
+EMPTY_META = {"title": "", "description": "", "image": ""}
+
 
 def _is_safe_url(url: str) -> bool:
     """Block requests to private/internal networks and non-HTTP schemes."""
@@ -36,16 +62,79 @@ def _is_safe_url(url: str) -> bool:
     return True
 
 
+def normalize_url(url: str) -> str:
+    """
+    Cache key form of a URL: lowercase scheme + host, no default port, no
+    fragment, no utm_* / click-id params, remaining params sorted.
+    """
+    try:
+        parsed = urlparse(url.strip())
+        port = parsed.port
+    except ValueError:
+        return url.strip()
+
+    scheme = (parsed.scheme or "http").lower()
+    host = (parsed.hostname or "").lower()
+    if port and (scheme, port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{port}"
+    query = urlencode(sorted(
+        (k, v)
+        for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    ))
+    return urlunparse((scheme, host, parsed.path or "/", parsed.params, query, ""))
+
+
+def _cached(kind: str, url: str, fetch: Callable[[str], Tuple[Dict[str, str], bool]]) -> Dict[str, str]:
+    """
+    LinkMetaCache front for fetch(url) -> (meta, ok). Expired or missing rows
+    are fetched and upserted; live rows (ok or not) are returned as they are.
+    """
+    key = normalize_url(url)
+    url_hash = hashlib.sha256(f"{kind}:{key}".encode()).hexdigest()
+    now = timezone.now()
+
+    row = LinkMetaCache.objects.filter(url_hash=url_hash, expires_at__gt=now).first()
+    if row is not None:
+        LinkMetaCache.objects.filter(pk=row.pk).update(hit_count=F("hit_count") + 1, last_hit_at=now)
+        logger.debug("LINK META HIT: %s %s", kind, key)
+        return {"title": row.title, "description": row.description, "image": row.image}
+
+    meta, ok = fetch(url)
+    ttl = settings.LINK_META_CACHE_TTL if ok else settings.LINK_META_FAILURE_TTL
+    fields = {
+        "kind": kind,
+        "url": key[:2048],
+        "ok": ok,
+        "title": meta["title"],
+        "description": meta["description"],
+        "image": meta["image"],
+        "fetched_at": now,
+        "expires_at": now + timedelta(seconds=ttl),
+    }
+    LinkMetaCache.objects.update_or_create(
+        url_hash=url_hash,
+        defaults={**fields, "fetch_count": F("fetch_count") + 1},
+        create_defaults={**fields, "fetch_count": 1},
+    )
+    logger.debug("LINK META MISS: %s %s (ok=%s)", kind, key, ok)
+    return dict(meta)
+
+
 def fetch_link_meta(url: str):
+    return _cached("page", url, _fetch_link_meta)
+
+
+def _fetch_link_meta(url: str):
     if not _is_safe_url(url):
-        return {"title": "", "description": "", "image": ""}
+        return EMPTY_META, False
 
     try:
         r = requests.get(url, timeout=6, headers=UA, allow_redirects=True)
         if r.status_code != 200 or not r.text:
-            return {"title": "", "description": "", "image": ""}
+            return EMPTY_META, False
     except Exception:
-        return {"title": "", "description": "", "image": ""}
+        return EMPTY_META, False
 
     s = BeautifulSoup(r.text, "html.parser")
 
@@ -63,7 +152,7 @@ def fetch_link_meta(url: str):
         elif img.startswith("/"):
             img = urljoin(url, img)
 
-    return {"title": title, "description": desc, "image": img or ""}
+    return {"title": title, "description": desc, "image": img or ""}, True
 
 def site_hostname(url: str) -> str:
     try:
@@ -75,15 +164,22 @@ def try_fetch_favicon_url(url: str) -> str | None:
     host = site_hostname(url)
     if not host:
         return None
+    return _cached("favicon", f"https://{host}/", _fetch_favicon_url)["image"]
+
+
+def _fetch_favicon_url(site: str):
+    """The site's /favicon.ico if it serves one, else Google's favicon service (ok=False)."""
+    host = site_hostname(site)
     ico = f"https://{host}/favicon.ico"
+    fallback = {**EMPTY_META, "image": f"https://www.google.com/s2/favicons?domain={host}&sz=128"}
 
     if not _is_safe_url(ico):
-        return f"https://www.google.com/s2/favicons?domain={host}&sz=128"
+        return fallback, False
 
     try:
         h = requests.head(ico, timeout=4, headers=UA, allow_redirects=True)
         if h.status_code == 200 and h.headers.get("content-type", "").startswith(("image/", "application/octet-stream")):
-            return ico
+            return {**EMPTY_META, "image": ico}, True
     except Exception:
         pass
-    return f"https://www.google.com/s2/favicons?domain={host}&sz=128"
+    return fallback, False
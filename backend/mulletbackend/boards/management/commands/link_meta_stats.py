@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from boards.models import LinkMetaCache
+
+class Command(BaseCommand):
+    help = "Show hit / fetch counts for the shared link-preview cache (optionally pruning expired rows)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prune", action="store_true", help="Delete expired rows first")
+        parser.add_argument("--top", type=int, default=10, help="Most-hit URLs to list (default: 10)")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        if options["prune"]:
+            deleted, _ = LinkMetaCache.objects.filter(expires_at__lte=now).delete()
+            self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} expired entries"))
+
+        for kind, _ in LinkMetaCache.KIND_CHOICES:
+            s = LinkMetaCache.objects.filter(kind=kind).aggregate(
+                rows=Count("id"),
+                live=Count("id", filter=Q(expires_at__gt=now)),
+                failed=Count("id", filter=Q(ok=False, expires_at__gt=now)),
+                hits=Sum("hit_count"),
+                fetches=Sum("fetch_count"),
+            )
+            hits, fetches = s["hits"] or 0, s["fetches"] or 0
+            rate = 100 * hits / (hits + fetches) if hits + fetches else 0
+            self.stdout.write(
+                f"{kind}: {s['rows']} rows ({s['live']} live, {s['failed']} cached failures), "
+                f"{hits} hits / {fetches} fetches ({rate:.1f}% hit rate)"
+            )
+
+        top = LinkMetaCache.objects.filter(hit_count__gt=0).order_by("-hit_count")[: options["top"]]
+        for row in top.only("kind", "url", "hit_count"):
+            self.stdout.write(f"  {row.hit_count:>6}  {row.kind:<7}  {row.url}")
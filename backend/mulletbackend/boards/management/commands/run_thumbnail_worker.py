@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from boards.jobs import run_pending_jobs
+
+class Command(BaseCommand):
+    help = "Render queued pin thumbnails (use with THUMBNAIL_JOBS_RUNNER=worker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit")
+        parser.add_argument("--sleep", type=int, default=2, help="Seconds to wait when the queue is empty (default: 2)")
+        parser.add_argument("--batch-size", type=int, default=10, help="Jobs claimed at a time (default: 10)")
+
+    def handle(self, *args, **options):
+        while True:
+            done = run_pending_jobs(batch_size=options["batch_size"])
+            if done:
+                self.stdout.write(self.style.SUCCESS(f"Rendered {done} thumbnails"))
+            if options["once"]:
+                return
+            time.sleep(options["sleep"])
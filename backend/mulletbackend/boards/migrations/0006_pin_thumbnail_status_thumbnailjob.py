@@ -0,0 +1,44 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_existing_thumbnails_ready(apps, schema_editor):
+    Pin = apps.get_model("boards", "Pin")
+    Pin.objects.exclude(thumbnail="").exclude(thumbnail__isnull=True).update(thumbnail_status="ready")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0005_alter_pin_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pin',
+            name='thumbnail_status',
+            field=models.CharField(choices=[('none', 'none'), ('pending', 'pending'), ('ready', 'ready'), ('failed', 'failed')], default='none', max_length=8),
+        ),
+        migrations.CreateModel(
+            name='ThumbnailJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('file', 'file'), ('url', 'url')], max_length=8)),
+                ('image_url', models.URLField(blank=True, max_length=2048)),
+                ('status', models.CharField(choices=[('queued', 'queued'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')], default='queued', max_length=8)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('pin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='thumbnail_jobs', to='boards.pin')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='boards_thum_status_e07674_idx')],
+            },
+        ),
+        migrations.RunPython(mark_existing_thumbnails_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0007_pin_thumbnail_hash_thumbnailset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkMetaCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('page', 'page'), ('favicon', 'favicon')], max_length=8)),
+                ('url_hash', models.CharField(max_length=64, unique=True)),
+                ('url', models.URLField(max_length=2048)),
+                ('ok', models.BooleanField(default=True)),
+                ('title', models.TextField(blank=True)),
+                ('description', models.TextField(blank=True)),
+                ('image', models.TextField(blank=True)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+                ('fetch_count', models.PositiveIntegerField(default=0)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='boards_link_expires_38166f_idx')],
+            },
+        ),
+    ]
@@ -3,9 +3,13 @@ from django.db import models
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.conf import settings
+from django.utils import timezone
 
+from core.models import LoadedValuesMixin
 
-class Pin(models.Model):
+
+
+class Pin(LoadedValuesMixin, models.Model):
     KIND_CHOICES = [
         ("image", "image"),
         ("link", "link"),
@@ -24,6 +28,16 @@ class Pin(models.Model):
     mime_type = models.CharField(max_length=128, blank=True)
     file_size = models.PositiveIntegerField(default=0)
 
+    THUMBNAIL_STATUS_CHOICES = [
+        ("none", "none"),        # nothing to generate (or never asked)
+        ("pending", "pending"),  # a ThumbnailJob is queued / running
+        ("ready", "ready"),
+        ("failed", "failed"),
+    ]
+    thumbnail_status = models.CharField(max_length=8, choices=THUMBNAIL_STATUS_CHOICES, default="none")
+    # sha256 of the thumbnail source (see ThumbnailSet); blank for legacy single thumbnails
+    thumbnail_hash = models.CharField(max_length=64, blank=True, default="")
+
     mode = models.ForeignKey("core.Mode", on_delete=models.CASCADE, related_name="pins")
 
     content_type = models.ForeignKey(
@@ -57,3 +71,94 @@ class Pin(models.Model):
 
     def __str__(self) -> str:
         return self.title or f"Pin {self.pk}"
+
+
+class ThumbnailSet(models.Model):
+    """
+    Thumbnails rendered once per source content (sha256 of the uploaded file
+    or downloaded og:image), at every boards.thumbs.THUMB_SIZES x THUMB_FORMATS
+    under boards.thumbs.variant_name(). Pins point at it by content_hash, so
+    identical uploads / images share the files and skip the image work.
+    """
+    content_hash = models.CharField(max_length=64, unique=True)
+    # Last remote image this content was downloaded from, so refreshing a
+    # link with the same og:image doesn't even re-download it.
+    source_url = models.URLField(max_length=2048, blank=True, db_index=True)
+    width = models.PositiveIntegerField(default=0)   # of the largest variant
+    height = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"ThumbnailSet {self.content_hash[:12]}"
+
+
+class ThumbnailJob(models.Model):
+    """
+    Queued thumbnail work for a pin, run off the request path by
+    boards.jobs (in a background thread, or `manage.py run_thumbnail_worker`).
+    """
+    SOURCE_CHOICES = [
+        ("file", "file"),  # render the pin's uploaded image / PDF
+        ("url", "url"),    # download a remote image (og:image / favicon)
+    ]
+    STATUS_CHOICES = [
+        ("queued", "queued"),
+        ("running", "running"),
+        ("done", "done"),
+        ("failed", "failed"),
+    ]
+
+    pin = models.ForeignKey(Pin, on_delete=models.CASCADE, related_name="thumbnail_jobs")
+    source = models.CharField(max_length=8, choices=SOURCE_CHOICES)
+    image_url = models.URLField(max_length=2048, blank=True)
+
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"ThumbnailJob {self.pk} · pin {self.pin_id} · {self.status}"
+
+
+class LinkMetaCache(models.Model):
+    """
+    Shared (cross-user) cache of boards.linkmeta lookups, one row per kind +
+    normalized URL. Failed lookups are stored too (ok=False) with a shorter
+    TTL, so a dead link isn't fetched again on every pin / refresh.
+    """
+    KIND_CHOICES = [
+        ("page", "page"),        # fetch_link_meta: title / description / og:image
+        ("favicon", "favicon"),  # try_fetch_favicon_url, keyed by site
+    ]
+
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+    url_hash = models.CharField(max_length=64, unique=True)  # sha256 of "<kind>:<normalized url>"
+    url = models.URLField(max_length=2048)
+
+    ok = models.BooleanField(default=True)
+    title = models.TextField(blank=True)
+    description = models.TextField(blank=True)
+    image = models.TextField(blank=True)  # og:image, or the favicon URL
+
+    fetched_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+    fetch_count = models.PositiveIntegerField(default=0)
+    hit_count = models.PositiveIntegerField(default=0)
+    last_hit_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["expires_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} {self.url}"
@@ -7,14 +7,14 @@ logger = logging.getLogger(__name__)
 
 from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import default_storage
 
 from .models import Pin
-from .linkmeta import fetch_link_meta, try_fetch_favicon_url
+from .jobs import enqueue_thumbnail, wants_file_thumbnail
+from .linkmeta import fetch_link_meta
+from .thumbs import THUMB_FORMATS, THUMB_SIZES, variant_name
 from .validation import ALLOWED_FILE_MIMES, ALLOWED_FILE_EXTS, MAX_FILE_BYTES
 
-# local thumbnail generators (Pillow + PyMuPDF)
-from .thumbs import make_image_thumb, make_pdf_thumb
-
 
 def _extract_title(obj):
     for attr in ("title", "name", "label"):
@@ -29,6 +29,7 @@ class PinSerializer(serializers.ModelSerializer):
     entity_id = serializers.IntegerField(write_only=True)
 
     display_title = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = Pin
@@ -37,6 +38,8 @@ class PinSerializer(serializers.ModelSerializer):
             "kind",
             "file",
             "thumbnail",
+            "thumbnail_status",
+            "thumbnails",
             "url",
             "title",
             "description",
@@ -56,6 +59,8 @@ class PinSerializer(serializers.ModelSerializer):
             "id",
             "created_at",
             "thumbnail",
+            "thumbnail_status",
+            "thumbnails",
             "content_type",
             "object_id",
             "entity_title",
@@ -69,6 +74,23 @@ class PinSerializer(serializers.ModelSerializer):
         live = _extract_title(target) if target else None
         return live or (obj.entity_title or "")
 
+    def get_thumbnails(self, obj):
+        """
+        {"160": {"jpg": url, "webp": url}, "320": {...}, "640": {...}} for pins
+        with a shared ThumbnailSet; None for legacy pins (use `thumbnail`).
+        """
+        if not obj.thumbnail_hash:
+            return None
+        req = self.context.get("request")
+        out = {}
+        for size in THUMB_SIZES:
+            urls = {}
+            for _fmt, ext in THUMB_FORMATS:
+                url = default_storage.url(variant_name(obj.thumbnail_hash, size, ext))
+                urls[ext] = req.build_absolute_uri(url) if req else url
+            out[str(size)] = urls
+        return out
+
     def to_representation(self, instance):
         """
         Ensure file + thumbnail are absolute URLs so the frontend can render them.
@@ -149,31 +171,6 @@ class PinSerializer(serializers.ModelSerializer):
         title = getattr(instance, "title", None) or "(Untitled)"
         return ct, instance.id, title
 
-    def _download_to_thumbnail(self, pin: Pin, img_url: str):
-        """
-        Download remote image and save as thumbnail.
-        """
-        import requests
-        from django.core.files.base import ContentFile
-
-        r = requests.get(img_url, timeout=8)
-        r.raise_for_status()
-        content_type = (r.headers.get("content-type") or "").lower()
-
-        ext = "jpg"
-        if "png" in content_type:
-            ext = "png"
-        elif "webp" in content_type:
-            ext = "webp"
-
-        pin.thumbnail.save(f"{pin.id}_linkthumb.{ext}", ContentFile(r.content), save=True)
-        logger.debug("LINK THUMB SAVED: %s", pin.thumbnail.name)
-        try:
-            logger.debug("LINK THUMB PATH: %s", pin.thumbnail.path)
-            logger.debug("LINK THUMB EXISTS: %s", os.path.exists(pin.thumbnail.path))
-        except Exception as e:
-            logger.debug("LINK THUMB PATH ERROR: %s", repr(e))
-
     def update(self, instance, validated_data):
         new_mode = validated_data.get("mode", None)
 
@@ -244,49 +241,11 @@ class PinSerializer(serializers.ModelSerializer):
             **validated_data,
         )
 
-        # Generate thumbnails for uploaded files
-        try:
-            if not pin.thumbnail and pin.file:
-                mt = (pin.mime_type or "").lower()
-                name = (pin.file.name or "").lower()
-
-                # image thumb
-                if pin.kind == "image" or mt.startswith("image/"):
-                    thumb_cf = make_image_thumb(pin.file)
-                    pin.thumbnail.save(f"{pin.id}_thumb.jpg", thumb_cf, save=True)
-                    logger.debug("THUMB SAVED: %s", pin.thumbnail.name)
-                    try:
-                        logger.debug("THUMB PATH: %s", pin.thumbnail.path)
-                        logger.debug("THUMB EXISTS: %s", os.path.exists(pin.thumbnail.path))
-                    except Exception as e:
-                        logger.debug("THUMB PATH ERROR: %s", repr(e))
-
-                # pdf thumb
-                elif mt == "application/pdf" or name.endswith(".pdf"):
-                    thumb_cf = make_pdf_thumb(pin.file)
-                    pin.thumbnail.save(f"{pin.id}_thumb.jpg", thumb_cf, save=True)
-                    logger.debug("PDF THUMB SAVED: %s", pin.thumbnail.name)
-                    try:
-                        logger.debug("PDF THUMB PATH: %s", pin.thumbnail.path)
-                        logger.debug("PDF THUMB EXISTS: %s", os.path.exists(pin.thumbnail.path))
-                    except Exception as e:
-                        logger.debug("PDF THUMB PATH ERROR: %s", repr(e))
-
-        except Exception as e:
-            logger.debug("THUMBNAIL GEN FAILED: %s", repr(e))
-
-        # Link thumbnails from OG image / favicon (download and store)
-        if not pin.thumbnail:
-            try:
-                img_url = meta_img
-                if not img_url and pin.kind == "link" and pin.url:
-                    img_url = try_fetch_favicon_url(pin.url)
-                if img_url:
-                    self._download_to_thumbnail(pin, img_url)
-            except Exception as e:
-                logger.debug("LINK THUMB FAILED: %s", repr(e))
+        # Thumbnails are rendered / downloaded off the request path (boards.jobs);
+        # the pin goes back with thumbnail_status="pending".
+        if wants_file_thumbnail(pin):
+            enqueue_thumbnail(pin)
+        elif pin.kind == "link" and pin.url:
+            enqueue_thumbnail(pin, image_url=meta_img or "")
 
-        # Keep this for safety; thumbnail.save(save=True) already persists thumbnail,
-        # but calling pin.save() is harmless for other field changes.
-        pin.save()
         return pin
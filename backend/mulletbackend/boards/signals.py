@@ -1,10 +1,11 @@
 # boards/signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
 
 from boards.models import Pin
 from core.models import Task, Goal, Project, Milestone
+from core.services.mode_version import bump_mode_versions
 
 
 def _sync_pin_mode(instance):
@@ -24,3 +25,10 @@ def _sync_pin_mode(instance):
 @receiver(post_save, sender=Milestone)
 def sync_pin_mode_on_save(sender, instance, **kwargs):
     _sync_pin_mode(instance)
+
+
+@receiver(post_save, sender=Pin)
+@receiver(post_delete, sender=Pin)
+def bump_pin_mode_versions(sender, instance, **kwargs):
+    loaded = getattr(instance, "_loaded_values", {})
+    bump_mode_versions([instance.mode_id, loaded.get("mode_id")])
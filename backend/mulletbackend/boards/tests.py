@@ -1,3 +1,189 @@
-from django.test import TestCase
+"""
+Thumbnail job queue behaviour, and decode benchmarks for
+boards.thumbs.load_image_thumb.
 
-# Create your tests here.
+Each benchmark case runs in a forked child, so ru_maxrss measures that one decode:
+the child's peak RSS minus its RSS at fork. Pillow allocates image memory
+in C, which tracemalloc can't see. Latency is logged, not asserted tightly;
+run with `manage.py test boards -v 2` and `--debug-mode` to see it.
+"""
+import logging
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from core.models import Mode
+
+from . import jobs
+from .models import Pin, ThumbnailJob
+from .thumbs import load_image_thumb
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def _peak_rss() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # kB on Linux
+
+
+def _decode_in_child(path, conn):
+    base = _peak_rss()
+    started = time.perf_counter()
+    try:
+        with open(path, "rb") as fh:
+            img = load_image_thumb(File(fh, name=os.path.basename(path)))
+        conn.send({"size": img.size, "peak": _peak_rss() - base, "seconds": time.perf_counter() - started})
+    except Exception as e:
+        conn.send({"error": type(e).__name__, "detail": repr(e), "peak": _peak_rss() - base})
+    finally:
+        conn.close()
+
+
+def _measure(path) -> dict:
+    ctx = multiprocessing.get_context("fork")
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_decode_in_child, args=(path, child))
+    proc.start()
+    result = parent.recv()
+    proc.join()
+    logger.info("THUMB BENCH %s: %s", os.path.basename(path), result)
+    return result
+
+
+def _fixture(path, size, fmt, **params):
+    img = Image.new("RGB", size, (200, 180, 150))
+    draw = ImageDraw.Draw(img)
+    w, h = size
+    for i in range(0, w, 400):
+        draw.rectangle([i, 0, i + 200, h], fill=(i % 255, 90, 160))
+    draw.ellipse([w // 4, h // 4, 3 * w // 4, 3 * h // 4], fill=(30, 120, 60))
+    img.save(path, format=fmt, **params)
+
+
+@skipUnless(sys.platform.startswith("linux"), "ru_maxrss units / fork are Linux-specific")
+class LoadImageThumbBenchmark(SimpleTestCase):
+    JPEG_SIZE = (8000, 6000)  # 48MP phone photo: 144MB as full RGB
+    PNG_SIZE = (6000, 4000)   # 24MP: 72MB as full RGB
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.mkdtemp()
+        cls.jpeg = os.path.join(cls.tmp, "large.jpg")
+        cls.png = os.path.join(cls.tmp, "large.png")
+        _fixture(cls.jpeg, cls.JPEG_SIZE, "JPEG", quality=90)
+        _fixture(cls.png, cls.PNG_SIZE, "PNG", compress_level=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_jpeg_is_decoded_at_draft_size(self):
+        result = _measure(self.jpeg)
+        self.assertNotIn("error", result)
+        self.assertLessEqual(max(result["size"]), 640)
+        # draft() decodes at 1/8 scale (1000x750); a full decode alone is 144MB.
+        self.assertLess(result["peak"], 40 * MB)
+        self.assertLess(result["seconds"], 5)
+
+    @override_settings(THUMBNAIL_MAX_DECODE_MB=200)
+    def test_png_stays_under_the_decode_ceiling(self):
+        # PNG has no reduced-size decode: it is decoded in full, so only the
+        # ceiling bounds it.
+        result = _measure(self.png)
+        self.assertNotIn("error", result)
+        self.assertLessEqual(max(result["size"]), 640)
+        self.assertLess(result["peak"], 200 * MB)
+        self.assertLess(result["seconds"], 10)
+
+    @override_settings(THUMBNAIL_MAX_DECODE_MB=16)
+    def test_source_over_the_ceiling_fails_before_decoding(self):
+        result = _measure(self.png)
+        self.assertEqual(result.get("error"), "SourceTooLarge")
+        self.assertLess(result["peak"], 16 * MB)
+
+
+@override_settings(THUMBNAIL_JOBS_RUNNER="worker")
+class ThumbnailJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("pinner", password="x")
+        cls.mode = Mode.objects.create(user=cls.user, title="M", position=0)
+
+    def make_pin(self, **fields):
+        return Pin.objects.create(user=self.user, mode=self.mode, kind="link", url="https://example.com/", **fields)
+
+    def run_until_given_up(self, job):
+        for _ in range(jobs.MAX_ATTEMPTS):
+            ThumbnailJob.objects.filter(id=job.id).update(run_after=timezone.now() - timedelta(seconds=1))
+            (claimed,) = jobs._claim(10)
+            jobs.run_job(claimed)
+        job.refresh_from_db()
+        return job
+
+    @mock.patch("boards.jobs._render", side_effect=ValueError("boom"))
+    def test_give_up_without_a_thumbnail_fails_the_pin(self, _render):
+        pin = self.make_pin()
+        job = self.run_until_given_up(jobs.enqueue_thumbnail(pin, image_url="https://example.com/a.png"))
+        pin.refresh_from_db()
+        self.assertEqual((job.status, pin.thumbnail_status), ("failed", "failed"))
+
+    @mock.patch("boards.jobs._render", side_effect=ValueError("boom"))
+    def test_failed_refresh_keeps_the_existing_thumbnail(self, _render):
+        pin = self.make_pin(thumbnail="thumbs/old_640.jpg", thumbnail_status="ready")
+        self.run_until_given_up(jobs.enqueue_thumbnail(pin, image_url="https://example.com/a.png"))
+        pin.refresh_from_db()
+        self.assertEqual((pin.thumbnail.name, pin.thumbnail_status), ("thumbs/old_640.jpg", "ready"))
+
+    def test_image_url_is_cleaned(self):
+        pin = self.make_pin()
+        self.assertEqual(jobs.enqueue_thumbnail(pin, image_url="javascript:alert(1)").image_url, "")
+        long_url = "https://example.com/" + "a" * jobs.MAX_IMAGE_URL
+        self.assertEqual(jobs.enqueue_thumbnail(pin, image_url=long_url).image_url, "")
+
+    def test_prune_keeps_recent_and_unfinished_jobs(self):
+        pin = self.make_pin()
+        old = timezone.now() - jobs.JOB_RETENTION - timedelta(days=1)
+        stale_done = ThumbnailJob.objects.create(pin=pin, status="done")
+        old_queued = ThumbnailJob.objects.create(pin=pin, status="queued")
+        recent_failed = ThumbnailJob.objects.create(pin=pin, status="failed")
+        ThumbnailJob.objects.filter(id__in=[stale_done.id, old_queued.id]).update(created_at=old)
+        self.assertEqual(jobs.prune_finished_jobs(), 1)
+        self.assertEqual(
+            set(ThumbnailJob.objects.values_list("id", flat=True)), {old_queued.id, recent_failed.id}
+        )
+
+
+class ThumbnailThreadTests(SimpleTestCase):
+    def tearDown(self):
+        jobs._thread = None
+        jobs._wake.clear()
+
+    @mock.patch("boards.jobs.connections")
+    @mock.patch("boards.jobs._next_due_in", return_value=None)
+    @mock.patch("boards.jobs.run_pending_jobs", return_value=0)
+    def test_exiting_loop_gives_up_its_slot_before_a_late_wake(self, *_):
+        jobs._thread = threading.current_thread()
+        jobs._thread_loop()  # nothing unfinished: the loop exits
+        self.assertIsNone(jobs._thread)
+
+        # An on_commit wake arriving while the old thread is still unwinding
+        # must start a new thread rather than trust the exiting one.
+        with mock.patch("boards.jobs.threading.Thread") as Thread:
+            jobs._start_thread()
+        Thread.return_value.start.assert_called_once_with()
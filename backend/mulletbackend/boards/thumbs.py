@@ -1,14 +1,67 @@
 # boards/thumbs.py
+import hashlib
 import logging
+import os
+import tempfile
+from contextlib import contextmanager
 from io import BytesIO
 from PIL import Image
+from django.conf import settings
 from django.core.files.base import ContentFile
 
 logger = logging.getLogger(__name__)
 
 
-def make_image_thumb(file_field, max_size=(640, 640), format="JPEG", quality=80):
-    logger.debug("THUMB: make_image_thumb called")
+# Every rendered source gets these, shared by all pins with the same content
+# (boards.models.ThumbnailSet): grids ask for 160 / 320, the pin view for 640.
+THUMB_SIZES = (160, 320, 640)
+THUMB_FORMATS = (("JPEG", "jpg"), ("WEBP", "webp"))
+
+
+def variant_name(content_hash, size, ext):
+    """Storage path of one variant, derived from the source's sha256 alone."""
+    return f"pins/thumbs/{content_hash[:2]}/{content_hash}/{size}.{ext}"
+
+
+def hash_file(file_like, chunk_size=1024 * 1024):
+    """sha256 of a FieldFile / ContentFile, read in chunks."""
+    h = hashlib.sha256()
+    file_like.open("rb")
+    file_like.seek(0)
+    for chunk in iter(lambda: file_like.read(chunk_size), b""):
+        h.update(chunk)
+    file_like.seek(0)
+    return h.hexdigest()
+
+
+class SourceTooLarge(ValueError):
+    """The decoded source would exceed THUMBNAIL_MAX_DECODE_MB; retrying won't help."""
+
+
+# Modes Pillow resamples natively; anything else (palette, 1-bit, 16-bit…)
+# is converted before resizing, which for those formats is a small image anyway.
+_RESIZABLE_MODES = ("RGB", "RGBA", "L", "LA", "CMYK")
+
+
+def _check_decode_size(img):
+    limit = getattr(settings, "THUMBNAIL_MAX_DECODE_MB", 200) * 1024 * 1024
+    decoded = img.width * img.height * len(img.getbands())
+    if decoded > limit:
+        raise SourceTooLarge(f"{img.size} {img.mode} needs {decoded // (1024 * 1024)}MB to decode")
+
+
+def load_image_thumb(file_field, max_size=(640, 640)):
+    """
+    Decode an image at (close to) thumbnail size and shrink it to fit
+    max_size. Returns an RGB PIL image.
+
+    JPEGs are decoded with draft(), i.e. DCT-scaled by 1/2, 1/4 or 1/8 in the
+    decoder, so a 48MP photo never exists in memory at full size. Other
+    formats are decoded once in their own mode, checked against the memory
+    ceiling, and shrunk with reduce() + resample (thumbnail's reducing_gap)
+    before the RGB conversion, so no full-size converted copy is made.
+    """
+    logger.debug("THUMB: load_image_thumb called")
     logger.debug("THUMB: file name = %s", getattr(file_field, "name", None))
 
     try:
@@ -27,28 +80,59 @@ def make_image_thumb(file_field, max_size=(640, 640), format="JPEG", quality=80)
         raise
 
     try:
-        img = img.convert("RGB")
-        img.thumbnail(max_size)
+        # No-op for anything but JPEG; picks the smallest scale still >= max_size.
+        if img.draft("RGB", max_size):
+            logger.debug("THUMB: JPEG draft decode at %s", img.size)
+        _check_decode_size(img)
+
+        if img.mode not in _RESIZABLE_MODES:
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        img.thumbnail(max_size, reducing_gap=2.0)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
         logger.debug("THUMB: converted + resized: %s", img.size)
-    except Exception as e:
-        logger.debug("THUMB ERROR: image processing failed: %s", repr(e))
+    except SourceTooLarge:
         raise
-
-    try:
-        buf = BytesIO()
-        img.save(buf, format=format, quality=quality, optimize=True)
-        buf.seek(0)
-        data = buf.read()
-        logger.debug("THUMB: image saved to buffer, bytes = %s", len(data))
     except Exception as e:
-        logger.debug("THUMB ERROR: saving image failed: %s", repr(e))
+        logger.debug("THUMB ERROR: image processing failed: %s", repr(e))
         raise
 
-    return ContentFile(data)
+    return img
 
 
-def make_pdf_thumb(file_field, max_size=(640, 640)):
-    logger.debug("THUMB: make_pdf_thumb called")
+@contextmanager
+def _local_path(file_field, chunk_size=1024 * 1024):
+    """
+    A filesystem path for the stored file: its own on FileSystemStorage,
+    otherwise a temp copy streamed chunk by chunk (S3 & co. have no .path).
+    """
+    try:
+        path = file_field.path
+    except (AttributeError, NotImplementedError):
+        path = None
+    if path and os.path.exists(path):
+        yield path
+        return
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        file_field.open("rb")
+        file_field.seek(0)
+        for chunk in iter(lambda: file_field.read(chunk_size), b""):
+            tmp.write(chunk)
+        tmp.flush()
+        yield tmp.name
+
+
+def load_pdf_thumb(file_field, max_size=(640, 640)):
+    """
+    Render the first page of a PDF at (at most) max_size. Returns an RGB PIL image.
+
+    MuPDF opens the file by path and only reads what page 0 needs, the page
+    is rasterised straight at the thumbnail scale, and the raw RGB samples go
+    to Pillow without a PNG encode/decode, so memory stays flat however big
+    the PDF is.
+    """
+    logger.debug("THUMB: load_pdf_thumb called")
     logger.debug("THUMB: file name = %s", getattr(file_field, "name", None))
 
     try:
@@ -58,41 +142,66 @@ def make_pdf_thumb(file_field, max_size=(640, 640)):
         logger.debug("THUMB ERROR: importing PyMuPDF failed: %s", repr(e))
         raise
 
-    try:
-        file_field.open("rb")
-        file_field.seek(0)
-        pdf_bytes = file_field.read()
-        logger.debug("THUMB: PDF bytes read: %s", len(pdf_bytes))
-    except Exception as e:
-        logger.debug("THUMB ERROR: reading PDF failed: %s", repr(e))
-        raise
-
-    try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        page = doc.load_page(0)
-        logger.debug("THUMB: PDF page loaded")
-    except Exception as e:
-        logger.debug("THUMB ERROR: PDF render failed: %s", repr(e))
-        raise
-
-    try:
-        mat = fitz.Matrix(2, 2)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        img = Image.open(BytesIO(pix.tobytes("png"))).convert("RGB")
-        img.thumbnail(max_size)
-        logger.debug("THUMB: PDF page rendered to image: %s", img.size)
-    except Exception as e:
-        logger.debug("THUMB ERROR: converting PDF to image failed: %s", repr(e))
-        raise
-
-    try:
-        out = BytesIO()
-        img.save(out, format="JPEG", quality=80, optimize=True)
-        out.seek(0)
-        data = out.read()
-        logger.debug("THUMB: PDF thumb saved, bytes = %s", len(data))
-    except Exception as e:
-        logger.debug("THUMB ERROR: saving PDF thumb failed: %s", repr(e))
-        raise
-
-    return ContentFile(data)
+    with _local_path(file_field) as path:
+        try:
+            doc = fitz.open(path, filetype="pdf")
+            logger.debug("THUMB: PDF opened from %s", path)
+        except Exception as e:
+            logger.debug("THUMB ERROR: opening PDF failed: %s", repr(e))
+            raise
+
+        try:
+            page = doc.load_page(0)
+            rect = page.rect
+            zoom = min(max_size[0] / rect.width, max_size[1] / rect.height)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+            img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            logger.debug("THUMB: PDF page rendered to image: %s", img.size)
+        except Exception as e:
+            logger.debug("THUMB ERROR: PDF render failed: %s", repr(e))
+            raise
+        finally:
+            doc.close()
+
+    # Rounding in the rasteriser can overshoot by a pixel.
+    img.thumbnail(max_size)
+    return img
+
+
+def encode_variants(img, sizes=THUMB_SIZES, formats=THUMB_FORMATS, quality=80):
+    """
+    {(size, ext): ContentFile} for every size x format. Each size is scaled
+    down from the previous (larger) one rather than from the original.
+    """
+    out = {}
+    current = img
+    for size in sorted(sizes, reverse=True):
+        current = current.copy()
+        current.thumbnail((size, size))
+        for fmt, ext in formats:
+            try:
+                buf = BytesIO()
+                params = {"optimize": True} if fmt == "JPEG" else {"method": 4}
+                current.save(buf, format=fmt, quality=quality, **params)
+                out[(size, ext)] = ContentFile(buf.getvalue())
+            except Exception as e:
+                logger.debug("THUMB ERROR: saving %s@%s failed: %s", fmt, size, repr(e))
+                raise
+    logger.debug("THUMB: encoded %s variants from %s", len(out), img.size)
+    return out
+
+
+def download_image_thumb(img_url, timeout=8):
+    """Fetch a remote image (og:image / favicon) as-is. Returns (ContentFile, ext)."""
+    import requests
+
+    r = requests.get(img_url, timeout=timeout)
+    r.raise_for_status()
+    content_type = (r.headers.get("content-type") or "").lower()
+
+    ext = "jpg"
+    if "png" in content_type:
+        ext = "png"
+    elif "webp" in content_type:
+        ext = "webp"
+    return ContentFile(r.content), ext
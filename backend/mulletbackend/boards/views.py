@@ -13,11 +13,13 @@ from rest_framework.response import Response
 
 from .models import Pin
 from .serializers import PinSerializer
-from .linkmeta import fetch_link_meta, try_fetch_favicon_url
+from .jobs import enqueue_thumbnail
+from .linkmeta import fetch_link_meta
 from collaboration.permissions import accessible_mode_ids, validate_mode_write_access
+from core.conditional import ConditionalListMixin
 
 
-class PinViewSet(viewsets.ModelViewSet):
+class PinViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     serializer_class = PinSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter]
@@ -86,16 +88,10 @@ class PinViewSet(viewsets.ModelViewSet):
             pin.description = meta["description"]
             updated = True
 
-        img = meta.get("image") or try_fetch_favicon_url(pin.url)
-        if img:
-            try:
-                serializer = self.get_serializer(instance=pin)
-                serializer._download_to_thumbnail(pin, img)
-                updated = True
-            except Exception:
-                pass
-
         if updated:
             pin.save()
 
-        return Response({"ok": True, "updated": updated})
+        # og:image (or favicon) download happens in the thumbnail queue
+        enqueue_thumbnail(pin, image_url=meta.get("image") or "")
+
+        return Response({"ok": True, "updated": updated, "thumbnail_status": pin.thumbnail_status})
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CollaborationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'collaboration'
+
+    def ready(self):
+        import collaboration.signals  # noqa: F401
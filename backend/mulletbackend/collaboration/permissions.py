@@ -1,25 +1,86 @@
+from typing import FrozenSet, NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Q
 from core.models import Mode
 
 
+class ModeAccess(NamedTuple):
+    readable: FrozenSet[int]
+    writable: FrozenSet[int]
+
+
+_EMPTY = ModeAccess(frozenset(), frozenset())
+
+
+def _cache_key(user_id) -> str:
+    return f"mode_access:{user_id}"
+
+
+def _compute_mode_access(user) -> ModeAccess:
+    readable, writable = set(), set()
+    # One query: owned modes + every collaboration with its role.
+    rows = Mode.objects.filter(
+        Q(user=user) | Q(collaborators__user=user)
+    ).values_list("id", "user_id", "collaborators__user_id", "collaborators__role")
+    for mode_id, owner_id, collab_user_id, role in rows:
+        readable.add(mode_id)
+        if owner_id == user.id or (collab_user_id == user.id and role == "editor"):
+            writable.add(mode_id)
+    return ModeAccess(frozenset(readable), frozenset(writable))
+
+
+def get_mode_access(user) -> ModeAccess:
+    """
+    The user's readable / writable mode ids, computed once per request.
+
+    Memoized on the user object (DRF shares it for the request's lifetime), backed by a cross-request cache that
+    invalidate_mode_access() clears whenever a Mode or ModeCollaborator
+    changes.
+    """
+    if user is None or not getattr(user, "is_authenticated", False):
+        return _EMPTY
+
+    access = getattr(user, "_mode_access", None)
+    if access is not None:
+        return access
+
+    timeout = getattr(settings, "MODE_ACCESS_CACHE_TIMEOUT", 0)
+    if timeout:
+        cached = cache.get(_cache_key(user.id))
+        if cached is not None:
+            access = ModeAccess(frozenset(cached[0]), frozenset(cached[1]))
+    if access is None:
+        access = _compute_mode_access(user)
+        if timeout:
+            cache.set(_cache_key(user.id), (list(access.readable), list(access.writable)), timeout)
+
+    user._mode_access = access
+    return access
+
+
+def invalidate_mode_access(user_ids) -> None:
+    """Drop cached access for these users (collaboration.signals calls it on commit)."""
+    keys = [_cache_key(uid) for uid in set(user_ids) if uid]
+    if keys:
+        cache.delete_many(keys)
+
+
 def accessible_mode_ids(user):
     """
-    Return a lazy queryset of Mode PKs the user can READ.
+    Return a frozenset of Mode PKs the user can READ.
     Includes modes they own and modes they collaborate on (any role).
     """
-    return Mode.objects.filter(
-        Q(user=user) | Q(collaborators__user=user)
-    ).values_list("id", flat=True)
+    return get_mode_access(user).readable
 
 
 def writable_mode_ids(user):
     """
-    Return a lazy queryset of Mode PKs the user can WRITE to.
+    Return a frozenset of Mode PKs the user can WRITE to.
     Includes modes they own and modes they are an *editor* on.
     """
-    return Mode.objects.filter(
-        Q(user=user) | Q(collaborators__user=user, collaborators__role="editor")
-    ).values_list("id", flat=True)
+    return get_mode_access(user).writable
 
 
 def validate_mode_write_access(user, mode):
@@ -31,7 +92,6 @@ def validate_mode_write_access(user, mode):
         return
     if mode.user_id == user.id:
         return
-    from collaboration.models import ModeCollaborator
-    if not ModeCollaborator.objects.filter(user=user, mode=mode, role="editor").exists():
+    if mode.id not in writable_mode_ids(user):
         from rest_framework.exceptions import PermissionDenied
         raise PermissionDenied("You don't have write access to this mode.")
@@ -0,0 +1,63 @@
+# collaboration/signals.py
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import Profile
+from collaboration.models import ModeCollaborator
+from collaboration.permissions import invalidate_mode_access
+from core.models import Mode
+from core.services.mode_version import bump_mode_versions
+
+
+def _forget(instance, user_id):
+    # After commit: a concurrent request that recomputes before then would
+    # re-cache the old access for MODE_ACCESS_CACHE_TIMEOUT.
+    transaction.on_commit(lambda: invalidate_mode_access([user_id]))
+    # Drop the per-request memo too if this request's user object is attached.
+    user = instance._state.fields_cache.get("user")
+    if user is not None:
+        user.__dict__.pop("_mode_access", None)
+
+
+@receiver(post_save, sender=Mode)
+def mode_saved(sender, instance, created, **kwargs):
+    if created:
+        _forget(instance, instance.user_id)
+
+
+@receiver(post_delete, sender=Mode)
+def mode_deleted(sender, instance, **kwargs):
+    # Collaborator rows are cascade-deleted and handled by their own receiver.
+    _forget(instance, instance.user_id)
+
+
+@receiver(post_save, sender=ModeCollaborator)
+@receiver(post_delete, sender=ModeCollaborator)
+def collaborator_changed(sender, instance, **kwargs):
+    _forget(instance, instance.user_id)
+
+
+# ─────────────────────────────────────────────
+# Change counters behind the list ETags
+# ─────────────────────────────────────────────
+
+@receiver(post_save, sender=ModeCollaborator)
+@receiver(post_delete, sender=ModeCollaborator)
+def collaborator_bumps_mode(sender, instance, **kwargs):
+    # Mode lists show collaborator counts; entity lists show assignees.
+    bump_mode_versions([instance.mode_id])
+
+
+@receiver(post_save, sender=Profile)
+def profile_bumps_modes(sender, instance, update_fields=None, **kwargs):
+    # Display name / avatar appear in owner names, assignees and comments of
+    # every mode the user is in.
+    if update_fields is not None and set(update_fields) <= {"has_completed_onboarding"}:
+        return
+    bump_mode_versions(
+        Mode.objects.filter(
+            Q(user_id=instance.user_id) | Q(collaborators__user_id=instance.user_id)
+        ).values_list("id", flat=True)
+    )
@@ -8,8 +8,11 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
 
+from core.models import LoadedValuesMixin
 
-class Comment(models.Model):
+
+
+class Comment(LoadedValuesMixin, models.Model):
     mode = models.ForeignKey(
         "core.Mode",
         on_delete=models.CASCADE,
@@ -1,15 +1,18 @@
 # comments/services.py
 from django.contrib.contenttypes.models import ContentType
 from .models import Comment
+from core.services.mode_version import bump_mode_versions
 
 def soft_delete_comments_for_instance(*, user, instance):
     """
     Soft-delete comments by user that reference instance via GenericFK.
     """
     ct = ContentType.objects.get_for_model(instance.__class__)
-    Comment.objects.filter(
+    updated = Comment.objects.filter(
         user=user,
         content_type=ct,
         object_id=instance.id,
         is_deleted=False,
     ).update(is_deleted=True)
+    if updated:
+        bump_mode_versions([getattr(instance, "mode_id", None)])
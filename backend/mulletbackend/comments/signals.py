@@ -3,11 +3,12 @@ from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
 
-from comments.models import Comment
+from comments.models import Comment, CommentAttachment
 from core.models import Task
 from core.models import Goal
 from core.models import Project
 from core.models import Milestone
+from core.services.mode_version import bump_mode_versions
 
 def delete_comments_for_instance(instance):
     content_type = ContentType.objects.get_for_model(instance.__class__)
@@ -36,3 +37,15 @@ def cascade_delete_comments(sender, instance, **kwargs):
 @receiver(post_save, sender=Milestone)
 def sync_comment_mode_on_save(sender, instance, **kwargs):
     _sync_comment_mode(instance)
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_mode_versions(sender, instance, **kwargs):
+    loaded = getattr(instance, "_loaded_values", {})
+    bump_mode_versions([instance.mode_id, loaded.get("mode_id")])
+
+@receiver(post_save, sender=CommentAttachment)
+@receiver(post_delete, sender=CommentAttachment)
+def bump_attachment_mode_versions(sender, instance, **kwargs):
+    mode_id = Comment.objects.filter(id=instance.comment_id).values_list("mode_id", flat=True).first()
+    bump_mode_versions([mode_id])
@@ -9,6 +9,7 @@ from .models import Comment, CommentAttachment
 from .serializers import CommentSerializer, CommentAttachmentSerializer
 from boards.validation import ALLOWED_FILE_MIMES, ALLOWED_FILE_EXTS, MAX_FILE_BYTES
 from collaboration.permissions import accessible_mode_ids, writable_mode_ids, validate_mode_write_access
+from core.conditional import ConditionalListMixin
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +31,7 @@ def _validate_attachment(f):
         )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -42,7 +43,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         )
         try:
             response = super().list(request, *args, **kwargs)
-            logger.info("CommentViewSet.list returning %d items", len(response.data))
+            logger.info("CommentViewSet.list returning %d items", len(response.data or []))
             return response
         except Exception:
             logger.exception("CommentViewSet.list failed")
@@ -93,7 +94,7 @@ class CommentViewSet(viewsets.ModelViewSet):
 
 
 
-class CommentAttachmentViewSet(viewsets.ModelViewSet):
+class CommentAttachmentViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     serializer_class = CommentAttachmentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.services.sync import TOMBSTONE_RETENTION, prune_tombstones
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than the retention window (clients that far behind get a full reset)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=TOMBSTONE_RETENTION.days,
+            help=(
+                f"Keep tombstones newer than this many days (default and minimum: "
+                f"{TOMBSTONE_RETENTION.days}, the age up to which sync cursors are honoured)"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days < TOMBSTONE_RETENTION.days:
+            self.stdout.write(self.style.WARNING(
+                f"--days {days} is inside the {TOMBSTONE_RETENTION.days}-day cursor window; "
+                f"using {TOMBSTONE_RETENTION.days}"
+            ))
+            days = TOMBSTONE_RETENTION.days
+        deleted = prune_tombstones(timedelta(days=days))
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstones"))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Length
+
+from core.models import Mode, Goal, Project, Milestone, Task
+from core.services.rank import RANK_WIDTH, REBALANCE_LENGTH, rebalance_scope
+
+class Command(BaseCommand):
+    help = (
+        "Renumber rank keys (and positions) back to short, evenly spaced values. "
+        "By default only modes holding keys written by moves, whose positions are "
+        "stale; run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rebalance every mode, not just the ones with long keys",
+        )
+        parser.add_argument(
+            "--min-length",
+            type=int,
+            default=None,
+            help=(
+                "Only rebalance modes holding keys at least this long "
+                f"(e.g. {REBALANCE_LENGTH}), leaving other stale positions for later"
+            ),
+        )
+
+    def _needs_rebalance(self, qs, options):
+        if options["all"]:
+            return qs
+        qs = qs.annotate(rank_len=Length("rank"))
+        if options["min_length"] is not None:
+            return qs.filter(rank_len__gte=options["min_length"])
+        return qs.exclude(rank_len=RANK_WIDTH)
+
+    def handle(self, *args, **options):
+        total = 0
+
+        for Model in (Goal, Project, Milestone, Task):
+            qs = self._needs_rebalance(Model._base_manager.exclude(mode_id=None), options)
+            for mode_id in qs.order_by().values_list("mode_id", flat=True).distinct():
+                total += rebalance_scope(Model, {"mode_id": mode_id})
+
+        qs = self._needs_rebalance(Mode.objects.all(), options)
+        for user_id in qs.order_by().values_list("user_id", flat=True).distinct():
+            total += rebalance_scope(Mode, {"user_id": user_id})
+
+        self.stdout.write(self.style.SUCCESS(f"Rebalanced ranks ({total} rows rewritten)"))
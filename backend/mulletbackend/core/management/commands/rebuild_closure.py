@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.services.closure import rebuild_all
+
+class Command(BaseCommand):
+    help = "Rebuild the EntityClosure hierarchy index from the parent FK columns."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            written = rebuild_all()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt closure index ({written} rows)"))
@@ -5,6 +5,16 @@ from django.conf import settings
 from django.db import migrations, models
 
 
+def drop_ownerless_modes(apps, schema_editor):
+    """
+    0002 seeds modes without a user. Databases that reached this migration
+    had already assigned or removed them, but on a fresh database (tests,
+    new installs) they would make the NOT NULL below fail.
+    """
+    Mode = apps.get_model("core", "Mode")
+    Mode.objects.filter(user__isnull=True).delete()
+
+
 class Migration(migrations.Migration):
 
     dependencies = [
@@ -13,6 +23,7 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
+        migrations.RunPython(drop_ownerless_modes, migrations.RunPython.noop),
         migrations.AlterField(
             model_name='mode',
             name='user',
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-17 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_dailyorder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntityClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ancestor_type', models.CharField(choices=[('goal', 'Goal'), ('project', 'Project'), ('milestone', 'Milestone'), ('task', 'Task')], max_length=20)),
+                ('ancestor_id', models.PositiveIntegerField()),
+                ('descendant_type', models.CharField(choices=[('goal', 'Goal'), ('project', 'Project'), ('milestone', 'Milestone'), ('task', 'Task')], max_length=20)),
+                ('descendant_id', models.PositiveIntegerField()),
+                ('depth', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant_type', 'descendant_id', 'depth'], name='core_entity_descend_cace73_idx')],
+                'unique_together': {('ancestor_type', 'ancestor_id', 'descendant_type', 'descendant_id')},
+            },
+        ),
+    ]
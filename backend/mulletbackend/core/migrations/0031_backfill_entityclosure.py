@@ -0,0 +1,57 @@
+"""
+Data migration: build EntityClosure rows for the existing hierarchy.
+
+Walks each entity's parent chain once (archived rows included) and writes
+a self row plus one row per ancestor. Later writes keep the table current
+through core.signals / core.services.closure.
+"""
+
+from django.db import migrations
+
+PARENT_FIELDS = {
+    "goal": (),
+    "project": (("parent_id", "project"), ("goal_id", "goal")),
+    "milestone": (("parent_id", "milestone"), ("project_id", "project"), ("goal_id", "goal")),
+    "task": (("milestone_id", "milestone"), ("project_id", "project"), ("goal_id", "goal")),
+}
+
+def backfill_closure(apps, schema_editor):
+    EntityClosure = apps.get_model("core", "EntityClosure")
+
+    parent_map = {}
+    for entity_type, fields in PARENT_FIELDS.items():
+        Model = apps.get_model("core", entity_type.capitalize())
+        columns = [f for f, _ in fields]
+        for row in Model.objects.values_list("id", *columns):
+            parent = None
+            for (_, parent_type), parent_id in zip(fields, row[1:]):
+                if parent_id:
+                    parent = (parent_type, parent_id)
+                    break
+            parent_map[(entity_type, row[0])] = parent
+
+    rows = []
+    for node in parent_map:
+        depth, cur, seen = 0, node, set()
+        while cur is not None and cur not in seen and cur in parent_map:
+            seen.add(cur)
+            rows.append(EntityClosure(
+                ancestor_type=cur[0], ancestor_id=cur[1],
+                descendant_type=node[0], descendant_id=node[1],
+                depth=depth,
+            ))
+            cur = parent_map[cur]
+            depth += 1
+
+    EntityClosure.objects.all().delete()
+    EntityClosure.objects.bulk_create(rows, batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0030_entityclosure"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.14 on 2026-10-17 16:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_backfill_entityclosure'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='milestone',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='mode',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['mode', 'rank'], name='core_goal_mode_id_17b936_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milestone',
+            index=models.Index(fields=['mode', 'rank'], name='core_milest_mode_id_f17800_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mode',
+            index=models.Index(fields=['user', 'rank'], name='core_mode_user_id_981c39_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['mode', 'rank'], name='core_projec_mode_id_f5aaf0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['mode', 'rank'], name='core_task_mode_id_1701d1_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+"""
+Data migration: seed rank keys from the existing integer positions.
+
+Uses the same fixed-width base-36 encoding as core.services.rank.rank_for_position
+(inlined so the migration doesn't import app code), so every container keeps
+its current order.
+"""
+
+from django.db import migrations
+
+ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+RANK_WIDTH = 7
+
+def _rank_for_position(position):
+    n = min(max(int(position) + 2 ** 31, 0), len(ALPHABET) ** RANK_WIDTH - 1)
+    out = []
+    for _ in range(RANK_WIDTH):
+        n, d = divmod(n, len(ALPHABET))
+        out.append(ALPHABET[d])
+    return "".join(reversed(out))
+
+def backfill_rank(apps, schema_editor):
+    for name in ("Mode", "Goal", "Project", "Milestone", "Task"):
+        Model = apps.get_model("core", name)
+        batch = []
+        for obj in Model.objects.only("id", "position").iterator(chunk_size=2000):
+            obj.rank = _rank_for_position(obj.position)
+            batch.append(obj)
+            if len(batch) >= 1000:
+                Model.objects.bulk_update(batch, ["rank"])
+                batch = []
+        if batch:
+            Model.objects.bulk_update(batch, ["rank"])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0032_rank"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rank, migrations.RunPython.noop),
+    ]
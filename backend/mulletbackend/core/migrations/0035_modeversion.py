@@ -0,0 +1,21 @@
+# Generated by Django 5.0.14 on 2026-10-17 17:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_updated_at_entitytombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModeVersion',
+            fields=[
+                ('mode', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='change_version', serialize=False, to='core.mode')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_modeversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modeversion',
+            name='stats_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
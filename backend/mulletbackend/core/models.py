@@ -21,10 +21,96 @@ def _bulk_sync_comments(model_class, object_ids, new_mode_id):
     ).exclude(mode_id=new_mode_id).update(mode_id=new_mode_id)
 
 
-class Mode(models.Model):
+def _bulk_sync_attachments(model_class, object_ids, new_mode_id):
+    """
+    Bulk counterpart of the per-instance post_save mode sync for everything
+    hanging off an entity: comments, notes and pins.
+    """
+    if not object_ids:
+        return
+    from django.apps import apps
+    ct = ContentType.objects.get_for_model(model_class, for_concrete_model=False)
+    for model_label in ("notes.Note", "boards.Pin"):
+        apps.get_model(model_label).objects.filter(
+            content_type=ct, object_id__in=object_ids
+        ).exclude(mode_id=new_mode_id).update(mode_id=new_mode_id)
+    _bulk_sync_comments(model_class, object_ids, new_mode_id)
+
+
+def _cascade_mode_to_subtree(roots, new_mode_id):
+    """
+    Move every Project / Milestone / Task below the given (type, id) roots to
+    new_mode_id: one recursive CTE to collect the subtree, then one UPDATE per
+    table. Comments, notes and pins on those rows follow. Includes archived
+    descendants via `all_objects`.
+    """
+    from core.services.subtree import collect_descendants
+
+    subtree = collect_descendants(roots)
+    for model_class, key in ((Project, "project"), (Milestone, "milestone"), (Task, "task")):
+        ids = subtree.get(key)
+        if ids:
+            moving = model_class.all_objects.filter(id__in=ids).exclude(mode_id=new_mode_id)
+            rows = list(moving.values_list("id", "mode_id"))
+            if rows:
+                record_mode_moves(key, rows, new_mode_id)
+                update_and_bump(
+                    model_class.all_objects.filter(id__in=[row_id for row_id, _ in rows]),
+                    {old for _, old in rows},
+                    mode_id=new_mode_id,
+                )
+            _bulk_sync_attachments(model_class, ids, new_mode_id)
+
+
+def record_mode_moves(entity_type, rows, new_mode_id):
+    """
+    Tombstone each (id, old_mode_id) row that is leaving its mode, so
+    /api/sync/ tells readers of the old mode to drop it (readers of the new
+    mode get the row itself as a change).
+    """
+    tombstones = [
+        EntityTombstone(entity_type=entity_type, entity_id=row_id, mode_id=old_mode_id)
+        for row_id, old_mode_id in rows
+        if old_mode_id and old_mode_id != new_mode_id
+    ]
+    if tombstones:
+        EntityTombstone.objects.bulk_create(tombstones)
+
+
+class LoadedValuesMixin:
+    """
+    Rows read from the database keep the column values they were loaded with
+    in `_loaded_values` ({attname: value}, loaded columns only), so save
+    receivers can tell what changed (core.signals). Set in from_db() rather
+    than a post_init receiver: instances built in Python pay nothing, and
+    deferred columns are simply absent.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+class ModeQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # Mode reorders go through QuerySet.update() / bulk_update(), which
+        # skip post_save; bump the change counters here instead.
+        from core.services.mode_version import bump_mode_versions
+
+        mode_ids = list(self.order_by().values_list("id", flat=True))
+        rows = super().update(**kwargs)
+        if rows:
+            bump_mode_versions(mode_ids)
+        return rows
+
+
+class Mode(LoadedValuesMixin, models.Model):
     title = models.CharField(max_length=255)
     color = models.CharField(max_length=20, default="#000000")
     position = models.IntegerField(default=0)
+    rank = models.CharField(max_length=64, default="", blank=True)  # see core.services.rank
 
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -32,6 +118,8 @@ class Mode(models.Model):
         related_name="modes",
     )
 
+    objects = ModeQuerySet.as_manager()
+
     class Meta:
         ordering = ["position", "id"]
         constraints = [
@@ -39,16 +127,67 @@ class Mode(models.Model):
                 fields=["user", "position"], name="unique_mode_position_per_user"
             ),
         ]
+        indexes = [
+            Index(fields=["user", "rank"]),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class ModeVersion(models.Model):
+    """
+    Change counter for one mode, bumped after any committed write to the mode
+    or anything in it (core.services.mode_version). List ETags are built from
+    these so a poll can be answered with 304 without running the list query.
+
+    Kept off Mode itself so a Mode.save() carrying a stale in-memory value can
+    never move the counter backwards. A missing row reads as 0.
+    """
+
+    mode = models.OneToOneField(
+        Mode,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="change_version",
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    # Subset of writes that can change the stats tree: time entries, entity
+    # titles and parents (timers.stats_cache keys on it).
+    stats_version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.mode_id} · v{self.version}"
+
+
 # ─────────────────────────────────────────────
 # Archiving / soft-delete infrastructure
 # ─────────────────────────────────────────────
 
 
+def update_and_bump(qs, mode_ids, **kwargs):
+    """
+    QuerySet.update() on archivable rows whose modes the caller already knows
+    (every mode the rows are in before the write). Does what
+    ArchivableQuerySet.update() does without its SELECT DISTINCT mode_id:
+    advances updated_at and bumps those modes plus the one the rows move to.
+    """
+    from core.services.mode_version import STATS_TREE_FIELDS, bump_mode_versions
+
+    # auto_now only fires on save(); bulk writes (cascades, batch ops,
+    # bulk_update) must still advance updated_at for /api/sync/.
+    kwargs.setdefault("updated_at", timezone.now())
+    mode_ids = set(mode_ids)
+    rows = models.QuerySet.update(qs, **kwargs)
+    if rows:
+        target = kwargs.get("mode_id", kwargs.get("mode"))
+        target = getattr(target, "pk", target)
+        if isinstance(target, int):
+            mode_ids.add(target)
+        bump_mode_versions(mode_ids, stats=not STATS_TREE_FIELDS.isdisjoint(kwargs))
+    return rows
+
+
 class ArchivableQuerySet(models.QuerySet):
     def active(self):
         return self.filter(is_archived=False)
@@ -56,6 +195,11 @@ class ArchivableQuerySet(models.QuerySet):
     def archived(self):
         return self.filter(is_archived=True)
 
+    def update(self, **kwargs):
+        # Bulk writes skip save(): advance updated_at and the list-ETag
+        # counters of every mode the rows were in (update_and_bump).
+        return update_and_bump(self, self.order_by().values_list("mode_id", flat=True).distinct(), **kwargs)
+
 
 class ArchivableManager(models.Manager):
     """Default manager: only non-archived rows."""
@@ -74,9 +218,10 @@ class AllObjectsManager(models.Manager):
         return ArchivableQuerySet(self.model, using=self._db)
 
 
-class ArchivableModel(models.Model):
+class ArchivableModel(LoadedValuesMixin, models.Model):
     is_archived = models.BooleanField(default=False, db_index=True)
     archived_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     objects = ArchivableManager()
     all_objects = AllObjectsManager()
@@ -98,7 +243,7 @@ class ArchivableModel(models.Model):
         self.archived_at = timezone.now()
 
         if save:
-            update_fields = ["is_archived", "archived_at"]
+            update_fields = ["is_archived", "archived_at", "updated_at"]
             if hasattr(self, "is_completed"):
                 update_fields.append("is_completed")
             self.save(update_fields=update_fields)
@@ -113,6 +258,7 @@ class Goal(ArchivableModel):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True, default="")
     position = models.IntegerField(default=0)
+    rank = models.CharField(max_length=64, default="", blank=True)  # see core.services.rank
     is_completed = models.BooleanField(default=False)
     due_date = models.DateField(null=True, blank=True)
     due_time = models.TimeField(null=True, blank=True)
@@ -143,6 +289,7 @@ class Goal(ArchivableModel):
         ordering = ["position", "id"]
         indexes = [
             Index(fields=["mode", "position"]),
+            Index(fields=["mode", "rank"]),
             Index(fields=["is_completed"]),
             Index(fields=["due_date"]),
             Index(fields=["is_archived"]),
@@ -164,71 +311,7 @@ class Goal(ArchivableModel):
         """
         if not self.mode_id:
             return
-
-        new_mode_id = self.mode_id
-
-        # 1) Collect all projects under this goal (including nested subprojects)
-        root_project_ids = list(
-            Project.all_objects.filter(goal=self).values_list("id", flat=True)
-        )
-
-        project_ids = set(root_project_ids)
-        frontier = list(root_project_ids)
-
-        while frontier:
-            child_ids = list(
-                Project.all_objects.filter(parent_id__in=frontier).values_list(
-                    "id", flat=True
-                )
-            )
-            child_ids = [pid for pid in child_ids if pid not in project_ids]
-            project_ids.update(child_ids)
-            frontier = child_ids
-
-        # 2) Collect milestones directly under the goal or under those projects,
-        #    then chase parent-chain downwards.
-        milestone_ids = set(
-            Milestone.all_objects.filter(goal=self).values_list("id", flat=True)
-        )
-
-        if project_ids:
-            milestone_ids.update(
-                Milestone.all_objects.filter(project_id__in=project_ids).values_list(
-                    "id", flat=True
-                )
-            )
-
-        frontier = list(milestone_ids)
-        while frontier:
-            child_ids = list(
-                Milestone.all_objects.filter(parent_id__in=frontier).values_list(
-                    "id", flat=True
-                )
-            )
-            child_ids = [mid for mid in child_ids if mid not in milestone_ids]
-            milestone_ids.update(child_ids)
-            frontier = child_ids
-
-        # 3) Update modes on projects & milestones
-        if project_ids:
-            Project.all_objects.filter(id__in=project_ids).update(mode_id=new_mode_id)
-            _bulk_sync_comments(Project, project_ids, new_mode_id)
-        if milestone_ids:
-            Milestone.all_objects.filter(id__in=milestone_ids).update(mode_id=new_mode_id)
-            _bulk_sync_comments(Milestone, milestone_ids, new_mode_id)
-
-        # 4) Update tasks:
-        #    - linked directly to this goal
-        #    - OR to any collected project
-        #    - OR to any collected milestone
-        task_ids = list(Task.all_objects.filter(
-            Q(goal=self)
-            | Q(project_id__in=project_ids if project_ids else [])
-            | Q(milestone_id__in=milestone_ids if milestone_ids else [])
-        ).values_list("id", flat=True))
-        if task_ids:
-            Task.all_objects.filter(id__in=task_ids).update(mode_id=new_mode_id)
-            _bulk_sync_comments(Task, task_ids, new_mode_id)
+        _cascade_mode_to_subtree([("goal", self.id)], self.mode_id)
 
 
 class Project(ArchivableModel):
@@ -237,6 +320,7 @@ class Project(ArchivableModel):
 
     # DnD-critical
     position = models.IntegerField(default=0)
+    rank = models.CharField(max_length=64, default="", blank=True)  # see core.services.rank
     is_completed = models.BooleanField(default=False)
     due_date = models.DateField(null=True, blank=True)
     due_time = models.TimeField(null=True, blank=True)
@@ -283,6 +367,7 @@ class Project(ArchivableModel):
             Index(fields=["mode", "position"]),
             Index(fields=["goal", "position"]),
             Index(fields=["parent", "position"]),
+            Index(fields=["mode", "rank"]),
             Index(fields=["is_archived"]),
         ]
         constraints = [
@@ -318,55 +403,7 @@ class Project(ArchivableModel):
         """
         if not self.mode_id:
             return
-
-        new_mode_id = self.mode_id
-
-        # 1) Collect all projects in this subtree (self + subprojects)
-        project_ids = {self.id}
-        frontier = [self.id]
-
-        while frontier:
-            child_ids = list(
-                Project.all_objects.filter(parent_id__in=frontier).values_list(
-                    "id", flat=True
-                )
-            )
-            child_ids = [pid for pid in child_ids if pid not in project_ids]
-            project_ids.update(child_ids)
-            frontier = child_ids
-
-        # 2) Milestones attached to any of these projects, plus their submilestones
-        milestone_ids = set(
-            Milestone.all_objects.filter(project_id__in=project_ids).values_list(
-                "id", flat=True
-            )
-        )
-        frontier = list(milestone_ids)
-        while frontier:
-            child_ids = list(
-                Milestone.all_objects.filter(parent_id__in=frontier).values_list(
-                    "id", flat=True
-                )
-            )
-            child_ids = [mid for mid in child_ids if mid not in milestone_ids]
-            milestone_ids.update(child_ids)
-            frontier = child_ids
-
-        # 3) Update projects + milestones
-        Project.all_objects.filter(id__in=project_ids).update(mode_id=new_mode_id)
-        _bulk_sync_comments(Project, project_ids, new_mode_id)
-        if milestone_ids:
-            Milestone.all_objects.filter(id__in=milestone_ids).update(mode_id=new_mode_id)
-            _bulk_sync_comments(Milestone, milestone_ids, new_mode_id)
-
-        # 4) Tasks linked to these projects or milestones
-        task_ids = list(Task.all_objects.filter(
-            Q(project_id__in=project_ids)
-            | Q(milestone_id__in=milestone_ids if milestone_ids else [])
-        ).values_list("id", flat=True))
-        if task_ids:
-            Task.all_objects.filter(id__in=task_ids).update(mode_id=new_mode_id)
-            _bulk_sync_comments(Task, task_ids, new_mode_id)
+        _cascade_mode_to_subtree([("project", self.id)], self.mode_id)
 
 
 class Milestone(ArchivableModel):
@@ -375,6 +412,7 @@ class Milestone(ArchivableModel):
     due_date = models.DateField(null=True, blank=True)
     due_time = models.TimeField(null=True, blank=True)
     position = models.IntegerField(default=0)
+    rank = models.CharField(max_length=64, default="", blank=True)  # see core.services.rank
 
     goal = models.ForeignKey(
         Goal,
@@ -438,6 +476,7 @@ class Milestone(ArchivableModel):
             ),
         ]
         indexes = [
+            Index(fields=["mode", "rank"]),
             Index(fields=["is_archived"]),
         ]
 
@@ -457,32 +496,7 @@ class Milestone(ArchivableModel):
         """
         if not self.mode_id:
             return
-
-        new_mode_id = self.mode_id
-
-        # 1) Collect this milestone + all submilestones
-        milestone_ids = {self.id}
-        frontier = [self.id]
-
-        while frontier:
-            child_ids = list(
-                Milestone.all_objects.filter(parent_id__in=frontier).values_list(
-                    "id", flat=True
-                )
-            )
-            child_ids = [mid for mid in child_ids if mid not in milestone_ids]
-            milestone_ids.update(child_ids)
-            frontier = child_ids
-
-        # 2) Update milestone subtree
-        Milestone.all_objects.filter(id__in=milestone_ids).update(mode_id=new_mode_id)
-        _bulk_sync_comments(Milestone, milestone_ids, new_mode_id)
-
-        # 3) Tasks linked to those milestones
-        task_ids = list(Task.all_objects.filter(milestone_id__in=milestone_ids).values_list("id", flat=True))
-        if task_ids:
-            Task.all_objects.filter(id__in=task_ids).update(mode_id=new_mode_id)
-            _bulk_sync_comments(Task, task_ids, new_mode_id)
+        _cascade_mode_to_subtree([("milestone", self.id)], self.mode_id)
 
 
 class Task(ArchivableModel):
@@ -491,6 +505,7 @@ class Task(ArchivableModel):
     due_date = models.DateField(null=True, blank=True)
     due_time = models.TimeField(null=True, blank=True)
     position = models.IntegerField(default=0)
+    rank = models.CharField(max_length=64, default="", blank=True)  # see core.services.rank
 
     goal = models.ForeignKey(
         Goal,
@@ -554,6 +569,7 @@ class Task(ArchivableModel):
             ),
         ]
         indexes = [
+            Index(fields=["mode", "rank"]),
             Index(fields=["is_archived"]),
         ]
 
@@ -592,3 +608,60 @@ class DailyOrder(models.Model):
 
     def __str__(self):
         return f"{self.entity_type}:{self.entity_id} @ pos {self.position}"
+
+
+# ─────────────────────────────────────────────
+# Hierarchy closure (ancestor ↔ descendant index)
+# ─────────────────────────────────────────────
+
+class EntityClosure(models.Model):
+    """
+    One row per (ancestor, descendant) pair in the Goal → Project → Milestone
+    → Task hierarchy, plus a depth-0 self row for every node.
+    Maintained by core.services.closure; never edit by hand.
+    """
+
+    ENTITY_TYPES = DailyOrder.ENTITY_TYPES
+
+    ancestor_type = models.CharField(max_length=20, choices=ENTITY_TYPES)
+    ancestor_id = models.PositiveIntegerField()
+    descendant_type = models.CharField(max_length=20, choices=ENTITY_TYPES)
+    descendant_id = models.PositiveIntegerField()
+    depth = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [("ancestor_type", "ancestor_id", "descendant_type", "descendant_id")]
+        indexes = [
+            Index(fields=["descendant_type", "descendant_id", "depth"]),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_type}:{self.ancestor_id} → {self.descendant_type}:{self.descendant_id} (+{self.depth})"
+
+
+# ─────────────────────────────────────────────
+# Sync tombstones (hard deletes since a cursor)
+# ─────────────────────────────────────────────
+
+class EntityTombstone(models.Model):
+    """
+    Written on post_delete of a Goal / Project / Milestone / Task, and when
+    one moves to another mode (record_mode_moves), so /api/sync/ can tell
+    readers of the mode about rows that are no longer in it.
+    Pruned by the prune_sync_tombstones command.
+    """
+
+    ENTITY_TYPES = DailyOrder.ENTITY_TYPES
+
+    entity_type = models.CharField(max_length=20, choices=ENTITY_TYPES)
+    entity_id = models.PositiveIntegerField()
+    mode_id = models.PositiveIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            Index(fields=["mode_id", "deleted_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_type}:{self.entity_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,75 @@
+# core/pagination.py
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination on (rank, id), the order every entity list is
+    served in, so page N costs the same as page 1 and rows inserted between
+    calls are never skipped or repeated.
+
+    Opt-in: only when `pageSize` or `cursor` is sent. Then the response is
+    {"results": [...], "next": "<cursor>" | null}; follow `next` until null.
+    Without either param the full list comes back as a plain array, as it
+    always has (no truncation).
+    """
+
+    page_size_query_param = "pageSize"
+    cursor_query_param = "cursor"
+    ordering = ("rank", "id")
+
+    def __init__(self):
+        self.next_cursor = None
+
+    def _page_size(self, request) -> int:
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, DEFAULT_PAGE_SIZE))
+        except (TypeError, ValueError):
+            size = DEFAULT_PAGE_SIZE
+        return max(1, min(size, MAX_PAGE_SIZE))
+
+    @staticmethod
+    def encode_cursor(rank: str, pk: int) -> str:
+        raw = json.dumps([rank, pk], separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            rank, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return str(rank), int(pk)
+        except (ValueError, TypeError):
+            raise NotFound("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.page_size_query_param not in params and self.cursor_query_param not in params:
+            return None
+
+        size = self._page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            rank, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(Q(rank__gt=rank) | Q(rank=rank, id__gt=pk))
+
+        rows = list(queryset[: size + 1])
+        page = rows[:size]
+        if len(rows) > size:
+            last = page[-1]
+            self.next_cursor = self.encode_cursor(last.rank, last.id)
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({"results": data, "next": self.next_cursor})
@@ -55,7 +55,8 @@ class ModeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Mode
-        fields = ["id", "title", "color", "position", "isOwned", "collaboratorCount", "ownerName"]
+        fields = ["id", "title", "color", "position", "rank", "isOwned", "collaboratorCount", "ownerName"]
+        read_only_fields = ("rank",)
 
     def validate_title(self, value):
         return _validate_title(value)
@@ -163,11 +164,12 @@ class GoalSerializer(serializers.ModelSerializer):
             "dueDate",
             "dueTime",
             "position",
+            "rank",
             "modeId",
             "assignedToId",
             "assignee",
         ]
-        read_only_fields = ("position",)
+        read_only_fields = ("position", "rank")
 
     def validate_title(self, value):
         return _validate_title(value)
@@ -231,13 +233,14 @@ class ProjectSerializer(serializers.ModelSerializer):
             "dueDate",
             "dueTime",
             "position",
+            "rank",
             "parentId",
             "goalId",
             "modeId",
             "assignedToId",
             "assignee",
         )
-        read_only_fields = ("position",)
+        read_only_fields = ("position", "rank")
 
     def validate_title(self, value):
         return _validate_title(value)
@@ -303,6 +306,7 @@ class TaskSerializer(serializers.ModelSerializer):
             "dueDate",
             "dueTime",
             "position",
+            "rank",
             "milestoneId",
             "projectId",
             "goalId",
@@ -310,7 +314,7 @@ class TaskSerializer(serializers.ModelSerializer):
             "assignedToId",
             "assignee",
         )
-        read_only_fields = ("position",)
+        read_only_fields = ("position", "rank")
 
     def validate_title(self, value):
         return _validate_title(value)
@@ -374,6 +378,7 @@ class MilestoneSerializer(serializers.ModelSerializer):
             "dueDate",
             "dueTime",
             "position",
+            "rank",
             "parentId",
             "projectId",
             "goalId",
@@ -381,7 +386,7 @@ class MilestoneSerializer(serializers.ModelSerializer):
             "assignedToId",
             "assignee",
         )
-        read_only_fields = ("position",)
+        read_only_fields = ("position", "rank")
 
     def validate_title(self, value):
         return _validate_title(value)
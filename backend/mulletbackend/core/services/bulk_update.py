@@ -0,0 +1,82 @@
+# core/services/bulk_update.py
+"""
+Set-based engine behind the /<entity>/bulk/ endpoints.
+
+Instead of save() per row (which fires every post_save receiver per row),
+this issues one UPDATE for the selected rows, one batched cascade for the
+rows whose mode actually changed, and one batched comments/notes/pins sync.
+Titles never change here, so the notes entity_title sync isn't needed, and
+parent FKs are untouched, so the closure index stays valid.
+"""
+from typing import List, Optional
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from collaboration.permissions import writable_mode_ids, validate_mode_write_access
+from core.models import (
+    Mode,
+    Goal,
+    Project,
+    Milestone,
+    Task,
+    _bulk_sync_attachments,
+    _cascade_mode_to_subtree,
+    record_mode_moves,
+    update_and_bump,
+)
+
+ENTITY_MODELS = {"goal": Goal, "project": Project, "milestone": Milestone, "task": Task}
+
+
+@transaction.atomic
+def bulk_update_entities(
+    entity_type: str,
+    *,
+    user,
+    ids,
+    due_date: Optional[str] = None,
+    mode_id: Optional[int] = None,
+) -> List[int]:
+    """
+    Apply due_date / mode_id (None = leave as is) to every selected row the user
+    can write. Returns the ids that were updated.
+    """
+    Model = ENTITY_MODELS[entity_type]
+
+    if mode_id is not None:
+        mode = Mode.objects.filter(id=mode_id).first()
+        if mode is None:
+            raise ValidationError({"error": "Mode not found."})
+        validate_mode_write_access(user, mode)
+
+    rows = list(
+        Model.objects.filter(mode_id__in=writable_mode_ids(user), id__in=ids)
+        .values_list("id", "mode_id")
+    )
+    target_ids = [row_id for row_id, _ in rows]
+    if not target_ids:
+        return []
+
+    updates = {}
+    if due_date is not None:
+        updates["due_date"] = due_date
+    if mode_id is not None:
+        updates["mode_id"] = mode_id
+    if not updates:
+        return target_ids
+
+    if mode_id is not None:
+        record_mode_moves(entity_type, rows, mode_id)
+    update_and_bump(
+        Model.all_objects.filter(id__in=target_ids), {old_mode_id for _, old_mode_id in rows}, **updates
+    )
+
+    if mode_id is not None:
+        moved_ids = [row_id for row_id, old_mode_id in rows if old_mode_id != mode_id]
+        if moved_ids:
+            _bulk_sync_attachments(Model, moved_ids, mode_id)
+            if entity_type != "task":
+                _cascade_mode_to_subtree([(entity_type, i) for i in moved_ids], mode_id)
+
+    return target_ids
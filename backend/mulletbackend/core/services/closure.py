@@ -0,0 +1,278 @@
+# core/services/closure.py
+"""
+Maintenance + lookups for EntityClosure.
+
+Every Goal / Project / Milestone / Task has a depth-0 self row plus one row
+per ancestor, so "all descendants of X" and "full lineage of Y" are each a
+single indexed query regardless of how deep the tree is.
+
+Writes that go through Model.save() / delete() are handled by core.signals.
+Anything that rewrites parent FKs with QuerySet.update() or inserts with
+bulk_create() must call sync_parents() / add_nodes() itself.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db.models import Q
+
+from core.models import EntityClosure, Goal, Project, Milestone, Task
+
+Node = Tuple[str, int]
+
+ENTITY_MODELS = {"goal": Goal, "project": Project, "milestone": Milestone, "task": Task}
+
+# Parent FK columns per entity type, with the type each one points at.
+# The model check constraints guarantee at most one of them is set.
+PARENT_FIELDS = {
+    "goal": (),
+    "project": (("parent_id", "project"), ("goal_id", "goal")),
+    "milestone": (("parent_id", "milestone"), ("project_id", "project"), ("goal_id", "goal")),
+    "task": (("milestone_id", "milestone"), ("project_id", "project"), ("goal_id", "goal")),
+}
+
+
+def entity_type_of(instance) -> str:
+    return type(instance).__name__.lower()
+
+
+def parent_of(entity_type: str, instance) -> Optional[Node]:
+    for field, parent_type in PARENT_FIELDS[entity_type]:
+        parent_id = getattr(instance, field, None)
+        if parent_id:
+            return (parent_type, parent_id)
+    return None
+
+
+def _nodes_q(side: str, nodes: Iterable[Node]) -> Q:
+    """OR together one `<side>_type=… AND <side>_id IN (…)` clause per type."""
+    by_type: Dict[str, Set[int]] = defaultdict(set)
+    for entity_type, entity_id in nodes:
+        by_type[entity_type].add(entity_id)
+
+    q = Q(pk__in=[])
+    for entity_type, ids in by_type.items():
+        q |= Q(**{f"{side}_type": entity_type, f"{side}_id__in": ids})
+    return q
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Lookups
+# ──────────────────────────────────────────────────────────────────────────────
+
+def ancestors(entity_type: str, entity_id: int, *, include_self: bool = False) -> List[Tuple[str, int, int]]:
+    """[(type, id, depth), …] nearest first."""
+    qs = EntityClosure.objects.filter(descendant_type=entity_type, descendant_id=entity_id)
+    if not include_self:
+        qs = qs.filter(depth__gt=0)
+    return list(qs.order_by("depth").values_list("ancestor_type", "ancestor_id", "depth"))
+
+
+def nearest_ancestor_ids(nodes: Iterable[Node], ancestor_type: str) -> Dict[Node, int]:
+    """{node: id of its nearest ancestor of ancestor_type}, one query; nodes without one are left out."""
+    nodes = list(nodes)
+    out: Dict[Node, int] = {}
+    if not nodes:
+        return out
+    rows = (
+        EntityClosure.objects.filter(_nodes_q("descendant", nodes), ancestor_type=ancestor_type, depth__gt=0)
+        .order_by("-depth")
+        .values_list("descendant_type", "descendant_id", "ancestor_id")
+    )
+    for desc_type, desc_id, anc_id in rows:
+        out[(desc_type, desc_id)] = anc_id  # deepest first, so the nearest one wins
+    return out
+
+
+def lineage_ids(nodes: Iterable[Node]) -> Dict[str, Set[int]]:
+    """{type: {ids}} for the given nodes plus every ancestor of any of them, in one query."""
+    nodes = list(nodes)
+    out: Dict[str, Set[int]] = {"goal": set(), "project": set(), "milestone": set(), "task": set()}
+    for entity_type, entity_id in nodes:
+        out[entity_type].add(entity_id)
+    if nodes:
+        for anc_type, anc_id in EntityClosure.objects.filter(_nodes_q("descendant", nodes)).values_list(
+            "ancestor_type", "ancestor_id"
+        ):
+            out[anc_type].add(anc_id)
+    return out
+
+
+def descendant_ids(entity_type: str, entity_id: int, *, include_self: bool = False) -> Dict[str, Set[int]]:
+    """{type: {ids}} for the whole subtree under (entity_type, entity_id)."""
+    out: Dict[str, Set[int]] = {"project": set(), "milestone": set(), "task": set()}
+    qs = EntityClosure.objects.filter(ancestor_type=entity_type, ancestor_id=entity_id)
+    if not include_self:
+        qs = qs.filter(depth__gt=0)
+    for desc_type, desc_id in qs.values_list("descendant_type", "descendant_id"):
+        out.setdefault(desc_type, set()).add(desc_id)
+    return out
+
+
+def _stored_parents(entity_type: str, ids: Iterable[int]) -> Dict[int, Node]:
+    return {
+        desc_id: (anc_type, anc_id)
+        for desc_id, anc_type, anc_id in EntityClosure.objects.filter(
+            descendant_type=entity_type, descendant_id__in=list(ids), depth=1
+        ).values_list("descendant_id", "ancestor_type", "ancestor_id")
+    }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Maintenance
+# ──────────────────────────────────────────────────────────────────────────────
+
+def add_nodes(entity_type: str, instances) -> None:
+    """
+    Insert rows for freshly created entities. Parents must already be indexed
+    (create parents before children, as the create paths already do).
+    """
+    instances = [i for i in instances if i.id]
+    if not instances:
+        return
+
+    parents = {inst.id: parent_of(entity_type, inst) for inst in instances}
+    parent_nodes = {p for p in parents.values() if p}
+
+    lineage_by_parent: Dict[Node, List[Tuple[str, int, int]]] = defaultdict(list)
+    if parent_nodes:
+        for anc_type, anc_id, desc_type, desc_id, depth in EntityClosure.objects.filter(
+            _nodes_q("descendant", parent_nodes)
+        ).values_list("ancestor_type", "ancestor_id", "descendant_type", "descendant_id", "depth"):
+            lineage_by_parent[(desc_type, desc_id)].append((anc_type, anc_id, depth))
+
+    rows = []
+    for inst in instances:
+        rows.append(EntityClosure(
+            ancestor_type=entity_type, ancestor_id=inst.id,
+            descendant_type=entity_type, descendant_id=inst.id,
+            depth=0,
+        ))
+        for anc_type, anc_id, depth in lineage_by_parent.get(parents[inst.id], ()):
+            rows.append(EntityClosure(
+                ancestor_type=anc_type, ancestor_id=anc_id,
+                descendant_type=entity_type, descendant_id=inst.id,
+                depth=depth + 1,
+            ))
+    EntityClosure.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def move_node(entity_type: str, entity_id: int, new_parent: Optional[Node]) -> None:
+    """Re-hang the subtree rooted at (entity_type, entity_id) under new_parent (None = root)."""
+    subtree = list(
+        EntityClosure.objects.filter(ancestor_type=entity_type, ancestor_id=entity_id)
+        .values_list("descendant_type", "descendant_id", "depth")
+    )
+    if not subtree:
+        EntityClosure.objects.create(
+            ancestor_type=entity_type, ancestor_id=entity_id,
+            descendant_type=entity_type, descendant_id=entity_id,
+            depth=0,
+        )
+        subtree = [(entity_type, entity_id, 0)]
+    subtree_nodes = [(t, i) for t, i, _ in subtree]
+
+    old_ancestors = [(t, i) for t, i, _ in ancestors(entity_type, entity_id)]
+    if old_ancestors:
+        EntityClosure.objects.filter(
+            _nodes_q("ancestor", old_ancestors) & _nodes_q("descendant", subtree_nodes)
+        ).delete()
+
+    if new_parent is None:
+        return
+
+    parent_lineage = ancestors(new_parent[0], new_parent[1], include_self=True)
+    if any((t, i) in set(subtree_nodes) for t, i, _ in parent_lineage):
+        # Would create a cycle; the serializers reject this, so just refuse quietly.
+        return
+
+    EntityClosure.objects.bulk_create(
+        [
+            EntityClosure(
+                ancestor_type=anc_type, ancestor_id=anc_id,
+                descendant_type=desc_type, descendant_id=desc_id,
+                depth=anc_depth + desc_depth + 1,
+            )
+            for anc_type, anc_id, anc_depth in parent_lineage
+            for desc_type, desc_id, desc_depth in subtree
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def sync_parents(entity_type: str, ids: Iterable[int]) -> None:
+    """
+    Re-attach rows whose parent FK may have been rewritten by QuerySet.update()
+    (batch group-under / change-mode, archive detach). Unchanged rows cost nothing
+    beyond the two lookups.
+    """
+    ids = list(ids)
+    if not ids:
+        return
+    Model = ENTITY_MODELS[entity_type]
+    fields = ["id"] + [f for f, _ in PARENT_FIELDS[entity_type]]
+    stored = _stored_parents(entity_type, ids)
+
+    for obj in Model.all_objects.filter(id__in=ids).only(*fields):
+        current = parent_of(entity_type, obj)
+        if stored.get(obj.id) != current:
+            move_node(entity_type, obj.id, current)
+
+
+def sync_node(instance) -> None:
+    """post_save hook for updates: move the node if its parent FK changed."""
+    entity_type = entity_type_of(instance)
+    current = parent_of(entity_type, instance)
+    if _stored_parents(entity_type, [instance.id]).get(instance.id) != current:
+        move_node(entity_type, instance.id, current)
+
+
+def detach_descendants(entity_type: str, entity_id: int) -> None:
+    """
+    Cut every child subtree loose from (entity_type, entity_id) and its ancestors.
+    Mirrors detach_children() / on_delete=SET_NULL: the children become roots.
+    """
+    lineage = [(t, i) for t, i, _ in ancestors(entity_type, entity_id, include_self=True)]
+    below = [
+        (t, i)
+        for t, ids in descendant_ids(entity_type, entity_id).items()
+        for i in ids
+    ]
+    if not lineage or not below:
+        return
+    EntityClosure.objects.filter(
+        _nodes_q("ancestor", lineage) & _nodes_q("descendant", below)
+    ).delete()
+
+
+def remove_node(entity_type: str, entity_id: int) -> None:
+    detach_descendants(entity_type, entity_id)
+    EntityClosure.objects.filter(
+        Q(ancestor_type=entity_type, ancestor_id=entity_id)
+        | Q(descendant_type=entity_type, descendant_id=entity_id)
+    ).delete()
+
+
+def rebuild_all() -> int:
+    """Recompute the whole table from the FK columns. Returns rows written."""
+    parent_map: Dict[Node, Optional[Node]] = {}
+    for entity_type, Model in ENTITY_MODELS.items():
+        fields = ["id"] + [f for f, _ in PARENT_FIELDS[entity_type]]
+        for obj in Model.all_objects.only(*fields):
+            parent_map[(entity_type, obj.id)] = parent_of(entity_type, obj)
+
+    rows = []
+    for node in parent_map:
+        depth, cur, seen = 0, node, set()
+        while cur is not None and cur not in seen and cur in parent_map:
+            seen.add(cur)
+            rows.append(EntityClosure(
+                ancestor_type=cur[0], ancestor_id=cur[1],
+                descendant_type=node[0], descendant_id=node[1],
+                depth=depth,
+            ))
+            cur = parent_map[cur]
+            depth += 1
+
+    EntityClosure.objects.all().delete()
+    EntityClosure.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -1,5 +1,6 @@
 # core/services.py
 from core.models import Mode
+from core.services.rank import rank_for_position
 
 DEFAULT_MODES = [
     {"title": "Work", "color": "#3B82F6"},
@@ -24,6 +25,7 @@ def create_default_modes_for_user(user):
                 title=m["title"],
                 color=m["color"],
                 position=i,
+                rank=rank_for_position(i),
             )
         )
     if to_create:
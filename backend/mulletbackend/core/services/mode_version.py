@@ -0,0 +1,69 @@
+# core/services/mode_version.py
+"""
+Per-mode change counters (ModeVersion) behind the list ETags.
+
+Every write to a mode, or to anything that lives in it, ends up in
+bump_mode_versions(): post_save / post_delete receivers for single rows, and
+the ArchivableQuerySet / ModeQuerySet update() overrides for bulk writes.
+The bump runs on commit, so a reader never sees a new version before the
+data it stands for.
+"""
+from typing import Dict, Iterable
+
+from django.db import transaction
+from django.db.models import F
+
+from core.models import Mode, ModeVersion
+
+
+# Entity fields that decide where (and under what title) time shows up in the
+# stats tree; writing any of them also bumps ModeVersion.stats_version.
+STATS_TREE_FIELDS = frozenset({
+    "title", "mode", "mode_id", "goal", "goal_id", "project", "project_id",
+    "milestone", "milestone_id", "parent", "parent_id",
+})
+
+
+def _bump(mode_ids: frozenset, stats: bool) -> None:
+    fields = {"version": F("version") + 1}
+    if stats:
+        fields["stats_version"] = F("stats_version") + 1
+    updated = ModeVersion.objects.filter(mode_id__in=mode_ids).update(**fields)
+    if updated < len(mode_ids):
+        # First write to these modes: create their counters (skipping modes
+        # deleted in the meantime).
+        missing = Mode.objects.filter(id__in=mode_ids, change_version__isnull=True).values_list("id", flat=True)
+        ModeVersion.objects.bulk_create(
+            [ModeVersion(mode_id=mode_id, version=1, stats_version=int(stats)) for mode_id in missing],
+            ignore_conflicts=True,
+        )
+
+
+def bump_mode_versions(mode_ids: Iterable, *, stats: bool = False) -> None:
+    """
+    Advance the change counter of each mode once the current transaction
+    commits; with stats=True, also the counter the stats-tree cache keys on.
+    """
+    ids = frozenset(i for i in mode_ids if i)
+    if ids:
+        transaction.on_commit(lambda: _bump(ids, stats))
+
+
+def mode_versions(mode_ids: Iterable) -> Dict[int, int]:
+    """{mode id: version} for the given modes, one query; unknown modes read as 0."""
+    ids = list(mode_ids)
+    versions = dict(ModeVersion.objects.filter(mode_id__in=ids).values_list("mode_id", "version"))
+    return {mode_id: versions.get(mode_id, 0) for mode_id in ids}
+
+
+def stats_version(mode_id) -> int:
+    """The mode's stats_version (0 if it has never been bumped)."""
+    row = ModeVersion.objects.filter(mode_id=mode_id).values_list("stats_version", flat=True).first()
+    return row or 0
+
+
+def stats_versions(mode_ids: Iterable) -> Dict[int, int]:
+    """{mode id: stats_version} for the given modes, one query; unknown modes read as 0."""
+    ids = list(mode_ids)
+    versions = dict(ModeVersion.objects.filter(mode_id__in=ids).values_list("mode_id", "stats_version"))
+    return {mode_id: versions.get(mode_id, 0) for mode_id in ids}
@@ -1,5 +1,5 @@
 # core/services/ordering.py
-from typing import Dict
+from typing import Dict, List, Tuple
 from django.db.models import Max, QuerySet
 from core.models import Task, Milestone, Project, Goal  # ← add Goal here
 
@@ -133,3 +133,39 @@ def container_changed_for_goal(g: Goal, validated: Dict) -> bool:
     if "mode_id" in validated and g.mode_id != validated["mode_id"]:
         return True
     return False
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Batched position writes (DnD)
+# ──────────────────────────────────────────────────────────────────────────────
+
+def apply_positions(model, items, *, writable_mode_ids) -> Tuple[List[int], List]:
+    """
+    Write [{"id": …, "position": …}, …] in one bulk_update (a single CASE
+    UPDATE). Ids are validated against writable modes in one query.
+    Position-only writes skip post_save: nothing downstream depends on position.
+
+    Returns (updated_ids, ignored_ids); malformed items and rows the user
+    can't write land in ignored_ids.
+    """
+    positions: Dict[int, int] = {}
+    ignored: List = []
+    for item in items:
+        try:
+            positions[int(item["id"])] = int(item["position"])
+        except (KeyError, TypeError, ValueError):
+            ignored.append(item.get("id") if isinstance(item, dict) else None)
+
+    allowed = set(
+        model.objects.filter(mode_id__in=writable_mode_ids, id__in=list(positions))
+        .values_list("id", flat=True)
+    )
+    ignored.extend(pk for pk in positions if pk not in allowed)
+
+    from core.services.rank import rank_for_position
+
+    updated = [pk for pk in positions if pk in allowed]
+    model.objects.bulk_update(
+        [model(id=pk, position=positions[pk], rank=rank_for_position(positions[pk])) for pk in updated],
+        ["position", "rank"],
+    )
+    return updated, ignored
@@ -0,0 +1,183 @@
+# core/services/rank.py
+"""
+Lexicographic rank keys for ordering.
+
+`rank` is a base-36 string (0-9a-z, which sorts the same under any DB
+collation). Moving an item computes a key strictly between its two new
+neighbours, so a move writes exactly one row no matter how many siblings
+there are.
+
+Integer `position` is still kept for existing clients. Every position
+write also sets rank = rank_for_position(position): fixed width, so it
+orders exactly like the integers. Moves write only the rank, with a key
+that is never fixed width, so a non-fixed-width key marks a row whose
+position is stale. The rebalance_ranks command (cron) renumbers those
+modes back to short keys and STEP-spaced positions outside any request.
+"""
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import F, Max
+
+from core.services.ordering import POSITION_STEP
+
+ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(ALPHABET)
+RANK_WIDTH = 7  # 36**7 > 2**32, so every IntegerField value fits
+_POSITION_OFFSET = 2 ** 31
+_DIGIT = {c: i for i, c in enumerate(ALPHABET)}
+
+# Keys longer than this mean a container has been split many times at the
+# same spot; rebalance_ranks --min-length uses it to renumber only those.
+REBALANCE_LENGTH = RANK_WIDTH + 6
+
+
+def rank_for_position(position: int) -> str:
+    """Fixed-width key that sorts like the integer position."""
+    n = min(max(int(position) + _POSITION_OFFSET, 0), BASE ** RANK_WIDTH - 1)
+    out = []
+    for _ in range(RANK_WIDTH):
+        n, d = divmod(n, BASE)
+        out.append(ALPHABET[d])
+    return "".join(reversed(out))
+
+
+def rank_between(lo: Optional[str], hi: Optional[str]) -> str:
+    """
+    Shortest-ish key with lo < key < hi (either bound may be None).
+    Never returns a key ending in "0", so there is always room below it.
+    Raises ValueError if there is no room (lo >= hi); rebalance first.
+    """
+    lo = lo or ""
+    if hi is not None and lo >= hi:
+        raise ValueError("rank_between: lo must sort before hi")
+
+    out = []
+    i = 0
+    while True:
+        d_lo = _DIGIT[lo[i]] if i < len(lo) else 0
+        d_hi = (_DIGIT[hi[i]] if i < len(hi) else 0) if hi is not None else BASE
+
+        if d_lo == d_hi:
+            if hi is not None and i >= len(hi):
+                # hi is lo padded with "0"s: nothing sorts strictly between.
+                raise ValueError("rank_between: no key between bounds")
+            out.append(ALPHABET[d_lo])
+            i += 1
+            continue
+
+        mid = (d_lo + d_hi) // 2
+        if mid > d_lo:
+            out.append(ALPHABET[mid])
+            return "".join(out)
+
+        # Adjacent digits: keep lo's digit; from here on hi no longer binds.
+        out.append(ALPHABET[d_lo])
+        hi = None
+        i += 1
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Moves
+# ──────────────────────────────────────────────────────────────────────────────
+
+def scope_filter(instance) -> dict:
+    # Ranks are compared per mode (modes themselves: per owner).
+    if hasattr(instance, "mode_id"):
+        return {"mode_id": instance.mode_id}
+    return {"user_id": instance.user_id}
+
+
+def _unique_position(model) -> bool:
+    from core.models import Mode
+    return model is Mode
+
+
+def _writer(model):
+    # all_objects where it exists so bulk writes go through
+    # ArchivableQuerySet.update() and advance updated_at; Mode.objects so
+    # ModeQuerySet.update() bumps the mode-list ETag.
+    return getattr(model, "all_objects", model._default_manager)
+
+
+def _rank_between_neighbours(after, before) -> str:
+    lo = after.rank if after is not None else ""
+    hi = before.rank if before is not None else None
+    return rank_between(lo, hi)
+
+
+def _move_key(after, before) -> str:
+    key = _rank_between_neighbours(after, before)
+    if len(key) == RANK_WIDTH:
+        # Fixed width is reserved for rank_for_position(); a move key must
+        # stand out so rebalance_ranks can find positions it has left stale.
+        # key+"i" is still strictly between: key is not a prefix of either bound.
+        key += ALPHABET[BASE // 2]
+    return key
+
+
+@transaction.atomic
+def move_between(instance, *, after=None, before=None) -> None:
+    """
+    Place `instance` directly after `after` and directly before `before`
+    (either may be None for "at the start" / "at the end"). Writes the one
+    row's rank; `position` is left for rebalance_ranks to renumber.
+
+    Only if the neighbours share a key (tied legacy positions) is there no
+    key between them; that scope is rebalanced first.
+    """
+    model = type(instance)
+
+    try:
+        instance.rank = _move_key(after, before)
+    except ValueError:
+        rebalance_scope(model, scope_filter(instance))
+        for neighbour in (after, before):
+            if neighbour is not None:
+                neighbour.refresh_from_db(fields=["rank", "position"])
+        instance.rank = _move_key(after, before)
+
+    _writer(model).filter(id=instance.id).update(rank=instance.rank)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Rebalancing
+# ──────────────────────────────────────────────────────────────────────────────
+
+def rebalance_scope(model, scope: dict) -> int:
+    """
+    Renumber every row in one mode (or one owner's modes) in (rank, id) order:
+    positions back to STEP spacing, ranks back to fixed width. Returns rows written.
+    """
+    rows = list(
+        _writer(model).filter(**scope).order_by("rank", "id").only("id", "rank", "position")
+    )
+    unique = _unique_position(model)
+
+    changed = []
+    for i, obj in enumerate(rows):
+        position = i if unique else (i + 1) * POSITION_STEP
+        rank = rank_for_position(position)
+        if obj.position != position or obj.rank != rank:
+            obj.position, obj.rank = position, rank
+            changed.append(obj)
+    if not changed:
+        return 0
+
+    with transaction.atomic():
+        if unique:
+            # Same two-phase dodge as ModeViewSet.reorder for the unique constraint.
+            max_pos = _writer(model).filter(**scope).aggregate(m=Max("position"))["m"] or 0
+            _writer(model).filter(id__in=[o.id for o in changed]).update(
+                position=F("position") + max_pos + len(rows) + 1
+            )
+        _writer(model).bulk_update(changed, ["position", "rank"], batch_size=500)
+    return len(changed)
+
+
+def set_ranks_from_positions(objs: Iterable) -> list:
+    """For legacy bulk_update() reorders: mirror each object's position into rank."""
+    objs = list(objs)
+    for obj in objs:
+        obj.rank = rank_for_position(obj.position)
+    return objs
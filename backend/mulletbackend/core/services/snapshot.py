@@ -0,0 +1,179 @@
+# core/services/snapshot.py
+"""
+Whole-mode snapshot: every live goal / project / milestone / task in one
+mode, with per-entity note / pin / comment counts and the caller's active
+timer, built from a fixed number of `.values()` queries (no model instances,
+no ModelSerializer).
+
+Entity rows use the same camelCase keys as the entity serializers, so the
+client mappers work on them unchanged.
+"""
+import json
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+
+from accounts.models import Profile
+from boards.models import Pin
+from comments.models import Comment
+from core.conditional import mode_list_etag
+from core.models import Mode, Goal, Project, Milestone, Task
+from notes.models import Note
+from timers.models import ActiveTimer
+
+User = get_user_model()
+
+# (entity type, payload key, model, {output key: model field})
+SNAPSHOT_ENTITIES = (
+    ("goal", "goals", Goal, {
+        "description": "description",
+    }),
+    ("project", "projects", Project, {
+        "description": "description",
+        "parentId": "parent_id",
+        "goalId": "goal_id",
+    }),
+    ("milestone", "milestones", Milestone, {
+        "parentId": "parent_id",
+        "projectId": "project_id",
+        "goalId": "goal_id",
+    }),
+    ("task", "tasks", Task, {
+        "milestoneId": "milestone_id",
+        "projectId": "project_id",
+        "goalId": "goal_id",
+    }),
+)
+
+_COMMON_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "isCompleted": "is_completed",
+    "dueDate": "due_date",
+    "dueTime": "due_time",
+    "position": "position",
+    "rank": "rank",
+    "modeId": "mode_id",
+    "assignedToId": "assigned_to_id",
+}
+
+
+def _attachment_counts(model, mode_id, content_types, **filters) -> dict:
+    """{(content_type_id, object_id): count} for one mode, one GROUP BY."""
+    rows = (
+        model.objects.filter(
+            mode_id=mode_id,
+            content_type_id__in=content_types,
+            object_id__isnull=False,
+            **filters,
+        )
+        .order_by()
+        .values("content_type_id", "object_id")
+        .annotate(n=Count("id"))
+    )
+    return {(r["content_type_id"], r["object_id"]): r["n"] for r in rows}
+
+
+def _assignees(user_ids) -> dict:
+    """{user id: AssigneeSerializer-shaped dict} in one query."""
+    if not user_ids:
+        return {}
+    storage = Profile._meta.get_field("avatar").storage
+    out = {}
+    for row in User.objects.filter(id__in=user_ids).values(
+        "id", "username", "profile__display_name", "profile__avatar"
+    ):
+        out[row["id"]] = {
+            "id": row["id"],
+            "username": row["username"],
+            "displayName": row["profile__display_name"] or row["username"],
+            "avatar": storage.url(row["profile__avatar"]) if row["profile__avatar"] else None,
+        }
+    return out
+
+
+def _active_timer(user, mode_id):
+    row = (
+        ActiveTimer.objects.filter(user=user, mode_id=mode_id)
+        .values(
+            "kind", "started_at", "ends_at", "session_id", "planned_seconds",
+            "mode_id", "goal_id", "project_id", "milestone_id", "task_id",
+        )
+        .first()
+    )
+    if row is None:
+        return None
+    return {
+        "kind": row["kind"],
+        "startedAt": row["started_at"],
+        "endsAt": row["ends_at"],
+        "sessionId": row["session_id"],
+        "plannedSeconds": row["planned_seconds"],
+        "path": {
+            "modeId": row["mode_id"],
+            "goalId": row["goal_id"],
+            "projectId": row["project_id"],
+            "milestoneId": row["milestone_id"],
+            "taskId": row["task_id"],
+        },
+    }
+
+
+def build_mode_snapshot(mode_id: int, user) -> dict:
+    """
+    Snapshot of one mode the caller can read (the caller checks access).
+    Query count is fixed: mode, four entity tables, three attachment counts,
+    assignees, active timer.
+    """
+    mode = Mode.objects.filter(id=mode_id).values("id", "title", "color", "position", "rank").first()
+
+    content_types = ContentType.objects.get_for_models(
+        *(Model for _, _, Model, _ in SNAPSHOT_ENTITIES), for_concrete_models=False
+    )
+    ct_ids = {Model: ct.id for Model, ct in content_types.items()}
+
+    note_counts = _attachment_counts(Note, mode_id, ct_ids.values())
+    pin_counts = _attachment_counts(Pin, mode_id, ct_ids.values())
+    comment_counts = _attachment_counts(Comment, mode_id, ct_ids.values(), is_deleted=False)
+
+    payload = {"mode": mode}
+    assignee_rows = defaultdict(list)
+
+    for _, key, Model, extra in SNAPSHOT_ENTITIES:
+        fields = {**_COMMON_FIELDS, **extra}
+        ct_id = ct_ids[Model]
+        rows = []
+        for row in Model.objects.filter(mode_id=mode_id).order_by("rank", "id").values(*fields.values()):
+            out = {name: row[field] for name, field in fields.items()}
+            entity_key = (ct_id, out["id"])
+            out["noteCount"] = note_counts.get(entity_key, 0)
+            out["pinCount"] = pin_counts.get(entity_key, 0)
+            out["commentCount"] = comment_counts.get(entity_key, 0)
+            out["assignee"] = None
+            if out["assignedToId"]:
+                assignee_rows[out["assignedToId"]].append(out)
+            rows.append(out)
+        payload[key] = rows
+
+    for user_id, assignee in _assignees(list(assignee_rows)).items():
+        for out in assignee_rows[user_id]:
+            out["assignee"] = assignee
+
+    payload["activeTimer"] = _active_timer(user, mode_id)
+    return payload
+
+
+def snapshot_etag(request, mode_id: int) -> str:
+    """
+    ETag for the caller's snapshot of mode_id, computed without building it:
+    the mode's change counter (bumped by every write to the mode, its
+    entities, notes, pins, comments and assignee profiles) plus the caller's
+    active timer in that mode, which no counter covers.
+    """
+    timer = _active_timer(request.user, mode_id)
+    return mode_list_etag(
+        request, [mode_id], json.dumps(timer, sort_keys=True, cls=DjangoJSONEncoder)
+    )
@@ -0,0 +1,118 @@
+# core/services/subtree.py
+"""
+Descendant resolution straight from the parent FK columns.
+
+One WITH RECURSIVE statement walks Goal → Project → Milestone → Task for any
+number of roots at once, on PostgreSQL and SQLite; each level is an index
+lookup per parent FK, so the cost follows the subtree size. Used by the
+mode cascades, which should not depend on the derived closure index being
+current while they rewrite rows.
+"""
+import sqlite3
+from collections import defaultdict
+from typing import Dict, Iterable, Set, Tuple
+
+from django.db import connection
+
+from core.models import Project, Milestone, Task
+
+Node = Tuple[str, int]
+
+# One SQL type for node_type in both CTE terms.
+_TYPE_SQL = "text"
+
+# (child type, child model, parent FK column, parent type)
+_EDGES = (
+    ("project", Project, "parent_id", "project"),
+    ("project", Project, "goal_id", "goal"),
+    ("milestone", Milestone, "parent_id", "milestone"),
+    ("milestone", Milestone, "project_id", "project"),
+    ("milestone", Milestone, "goal_id", "goal"),
+    ("task", Task, "milestone_id", "milestone"),
+    ("task", Task, "project_id", "project"),
+    ("task", Task, "goal_id", "goal"),
+)
+
+
+def _edge_select(child_type: str, model, column: str, parent_type: str, *, lateral: bool) -> str:
+    """Children of working-set rows `s` along one FK, looked up through that FK's index."""
+    qn = connection.ops.quote_name
+    table, fk = qn(model._meta.db_table), qn(column)
+    # Typed like the anchor: PostgreSQL rejects a recursive CTE whose column
+    # types differ between the two terms, and a bare literal is text there.
+    node_type = f"CAST('{child_type}' AS {_TYPE_SQL})"
+    if lateral:
+        return (
+            f"SELECT {node_type} AS child_type, c.{qn('id')} AS child_id FROM {table} c "
+            f"WHERE s.node_type = '{parent_type}' AND c.{fk} = s.node_id"
+        )
+    return (
+        f"SELECT {node_type}, c.{qn('id')} FROM subtree s JOIN {table} c ON c.{fk} = s.node_id "
+        f"WHERE s.node_type = '{parent_type}'"
+    )
+
+
+def _fk_rows() -> str:
+    """Every (child, parent) FK pair as one derived table, for the single-term fallback."""
+    qn = connection.ops.quote_name
+    return " UNION ALL ".join(
+        f"SELECT CAST('{child_type}' AS {_TYPE_SQL}) AS child_type, {qn('id')} AS child_id, "
+        f"'{parent_type}' AS parent_type, {qn(column)} AS parent_id FROM {qn(model._meta.db_table)}"
+        for child_type, model, column, parent_type in _EDGES
+    )
+
+
+def _recursive_step() -> str:
+    """
+    The recursive term(s). Each edge is joined to the working set on its own,
+    so a level costs index lookups for the rows found at the previous level
+    instead of a scan of every FK in the three tables.
+
+    PostgreSQL allows a single recursive term, so the edges go in one LATERAL;
+    SQLite 3.34+ takes one recursive SELECT per edge instead. Older SQLite
+    gets one recursive SELECT over all FK pairs, which scans the tables per
+    level but gives the same rows.
+    """
+    if connection.vendor == "postgresql":
+        branches = " UNION ALL ".join(_edge_select(*edge, lateral=True) for edge in _EDGES)
+        return f"SELECT e.child_type, e.child_id FROM subtree s CROSS JOIN LATERAL ({branches}) e"
+    if connection.vendor == "sqlite" and sqlite3.sqlite_version_info < (3, 34):
+        return (
+            f"SELECT e.child_type, e.child_id FROM subtree s JOIN ({_fk_rows()}) e "
+            f"ON e.parent_type = s.node_type AND e.parent_id = s.node_id"
+        )
+    return " UNION ".join(_edge_select(*edge, lateral=False) for edge in _EDGES)
+
+
+def collect_descendants(roots: Iterable[Node], *, include_roots: bool = False) -> Dict[str, Set[int]]:
+    """
+    {"project": {…}, "milestone": {…}, "task": {…}} for every node below any root.
+    Archived rows are included (the FK walk doesn't look at is_archived).
+    """
+    roots = list(dict.fromkeys(roots))
+    out: Dict[str, Set[int]] = defaultdict(set)
+    out.update(project=set(), milestone=set(), task=set())
+    if not roots:
+        return out
+
+    anchor = " UNION ALL ".join(
+        f"SELECT CAST(%s AS {_TYPE_SQL}), CAST(%s AS bigint)" for _ in roots
+    )
+    params = [v for node in roots for v in node]
+
+    # UNION (not UNION ALL) in the recursive term dedupes and stops on cycles.
+    sql = f"""
+        WITH RECURSIVE subtree(node_type, node_id) AS (
+            {anchor}
+            UNION
+            {_recursive_step()}
+        )
+        SELECT node_type, node_id FROM subtree
+    """
+    root_set = set(roots)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for node_type, node_id in cursor.fetchall():
+            if include_roots or (node_type, node_id) not in root_set:
+                out[node_type].add(node_id)
+    return out
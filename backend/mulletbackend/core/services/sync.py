@@ -0,0 +1,115 @@
+# core/services/sync.py
+"""
+Delta sync for the Goal / Project / Milestone / Task tree.
+
+A cursor is "<microseconds since epoch>.<access signature>". Rows with
+updated_at at or after the cursor (minus a small overlap window, so rows from
+transactions that committed late aren't skipped) come back as changes.
+Archived rows and tombstones come back as removals. Clients upsert, so the
+overlap only costs a few duplicates. A row moved to a mode the reader can't
+see is reported through the tombstone its old mode gets (record_mode_moves).
+
+A full snapshot (reset=True) is returned when:
+- no cursor is given, or it can't be parsed
+- the cursor is older than tombstone retention
+- the user's set of readable modes changed (gained modes have old rows the
+  delta would never include; lost modes have rows to drop)
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Optional
+
+from django.utils import timezone
+
+from collaboration.permissions import accessible_mode_ids
+from core.models import Goal, Project, Milestone, Task, EntityTombstone
+from core.serializers import GoalSerializer, ProjectSerializer, MilestoneSerializer, TaskSerializer
+
+SYNC_OVERLAP = timedelta(seconds=10)
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+SYNC_ENTITIES = (
+    ("goal", "goals", Goal, GoalSerializer),
+    ("project", "projects", Project, ProjectSerializer),
+    ("milestone", "milestones", Milestone, MilestoneSerializer),
+    ("task", "tasks", Task, TaskSerializer),
+)
+
+
+def _access_signature(mode_ids) -> str:
+    raw = ",".join(str(i) for i in sorted(mode_ids))
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+def make_cursor(at: datetime, signature: str) -> str:
+    return f"{int(at.timestamp() * 1_000_000)}.{signature}"
+
+
+def parse_cursor(cursor: Optional[str], signature: str) -> Optional[datetime]:
+    """Datetime the cursor points at, or None if a full snapshot is needed."""
+    if not cursor:
+        return None
+    try:
+        micros, sig = cursor.split(".", 1)
+        at = datetime.fromtimestamp(int(micros) / 1_000_000, tz=dt_timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
+    if sig != signature:
+        return None
+    if timezone.now() - at > TOMBSTONE_RETENTION:
+        return None
+    return at
+
+
+def build_sync_payload(user, cursor: Optional[str], *, context=None) -> dict:
+    readable = accessible_mode_ids(user)
+    signature = _access_signature(readable)
+    # Taken before reading so anything written during the read shows up next time.
+    now = timezone.now()
+    since = parse_cursor(cursor, signature)
+    window_start = since - SYNC_OVERLAP if since else None
+
+    payload = {
+        "cursor": make_cursor(now, signature),
+        "reset": since is None,
+        "modeIds": sorted(readable),
+    }
+    removed = {entity_type: [] for entity_type, *_ in SYNC_ENTITIES}
+    present = {}
+
+    for entity_type, key, Model, Serializer in SYNC_ENTITIES:
+        qs = Model.all_objects.filter(mode_id__in=readable)
+        if window_start:
+            qs = qs.filter(updated_at__gte=window_start)
+        else:
+            qs = qs.filter(is_archived=False)
+        rows = list(qs.select_related("assigned_to__profile").order_by("rank", "id"))
+
+        live = [r for r in rows if not r.is_archived]
+        payload[key] = Serializer(live, many=True, context=context or {}).data
+        removed[entity_type].extend(r.id for r in rows if r.is_archived)
+        present[entity_type] = {r.id for r in live}
+
+    if window_start:
+        # Tombstones cover deletes and moves out of a mode; a row that moved
+        # into another readable mode is already in the changes above.
+        for entity_type, entity_id in EntityTombstone.objects.filter(
+            mode_id__in=readable, deleted_at__gte=window_start
+        ).values_list("entity_type", "entity_id"):
+            if entity_id not in present[entity_type]:
+                removed[entity_type].append(entity_id)
+
+    payload["removed"] = removed
+    return payload
+
+
+def prune_tombstones(older_than: timedelta = TOMBSTONE_RETENTION) -> int:
+    """
+    Delete tombstones older than older_than, never less than what a cursor
+    parse_cursor() still accepts can ask for (TOMBSTONE_RETENTION plus the
+    overlap); pruning inside that window would lose deletions for clients
+    that are never sent a reset.
+    """
+    horizon = max(older_than, TOMBSTONE_RETENTION) + SYNC_OVERLAP
+    deleted, _ = EntityTombstone.objects.filter(deleted_at__lt=timezone.now() - horizon).delete()
+    return deleted
@@ -0,0 +1,130 @@
+# core/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.models import Mode, Goal, Project, Milestone, Task, EntityTombstone, record_mode_moves
+from core.services import closure
+from core.services.mode_version import bump_mode_versions
+from core.services.rank import rank_for_position
+
+PARENT_FIELD_NAMES = {"goal", "project", "milestone", "parent", "goal_id", "project_id", "milestone_id", "parent_id"}
+
+
+def _loaded(instance, attname):
+    """Value the row had in the DB when loaded (LoadedValuesMixin); None if new or deferred."""
+    return getattr(instance, "_loaded_values", {}).get(attname)
+
+
+@receiver(post_save, sender=Goal)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Milestone)
+@receiver(post_save, sender=Task)
+def index_hierarchy_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        closure.add_nodes(closure.entity_type_of(instance), [instance])
+        return
+    # save(update_fields=[...]) that doesn't touch a parent FK can't move the node
+    if update_fields is not None and not (set(update_fields) & PARENT_FIELD_NAMES):
+        return
+    closure.sync_node(instance)
+
+
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Milestone)
+@receiver(post_delete, sender=Task)
+def unindex_hierarchy_on_delete(sender, instance, **kwargs):
+    closure.remove_node(closure.entity_type_of(instance), instance.id)
+
+
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Milestone)
+@receiver(post_delete, sender=Task)
+def record_tombstone_on_delete(sender, instance, **kwargs):
+    EntityTombstone.objects.create(
+        entity_type=closure.entity_type_of(instance),
+        entity_id=instance.id,
+        mode_id=instance.mode_id,
+    )
+
+
+@receiver(post_save, sender=Goal)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Milestone)
+@receiver(post_save, sender=Task)
+def record_tombstone_on_mode_change(sender, instance, created, **kwargs):
+    # The bulk cascade below this node records its own (record_mode_moves).
+    if not created:
+        record_mode_moves(
+            closure.entity_type_of(instance),
+            [(instance.id, _loaded(instance, "mode_id"))],
+            instance.mode_id,
+        )
+
+
+# ─────────────────────────────────────────────
+# Rank keys: mirror integer position writes
+# ─────────────────────────────────────────────
+
+@receiver(pre_save, sender=Mode)
+@receiver(pre_save, sender=Goal)
+@receiver(pre_save, sender=Project)
+@receiver(pre_save, sender=Milestone)
+@receiver(pre_save, sender=Task)
+def mirror_position_into_rank(sender, instance, update_fields=None, **kwargs):
+    """
+    Any save() that sets a new integer position (create, container change,
+    PATCH position) gets the matching rank, unless rank itself was set.
+    """
+    if update_fields is not None:
+        return
+    position = instance.__dict__.get("position")
+    if position is None or "rank" not in instance.__dict__:
+        return
+    if instance.rank and instance.rank != _loaded(instance, "rank"):
+        return
+    if instance._state.adding or not instance.rank or position != _loaded(instance, "position"):
+        instance.rank = rank_for_position(position)
+
+
+# ─────────────────────────────────────────────
+# Change counters behind the list ETags
+# ─────────────────────────────────────────────
+
+# What an entity's place in the stats tree depends on
+_TREE_ATTRS = ("title", "mode_id", "goal_id", "project_id", "milestone_id", "parent_id")
+
+
+def _tree_state(instance):
+    return tuple(instance.__dict__.get(attr) for attr in _TREE_ATTRS)
+
+
+def _loaded_tree_state(instance):
+    loaded = getattr(instance, "_loaded_values", None)
+    if loaded is None:
+        return None
+    return tuple(loaded.get(attr) for attr in _TREE_ATTRS)
+
+
+@receiver(post_save, sender=Mode)
+def bump_mode_version_on_save(sender, instance, **kwargs):
+    bump_mode_versions([instance.id])
+
+
+@receiver(post_save, sender=Goal)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Milestone)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Milestone)
+@receiver(post_delete, sender=Task)
+def bump_entity_mode_versions(sender, instance, signal, created=False, **kwargs):
+    # Both ends of a move: the row left one mode's lists and joined another's.
+    # A new row has no time logged yet; otherwise a rename / reparent / delete
+    # reshapes the stats tree.
+    stats = not created and (
+        signal is post_delete or _tree_state(instance) != _loaded_tree_state(instance)
+    )
+    bump_mode_versions([instance.mode_id, _loaded(instance, "mode_id")], stats=stats)
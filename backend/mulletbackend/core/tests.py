@@ -1,3 +1,185 @@
+import os
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+
+from core.models import EntityTombstone, Goal, Milestone, Mode, Project, Task
+from core.services.mode_version import mode_versions
+from core.services.rank import RANK_WIDTH, move_between, rank_for_position
+from core.services.subtree import collect_descendants
+from core.services.sync import TOMBSTONE_RETENTION
+
+
+class SubtreeFixtureMixin:
+    """
+    goal ─ project ─ subproject ─ milestone ─ submilestone ─ task
+      │                  └ task (on the subproject)
+      └ task (directly on the goal)
+    plus an unrelated goal with one project.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("owner", password="x")
+        cls.mode_a = Mode.objects.create(user=cls.user, title="A", position=0)
+        cls.mode_b = Mode.objects.create(user=cls.user, title="B", position=1)
+        a = cls.mode_a
+        cls.goal = Goal.objects.create(user=cls.user, mode=a, title="g")
+        cls.project = Project.objects.create(user=cls.user, mode=a, goal=cls.goal, title="p")
+        cls.subproject = Project.objects.create(user=cls.user, mode=a, parent=cls.project, title="sp")
+        cls.milestone = Milestone.objects.create(user=cls.user, mode=a, project=cls.subproject, title="m")
+        cls.submilestone = Milestone.objects.create(user=cls.user, mode=a, parent=cls.milestone, title="sm")
+        cls.deep_task = Task.objects.create(user=cls.user, mode=a, milestone=cls.submilestone, title="t1")
+        cls.project_task = Task.objects.create(user=cls.user, mode=a, project=cls.subproject, title="t2")
+        cls.goal_task = Task.objects.create(user=cls.user, mode=a, goal=cls.goal, title="t3", is_archived=True)
+
+        cls.other_goal = Goal.objects.create(user=cls.user, mode=a, title="other")
+        cls.other_project = Project.objects.create(user=cls.user, mode=a, goal=cls.other_goal, title="op")
+
+    def assert_goal_subtree(self, found):
+        self.assertEqual(found["project"], {self.project.id, self.subproject.id})
+        self.assertEqual(found["milestone"], {self.milestone.id, self.submilestone.id})
+        self.assertEqual(found["task"], {self.deep_task.id, self.project_task.id, self.goal_task.id})
+
+
+class CollectDescendantsTests(SubtreeFixtureMixin, TestCase):
+    def test_goal_subtree_across_every_edge(self):
+        self.assert_goal_subtree(collect_descendants([("goal", self.goal.id)]))
+
+    def test_mid_tree_root(self):
+        found = collect_descendants([("milestone", self.milestone.id)])
+        self.assertEqual(found["project"], set())
+        self.assertEqual(found["milestone"], {self.submilestone.id})
+        self.assertEqual(found["task"], {self.deep_task.id})
+
+    def test_several_roots_and_include_roots(self):
+        found = collect_descendants(
+            [("goal", self.other_goal.id), ("project", self.subproject.id)], include_roots=True
+        )
+        self.assertEqual(found["goal"], {self.other_goal.id})
+        self.assertEqual(found["project"], {self.other_project.id, self.subproject.id})
+        self.assertEqual(found["task"], {self.deep_task.id, self.project_task.id})
+
+    def test_cycle_terminates(self):
+        Project.all_objects.filter(id=self.project.id).update(parent=self.subproject, goal=None)
+        found = collect_descendants([("project", self.subproject.id)])
+        self.assertEqual(found["project"], {self.project.id})
+
+    def test_mode_cascade_moves_subtree_and_tombstones_old_mode(self):
+        Goal.objects.filter(id=self.goal.id).update(mode=self.mode_b)
+        self.goal.refresh_from_db()
+        self.goal.cascade_mode_to_descendants()
+
+        moved = {
+            "project": set(Project.all_objects.filter(mode=self.mode_b).values_list("id", flat=True)),
+            "milestone": set(Milestone.all_objects.filter(mode=self.mode_b).values_list("id", flat=True)),
+            "task": set(Task.all_objects.filter(mode=self.mode_b).values_list("id", flat=True)),
+        }
+        self.assert_goal_subtree(moved)
+        self.other_project.refresh_from_db()
+        self.assertEqual(self.other_project.mode_id, self.mode_a.id)
+        self.assertTrue(
+            EntityTombstone.objects.filter(entity_type="task", entity_id=self.goal_task.id, mode_id=self.mode_a.id).exists()
+        )
+
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite-only fallback")
+    def test_single_term_fallback_for_old_sqlite(self):
+        with mock.patch("core.services.subtree.sqlite3.sqlite_version_info", (3, 33, 0)):
+            self.assert_goal_subtree(collect_descendants([("goal", self.goal.id)]))
+
+
+@skipUnless(connection.vendor == "postgresql", "PostgreSQL-only: CROSS JOIN LATERAL recursive step")
+class CollectDescendantsPostgresTests(SubtreeFixtureMixin, TestCase):
+    """Run with DATABASE_URL=postgres://… so the LATERAL step and its column types are exercised."""
+
+    def test_goal_subtree(self):
+        self.assert_goal_subtree(collect_descendants([("goal", self.goal.id)]))
+
+    def test_several_roots(self):
+        found = collect_descendants([("goal", self.goal.id), ("goal", self.other_goal.id)])
+        self.assertEqual(found["project"], {self.project.id, self.subproject.id, self.other_project.id})
+
+
+class MoveBetweenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("mover", password="x")
+        cls.mode = Mode.objects.create(user=cls.user, title="M", position=0)
+        cls.tasks = [
+            Task.objects.create(user=cls.user, mode=cls.mode, title=f"t{i}", position=(i + 1) * 1024)
+            for i in range(4)
+        ]
+
+    def ordered_ids(self):
+        return list(Task.objects.filter(mode=self.mode).order_by("rank", "id").values_list("id", flat=True))
+
+    def snapshot(self):
+        return dict(Task.objects.filter(mode=self.mode).values_list("id", "rank"))
+
+    def test_gap_exhaustion_keeps_order_and_writes_one_row(self):
+        left, right, *movers = self.tasks
+        # Far more splits of one gap than the integer positions had room for.
+        for n in range(60):
+            mover = movers[n % 2]
+            mover.refresh_from_db()
+            before = self.snapshot()
+            left.refresh_from_db()
+            right.refresh_from_db()
+            move_between(mover, after=left, before=right)
+            after = self.snapshot()
+            self.assertEqual({k for k in after if after[k] != before[k]} - {mover.id}, set())
+            self.assertEqual(self.ordered_ids()[:2], [left.id, mover.id])
+            self.assertNotEqual(len(mover.rank), RANK_WIDTH)
+            right = mover
+
+        positions = dict(Task.objects.filter(mode=self.mode).values_list("id", "position"))
+        self.assertEqual(positions, {t.id: t.position for t in self.tasks})
+
+    def test_tied_neighbours_are_rebalanced_then_split(self):
+        a, b, c, _ = self.tasks
+        Task.all_objects.filter(id__in=[a.id, b.id]).update(rank=rank_for_position(1024))
+        a.refresh_from_db()
+        b.refresh_from_db()
+        move_between(c, after=a, before=b)
+        self.assertEqual(self.ordered_ids()[:3], [a.id, c.id, b.id])
+
+    def test_rebalance_ranks_renumbers_stale_positions(self):
+        first, second, third, fourth = self.tasks
+        move_between(fourth, after=None, before=first)
+        call_command("rebalance_ranks", stdout=open(os.devnull, "w"))
+        rows = list(Task.objects.filter(mode=self.mode).order_by("rank", "id").values_list("id", "position", "rank"))
+        self.assertEqual([r[0] for r in rows], [fourth.id, first.id, second.id, third.id])
+        self.assertEqual([r[1] for r in rows], sorted(r[1] for r in rows))
+        self.assertTrue(all(r[2] == rank_for_position(r[1]) for r in rows))
+
+    def test_mode_move_bumps_mode_version(self):
+        other = Mode.objects.create(user=self.user, title="N", position=1)
+        start = mode_versions([other.id])[other.id]
+        with self.captureOnCommitCallbacks(execute=True):
+            move_between(other, after=None, before=self.mode)
+        self.assertGreater(mode_versions([other.id])[other.id], start)
+        self.assertEqual(
+            list(Mode.objects.filter(user=self.user).order_by("rank", "id").values_list("id", flat=True)),
+            [other.id, self.mode.id],
+        )
+
+
+class PruneTombstonesTests(TestCase):
+    def test_days_below_cursor_window_are_clamped(self):
+        user = get_user_model().objects.create_user("pruner", password="x")
+        mode = Mode.objects.create(user=user, title="M", position=0)
+        recent = EntityTombstone.objects.create(entity_type="task", entity_id=1, mode_id=mode.id)
+        expired = EntityTombstone.objects.create(entity_type="task", entity_id=2, mode_id=mode.id)
+        EntityTombstone.objects.filter(id=recent.id).update(deleted_at=timezone.now() - timedelta(days=10))
+        EntityTombstone.objects.filter(id=expired.id).update(
+            deleted_at=timezone.now() - TOMBSTONE_RETENTION - timedelta(days=1)
+        )
 
-# Create your tests here.
+        call_command("prune_sync_tombstones", days=1, stdout=open(os.devnull, "w"))
+        self.assertEqual(list(EntityTombstone.objects.values_list("id", flat=True)), [recent.id])
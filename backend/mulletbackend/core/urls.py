@@ -22,6 +22,7 @@ from .views import (
       MilestoneReorderTodayView,
       GoalReorderTodayView,
     DailyOrderView,
+    SyncView,
 )
 
 router = DefaultRouter()
@@ -56,6 +57,9 @@ urlpatterns = [
     # Daily order (cross-mode DnD)
     path("daily-order/", DailyOrderView.as_view(), name="daily-order"),
 
+    # Delta sync (changes + removals since a cursor)
+    path("sync/", SyncView.as_view(), name="sync"),
+
     # Router endpoints
     path("", include(router.urls)),
 ]
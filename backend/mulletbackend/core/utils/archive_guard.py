@@ -34,7 +34,8 @@ def detach_children(kind: EntityKind, instance: ArchivableModel) -> None:
     """
     Null out FK references from children pointing to this entity.
     Mirrors Django's on_delete=SET_NULL behaviour for soft-deletes (archiving),
-    where the DB-level CASCADE/SET_NULL doesn't fire.
+    where the DB-level CASCADE/SET_NULL doesn't fire. The closure index is cut
+    to match, since these updates bypass post_save.
     """
     from core.models import Project, Milestone, Task
 
@@ -51,6 +52,10 @@ def detach_children(kind: EntityKind, instance: ArchivableModel) -> None:
         Task.all_objects.filter(milestone_id=instance.id).update(milestone_id=None)
     # tasks have no children — nothing to detach
 
+    if kind != "task":
+        from core.services.closure import detach_descendants
+        detach_descendants(kind, instance.id)
+
 
 def destroy_or_archive(kind: EntityKind, instance: ArchivableModel) -> None:
     """
@@ -11,6 +11,8 @@ logger = logging.getLogger(__name__)
 from django.db import transaction
 
 from .models import Mode, Goal, Project, Milestone, Task, DailyOrder
+from .conditional import ConditionalListMixin, etag_matches, not_modified
+from .pagination import KeysetPagination
 from .serializers import (
     ModeSerializer,
     GoalSerializer,
@@ -28,30 +30,72 @@ from .serializers import (
     DailyOrderSerializer,
 )
 from .utils.archive_guard import destroy_or_archive
+from .services.bulk_update import bulk_update_entities
+from .services.ordering import apply_positions
+from .services.rank import move_between, scope_filter, set_ranks_from_positions
+from .services.snapshot import build_mode_snapshot, snapshot_etag
+from .services.sync import build_sync_payload
 from timers.services import stop_active_if_targeting
 
 from comments.services import soft_delete_comments_for_instance
 from collaboration.permissions import accessible_mode_ids, writable_mode_ids, validate_mode_write_access
 
-# Safety cap: prevent unbounded list responses
-MAX_LIST_SIZE = 2000
 
+class RankMoveMixin:
+    """
+    PATCH <id>/move/ {"afterId": …, "beforeId": …}
 
-class CappedListMixin:
-    """Apply MAX_LIST_SIZE only on list actions so detail views can still filter."""
+    Drops the row between two neighbours (either may be null for start/end of
+    the list) by giving it a rank key between theirs: one row written, no
+    sibling renumbering. Neighbours must be in the same mode.
+    """
+
+    # Modes are ordered per owner; collaborators can't reorder them.
+    move_owner_only = False
+
+    def _move_neighbour(self, instance, neighbour_id):
+        if neighbour_id in (None, ""):
+            return None
+        try:
+            neighbour_id = int(neighbour_id)
+        except (TypeError, ValueError):
+            return None
+        return (
+            type(instance)._base_manager
+            .filter(id=neighbour_id, **scope_filter(instance))
+            .only("id", "rank", "position")
+            .first()
+        )
+
+    @action(detail=True, methods=["PATCH"])
+    def move(self, request, pk=None):
+        instance = self.get_object()
+        if self.move_owner_only and instance.user_id != request.user.id:
+            return Response({"detail": "Only the owner can reorder this."}, status=status.HTTP_403_FORBIDDEN)
+        after_id = request.data.get("afterId")
+        before_id = request.data.get("beforeId")
+
+        after = self._move_neighbour(instance, after_id)
+        before = self._move_neighbour(instance, before_id)
+        if (after_id not in (None, "") and after is None) or (before_id not in (None, "") and before is None):
+            return Response({"error": "Neighbour not found in this mode."}, status=status.HTTP_400_BAD_REQUEST)
+        if instance.id in (getattr(after, "id", None), getattr(before, "id", None)):
+            return Response({"error": "Cannot move an item relative to itself."}, status=status.HTTP_400_BAD_REQUEST)
+
+        move_between(instance, after=after, before=before)
+        return Response(
+            {"id": instance.id, "rank": instance.rank, "position": instance.position},
+            status=status.HTTP_200_OK,
+        )
 
-    def get_queryset(self):
-        qs = super().get_queryset()
-        if self.action == "list":
-            return qs[:MAX_LIST_SIZE]
-        return qs
 
 # ─────────────────────────────────────────────
 # MODES
 # ─────────────────────────────────────────────
-class ModeViewSet(ModelViewSet):
+class ModeViewSet(ConditionalListMixin, RankMoveMixin, ModelViewSet):
     serializer_class = ModeSerializer
     permission_classes = [IsAuthenticated]
+    move_owner_only = True
 
     def get_queryset(self):
         user = self.request.user
@@ -62,12 +106,36 @@ class ModeViewSet(ModelViewSet):
             .distinct()
             .annotate(_collaborator_count=Count("collaborators"))
             .select_related("user__profile")
-            .order_by("position", "id")
+            .order_by("rank", "id")
         )
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(detail=True, methods=["GET"])
+    def snapshot(self, request, pk=None):
+        """
+        GET /api/modes/<id>/snapshot/
+
+        The whole mode tree plus note / pin / comment counts and the caller's
+        active timer in one response. Honours If-None-Match (304).
+        """
+        try:
+            mode_id = int(pk)
+        except (TypeError, ValueError):
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        if mode_id not in accessible_mode_ids(request.user):
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Tag first (one counter + one timer lookup), so a 304 skips the build.
+        etag = snapshot_etag(request, mode_id)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response = Response(build_mode_snapshot(mode_id, request.user), status=status.HTTP_200_OK)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
     @action(detail=False, methods=["POST"])
     def reorder(self, request):
         orders = request.data.get("orders", [])
@@ -104,7 +172,7 @@ class ModeViewSet(ModelViewSet):
             # Phase 2: apply final requested positions
             for m in modes:
                 m.position = id_to_pos.get(m.id, m.position)
-            Mode.objects.bulk_update(modes, ["position"])
+            Mode.objects.bulk_update(set_ranks_from_positions(modes), ["position", "rank"])
 
         return Response(ModeSerializer(self.get_queryset(), many=True, context={"request": request}).data)
 
@@ -113,9 +181,10 @@ class ModeViewSet(ModelViewSet):
 # ─────────────────────────────────────────────
 # GOALS
 # ─────────────────────────────────────────────
-class GoalViewSet(CappedListMixin, ModelViewSet):
+class GoalViewSet(ConditionalListMixin, RankMoveMixin, ModelViewSet):
     serializer_class = GoalSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -123,7 +192,7 @@ class GoalViewSet(CappedListMixin, ModelViewSet):
             mode_ids = accessible_mode_ids(user)
         else:
             mode_ids = writable_mode_ids(user)
-        return Goal.objects.filter(mode_id__in=mode_ids).select_related("assigned_to__profile").order_by("position", "id")
+        return Goal.objects.filter(mode_id__in=mode_ids).select_related("assigned_to__profile").order_by("rank", "id")
 
     def perform_create(self, serializer):
         validate_mode_write_access(self.request.user, serializer.validated_data.get("mode"))
@@ -165,19 +234,10 @@ class GoalBulkUpdateView(APIView):
         if not goal_ids:
             return Response({"error": "Missing goalIds"}, status=400)
 
-        goals = Goal.objects.filter(mode_id__in=writable_mode_ids(request.user), id__in=goal_ids)
-        for goal in goals:
-            old_mode_id = goal.mode_id
-
-            if due_date is not None:
-                goal.due_date = due_date
-            if mode_id is not None:
-                goal.mode_id = mode_id
-
-            goal.save()
-
-            if mode_id is not None and old_mode_id != goal.mode_id:
-                goal.cascade_mode_to_descendants()
+        updated_ids = bulk_update_entities(
+            "goal", user=request.user, ids=goal_ids, due_date=due_date, mode_id=mode_id,
+        )
+        goals = Goal.objects.filter(id__in=updated_ids).select_related("assigned_to__profile").order_by("rank", "id")
 
         return Response(
             GoalSerializer(goals, many=True).data,
@@ -217,7 +277,7 @@ class GoalReorderHomeView(APIView):
             qs = Goal.objects.filter(id__in=ids, **filter_kwargs).only("id", "position")
             for g in qs:
                 g.position = pos_map.get(g.id, g.position)
-            Goal.objects.bulk_update(qs, ["position"])
+            Goal.objects.bulk_update(set_ranks_from_positions(qs), ["position", "rank"])
 
         return Response(
             {"updated": [{"id": g.id, "position": g.position} for g in qs]},
@@ -249,7 +309,7 @@ class GoalReorderTodayView(APIView):
         with transaction.atomic():
             for g in qs:
                 g.position = pos.get(g.id, g.position)
-            Goal.objects.bulk_update(qs, ["position"])
+            Goal.objects.bulk_update(set_ranks_from_positions(qs), ["position", "rank"])
 
         return Response({"updated": [{"id": g.id, "position": g.position} for g in qs]})
 
@@ -257,9 +317,10 @@ class GoalReorderTodayView(APIView):
 # ─────────────────────────────────────────────
 # PROJECTS
 # ─────────────────────────────────────────────
-class ProjectViewSet(CappedListMixin, ModelViewSet):
+class ProjectViewSet(ConditionalListMixin, RankMoveMixin, ModelViewSet):
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -267,7 +328,7 @@ class ProjectViewSet(CappedListMixin, ModelViewSet):
             mode_ids = accessible_mode_ids(user)
         else:
             mode_ids = writable_mode_ids(user)
-        return Project.objects.filter(mode_id__in=mode_ids).select_related("assigned_to__profile").order_by("position", "id")
+        return Project.objects.filter(mode_id__in=mode_ids).select_related("assigned_to__profile").order_by("rank", "id")
 
     def perform_create(self, serializer):
         validate_mode_write_access(self.request.user, serializer.validated_data.get("mode"))
@@ -308,19 +369,10 @@ class ProjectBulkUpdateView(APIView):
         if not project_ids:
             return Response({"error": "Missing projectIds"}, status=400)
 
-        projects = Project.objects.filter(mode_id__in=writable_mode_ids(request.user), id__in=project_ids)
-        for project in projects:
-            old_mode_id = project.mode_id
-
-            if due_date is not None:
-                project.due_date = due_date
-            if mode_id is not None:
-                project.mode_id = mode_id
-
-            project.save()
-
-            if mode_id is not None and old_mode_id != project.mode_id:
-                project.cascade_mode_to_descendants()
+        updated_ids = bulk_update_entities(
+            "project", user=request.user, ids=project_ids, due_date=due_date, mode_id=mode_id,
+        )
+        projects = Project.objects.filter(id__in=updated_ids).select_related("assigned_to__profile").order_by("rank", "id")
 
         return Response(
             ProjectSerializer(projects, many=True).data,
@@ -352,7 +404,7 @@ class ProjectReorderTodayView(APIView):
         with transaction.atomic():
             for p in qs:
                 p.position = pos.get(p.id, p.position)
-            Project.objects.bulk_update(qs, ["position"])
+            Project.objects.bulk_update(set_ranks_from_positions(qs), ["position", "rank"])
 
         return Response({"updated": [{"id": p.id, "position": p.position} for p in qs]})
 
@@ -402,7 +454,7 @@ class ProjectReorderHomeView(APIView):
             qs = Project.objects.filter(id__in=ids, **filter_kwargs)
             for p in qs:
                 p.position = pos_map.get(p.id, p.position)
-            Project.objects.bulk_update(qs, ["position"])
+            Project.objects.bulk_update(set_ranks_from_positions(qs), ["position", "rank"])
 
         return Response(
             {"updated": [{"id": p.id, "position": p.position} for p in qs]},
@@ -413,9 +465,10 @@ class ProjectReorderHomeView(APIView):
 # ─────────────────────────────────────────────
 # MILESTONES
 # ─────────────────────────────────────────────
-class MilestoneViewSet(CappedListMixin, ModelViewSet):
+class MilestoneViewSet(ConditionalListMixin, RankMoveMixin, ModelViewSet):
     serializer_class = MilestoneSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -423,7 +476,7 @@ class MilestoneViewSet(CappedListMixin, ModelViewSet):
             mode_ids = accessible_mode_ids(user)
         else:
             mode_ids = writable_mode_ids(user)
-        return Milestone.objects.filter(mode_id__in=mode_ids).select_related("assigned_to__profile").order_by("position", "id")
+        return Milestone.objects.filter(mode_id__in=mode_ids).select_related("assigned_to__profile").order_by("rank", "id")
 
     def perform_create(self, serializer):
         validate_mode_write_access(self.request.user, serializer.validated_data.get("mode"))
@@ -477,7 +530,7 @@ class MilestoneReorderTodayView(APIView):
         with transaction.atomic():
             for m in qs:
                 m.position = pos.get(m.id, m.position)
-            Milestone.objects.bulk_update(qs, ["position"])
+            Milestone.objects.bulk_update(set_ranks_from_positions(qs), ["position", "rank"])
 
         return Response({"updated": [{"id": m.id, "position": m.position} for m in qs]})
 
@@ -488,14 +541,10 @@ class BulkMilestonePositionUpdateView(APIView):
     def patch(self, request):
         if not isinstance(request.data, list) or len(request.data) > 500:
             return Response({"error": "Invalid or too many items (max 500)."}, status=400)
-        for update in request.data:
-            try:
-                milestone = Milestone.objects.get(mode_id__in=writable_mode_ids(request.user), id=update["id"])
-                milestone.position = update["position"]
-                milestone.save()
-            except Milestone.DoesNotExist:
-                continue
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        updated, ignored = apply_positions(
+            Milestone, request.data, writable_mode_ids=writable_mode_ids(request.user)
+        )
+        return Response({"updated": updated, "ignored": ignored}, status=status.HTTP_200_OK)
 
 
 class MilestoneBulkUpdateView(APIView):
@@ -509,19 +558,10 @@ class MilestoneBulkUpdateView(APIView):
         if not milestone_ids:
             return Response({"error": "Missing milestoneIds"}, status=400)
 
-        milestones = Milestone.objects.filter(mode_id__in=writable_mode_ids(request.user), id__in=milestone_ids)
-        for milestone in milestones:
-            old_mode_id = milestone.mode_id
-
-            if due_date is not None:
-                milestone.due_date = due_date
-            if mode_id is not None:
-                milestone.mode_id = mode_id
-
-            milestone.save()
-
-            if mode_id is not None and old_mode_id != milestone.mode_id:
-                milestone.cascade_mode_to_descendants()
+        updated_ids = bulk_update_entities(
+            "milestone", user=request.user, ids=milestone_ids, due_date=due_date, mode_id=mode_id,
+        )
+        milestones = Milestone.objects.filter(id__in=updated_ids).select_related("assigned_to__profile").order_by("rank", "id")
 
         return Response(
             MilestoneSerializer(milestones, many=True).data,
@@ -580,7 +620,7 @@ class MilestoneReorderHomeView(APIView):
             qs = Milestone.objects.filter(id__in=ids, **filter_kwargs)
             for m in qs:
                 m.position = pos_map.get(m.id, m.position)
-            Milestone.objects.bulk_update(qs, ["position"])
+            Milestone.objects.bulk_update(set_ranks_from_positions(qs), ["position", "rank"])
 
         return Response(
             {"updated": [{"id": m.id, "position": m.position} for m in qs]},
@@ -591,9 +631,10 @@ class MilestoneReorderHomeView(APIView):
 # ─────────────────────────────────────────────
 # TASKS
 # ─────────────────────────────────────────────
-class TaskViewSet(CappedListMixin, ModelViewSet):
+class TaskViewSet(ConditionalListMixin, RankMoveMixin, ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -601,7 +642,7 @@ class TaskViewSet(CappedListMixin, ModelViewSet):
             mode_ids = accessible_mode_ids(user)
         else:
             mode_ids = writable_mode_ids(user)
-        return Task.objects.filter(mode_id__in=mode_ids).select_related("assigned_to__profile").order_by("position", "id")
+        return Task.objects.filter(mode_id__in=mode_ids).select_related("assigned_to__profile").order_by("rank", "id")
 
     def perform_create(self, serializer):
         validate_mode_write_access(self.request.user, serializer.validated_data.get("mode"))
@@ -666,13 +707,10 @@ class TaskBulkUpdateView(APIView):
         if not task_ids:
             return Response({"error": "Missing taskIds"}, status=400)
 
-        tasks = Task.objects.filter(mode_id__in=writable_mode_ids(request.user), id__in=task_ids)
-        for task in tasks:
-            if due_date is not None:
-                task.due_date = due_date
-            if mode_id is not None:
-                task.mode_id = mode_id
-            task.save()
+        updated_ids = bulk_update_entities(
+            "task", user=request.user, ids=task_ids, due_date=due_date, mode_id=mode_id,
+        )
+        tasks = Task.objects.filter(id__in=updated_ids).select_related("assigned_to__profile").order_by("rank", "id")
 
         return Response(
             TaskSerializer(tasks, many=True).data,
@@ -705,7 +743,7 @@ class TaskReorderTodayView(APIView):
             tasks = Task.objects.filter(id__in=task_ids, **filter_kwargs)
             for task in tasks:
                 task.position = position_map.get(task.id, task.position)
-            Task.objects.bulk_update(tasks, ["position"])
+            Task.objects.bulk_update(set_ranks_from_positions(tasks), ["position", "rank"])
 
         return Response(
             {"updated": [{"id": t.id, "position": t.position} for t in tasks]},
@@ -719,14 +757,10 @@ class BulkTaskPositionUpdateView(APIView):
     def patch(self, request):
         if not isinstance(request.data, list) or len(request.data) > 500:
             return Response({"error": "Invalid or too many items (max 500)."}, status=400)
-        for update in request.data:
-            try:
-                task = Task.objects.get(mode_id__in=writable_mode_ids(request.user), id=update["id"])
-                task.position = update["position"]
-                task.save()
-            except Task.DoesNotExist:
-                continue
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        updated, ignored = apply_positions(
+            Task, request.data, writable_mode_ids=writable_mode_ids(request.user)
+        )
+        return Response({"updated": updated, "ignored": ignored}, status=status.HTTP_200_OK)
 
 
 class TaskReorderHomeView(APIView):
@@ -780,7 +814,7 @@ class TaskReorderHomeView(APIView):
             tasks = Task.objects.filter(id__in=task_ids, **filter_kwargs)
             for task in tasks:
                 task.position = position_map.get(task.id, task.position)
-            Task.objects.bulk_update(tasks, ["position"])
+            Task.objects.bulk_update(set_ranks_from_positions(tasks), ["position", "rank"])
 
         return Response(
             {"updated": [{"id": t.id, "position": t.position} for t in tasks]},
@@ -830,3 +864,26 @@ class DailyOrderView(APIView):
             ])
 
         return Response({"status": "ok"})
+
+
+# ─────────────────────────────────────────────
+# DELTA SYNC
+# ─────────────────────────────────────────────
+class SyncView(APIView):
+    """
+    GET /api/sync/?since=<cursor>
+
+    Goals / projects / milestones / tasks changed since the cursor across every
+    accessible mode, plus ids removed (archived or deleted). Omit `since` (or
+    send a stale one) to get a full snapshot with reset=true.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        payload = build_sync_payload(
+            request.user,
+            request.query_params.get("since"),
+            context={"request": request},
+        )
+        return Response(payload, status=status.HTTP_200_OK)
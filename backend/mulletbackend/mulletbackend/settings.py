@@ -6,6 +6,7 @@ from pathlib import Path
 import os
 import dj_database_url
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 
@@ -170,6 +171,61 @@ DATABASES = {
 if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
     DATABASES["default"].setdefault("OPTIONS", {})["timeout"] = 20
 
+# ------------------------------------------------------------------------------
+# Cache
+# ------------------------------------------------------------------------------
+
+# Shared Redis when REDIS_URL is set (needs the `redis` package), otherwise a
+# per-process in-memory cache.
+REDIS_URL = os.environ.get("REDIS_URL", "")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "TIMEOUT": 60,
+        }
+    }
+
+# Cross-request cache for collaboration.permissions. Invalidation is only
+# visible to every worker through a shared cache, so it's off (per-request
+# memoization only) unless Redis is configured.
+MODE_ACCESS_CACHE_TIMEOUT = int(
+    os.environ.get("MODE_ACCESS_CACHE_TIMEOUT", "300" if REDIS_URL else "0")
+)
+
+# Built stats trees (timers.stats_cache). Safe with a per-process cache too:
+# entries are tagged with the mode's stats_version and never served stale.
+STATS_TREE_CACHE_TIMEOUT = int(os.environ.get("STATS_TREE_CACHE_TIMEOUT", "600"))
+
+# Active-timer SSE stream (timers.events): seconds before a connection is
+# closed for the client to resume (must stay below the gunicorn --timeout,
+# 30s by default), and between lock-free re-reads that catch events
+# published on another worker when there's no shared cache.
+TIMER_STREAM_SECONDS = int(os.environ.get("TIMER_STREAM_SECONDS", "25"))
+TIMER_STREAM_RESYNC = int(os.environ.get("TIMER_STREAM_RESYNC", "30" if REDIS_URL else "10"))
+
+# Pin thumbnails (boards.jobs): "thread" renders queued jobs in a background
+# thread after the upload commits; "worker" leaves them to
+# `manage.py run_thumbnail_worker`.
+THUMBNAIL_JOBS_RUNNER = os.environ.get("THUMBNAIL_JOBS_RUNNER", "thread")
+# Largest decoded bitmap (MB, after JPEG draft scaling) a thumbnail job may
+# hold; bigger sources fail the job instead of exhausting the worker.
+THUMBNAIL_MAX_DECODE_MB = int(os.environ.get("THUMBNAIL_MAX_DECODE_MB", "200"))
+
+# Shared link-preview cache (boards.linkmeta / LinkMetaCache), in seconds:
+# how long a fetched page / favicon is reused, and how long a failed lookup
+# is remembered before it's tried again.
+LINK_META_CACHE_TTL = int(os.environ.get("LINK_META_CACHE_TTL", str(7 * 24 * 3600)))
+LINK_META_FAILURE_TTL = int(os.environ.get("LINK_META_FAILURE_TTL", "3600"))
+
 # ------------------------------------------------------------------------------
 # Password validation
 # ------------------------------------------------------------------------------
@@ -242,6 +298,11 @@ if not IS_PROD:
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Conditional GETs on list endpoints (core.conditional): let web clients send
+# If-None-Match and read the ETag back.
+CORS_ALLOW_HEADERS = (*default_headers, "if-none-match")
+CORS_EXPOSE_HEADERS = ["ETag"]
+
 # ✅ Keep ONLINE behaviour the same, but make local work over HTTP.
 if IS_PROD:
     # Required for cross-site cookies (Vercel -> Render) over HTTPS
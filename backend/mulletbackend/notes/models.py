@@ -4,8 +4,10 @@ from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.conf import settings
 
+from core.models import LoadedValuesMixin
 
-class Note(models.Model):
+
+class Note(LoadedValuesMixin, models.Model):
     body = models.TextField()
 
     mode = models.ForeignKey(
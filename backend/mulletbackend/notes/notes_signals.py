@@ -1,4 +1,4 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 def _title_of(instance):
@@ -52,3 +52,13 @@ def register_signal_handlers():
     @receiver(post_save, sender=Task)
     def _sync_task(sender, instance, **kwargs):
         _sync_entity_fields(instance)
+
+    # Change counters behind the list ETags
+    from core.services.mode_version import bump_mode_versions
+    from .models import Note
+
+    @receiver(post_save, sender=Note)
+    @receiver(post_delete, sender=Note)
+    def _bump_note_mode_versions(sender, instance, **kwargs):
+        loaded = getattr(instance, "_loaded_values", {})
+        bump_mode_versions([instance.mode_id, loaded.get("mode_id")])
@@ -6,9 +6,10 @@ from django.contrib.contenttypes.models import ContentType
 from .models import Note
 from .serializers import NoteSerializer
 from collaboration.permissions import accessible_mode_ids, validate_mode_write_access
+from core.conditional import ConditionalListMixin
 
 
-class NoteViewSet(viewsets.ModelViewSet):
+class NoteViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     serializer_class = NoteSerializer
     permission_classes = [IsAuthenticated]
 
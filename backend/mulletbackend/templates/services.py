@@ -1,6 +1,9 @@
 # templates/services.py
 from django.db import transaction
 from core.models import Project, Milestone, Task
+from core.services import closure
+from core.services.mode_version import bump_mode_versions
+from core.services.rank import rank_for_position
 from core.services.ordering import (
     POSITION_STEP,
     assign_end_position_for_project,
@@ -46,10 +49,14 @@ def _bulk_create_tasks(user, task_titles, mode_id, project=None, milestone=None)
             project=project,
             milestone=milestone,
             position=base_pos + i * POSITION_STEP,
+            rank=rank_for_position(base_pos + i * POSITION_STEP),
         )
         for i, title in enumerate(titles)
     ]
     Task.objects.bulk_create(tasks)
+    # bulk_create skips post_save, so index the new rows and bump the mode here
+    closure.add_nodes("task", tasks)
+    bump_mode_versions([mode_id])
 
 
 def _create_project_recursive(user, data, mode_id, parent_id=None):
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TimersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'timers'
+
+    def ready(self):
+        import timers.signals  # noqa: F401
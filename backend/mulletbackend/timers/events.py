@@ -0,0 +1,212 @@
+# timers/events.py
+"""
+Per-user feed of active-timer changes behind GET /timer/stream (SSE).
+
+ActiveTimer post_save / post_delete publish start / retarget / stop / expire
+events on commit into a short per-user log in the cache (a cache.incr
+sequence plus one key per event); open streams tail that log instead of
+polling ActiveTimerView (which takes a row lock).
+
+Each open stream holds a worker thread for up to TIMER_STREAM_SECONDS.
+Under gunicorn use threaded workers (`--worker-class gthread --threads N`)
+and keep TIMER_STREAM_SECONDS below `--timeout`; see the README.
+
+The stream also closes a countdown itself once its ends_at passes, and
+re-reads the timer (no lock) every TIMER_STREAM_RESYNC seconds, so a missed
+event — e.g. published on another worker with the per-process cache — only
+delays an update rather than losing it.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.renderers import BaseRenderer
+
+from .models import ActiveTimer
+
+log = logging.getLogger("timer")
+
+# Events a reconnecting client may replay; further behind, it gets a snapshot.
+EVENT_LOG_SIZE = 20
+EVENT_LOG_TTL = 600
+
+POLL_SECONDS = 1
+HEARTBEAT_SECONDS = 15
+
+# Fields that change on their own every second; not part of the timer "state".
+_TICKING = ("remainingSeconds", "elapsedSeconds", "durationSec")
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets EventSource's `Accept: text/event-stream` through content negotiation."""
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only reached for error responses; the stream itself bypasses renderers.
+        return _frame("error", data).encode(self.charset)
+
+
+def _seq_key(user_id: int) -> str:
+    return f"timer_events:{user_id}:seq"
+
+
+def _event_key(user_id: int, seq: int) -> str:
+    return f"timer_events:{user_id}:{seq}"
+
+
+def _last_seq(user_id: int) -> int:
+    return cache.get(_seq_key(user_id)) or 0
+
+
+def _setting(name: str, default: int) -> int:
+    return getattr(settings, name, default)
+
+
+def serialize_timer(active: Optional[ActiveTimer]) -> Optional[Dict[str, Any]]:
+    from .serializers import ActiveTimerSerializer
+
+    return dict(ActiveTimerSerializer(active).data) if active else None
+
+
+def _state(timer: Optional[Dict[str, Any]]):
+    if timer is None:
+        return None
+    return json.dumps({k: v for k, v in timer.items() if k not in _TICKING}, sort_keys=True, default=str)
+
+
+def _next_seq(user_id: int) -> int:
+    # add + incr are atomic in every cache backend, so concurrent publishes
+    # never share a seq (a get-then-set would).
+    key = _seq_key(user_id)
+    cache.add(key, 0, EVENT_LOG_TTL)
+    try:
+        seq = cache.incr(key)
+    except ValueError:  # expired between add and incr
+        cache.add(key, 0, EVENT_LOG_TTL)
+        seq = cache.incr(key)
+    cache.touch(key, EVENT_LOG_TTL)
+    return seq
+
+
+def _push(user_id: int, event_type: str, timer: Optional[Dict[str, Any]]) -> None:
+    # One key per event: nothing is read back and rewritten, so nothing is lost.
+    seq = _next_seq(user_id)
+    cache.set(_event_key(user_id, seq), {"id": seq, "type": event_type, "timer": timer}, EVENT_LOG_TTL)
+
+
+def publish(user_id: int, event_type: str, timer: Optional[Dict[str, Any]]) -> None:
+    """Append an event to the user's feed once the current transaction commits."""
+    transaction.on_commit(lambda: _push(user_id, event_type, timer))
+
+
+def events_since(user_id: int, last_id: int) -> Tuple[bool, List[Dict[str, Any]]]:
+    """(in_sync, events after last_id). in_sync is False if the log no longer reaches back that far."""
+    seq = _last_seq(user_id)
+    if last_id > seq or seq - last_id > EVENT_LOG_SIZE:
+        return False, []  # feed expired / reset under us, or too far behind
+    wanted = range(last_id + 1, seq + 1)
+    found = cache.get_many([_event_key(user_id, i) for i in wanted])
+    events = []
+    for i in wanted:
+        event = found.get(_event_key(user_id, i))
+        if event is None:
+            # The newest event may still be being written (seq is taken
+            # first): pick it up next tick. A gap before a later one is lost.
+            return i == seq, events
+        events.append(event)
+    return True, events
+
+
+def _frame(event_type: str, data: Any, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _expiry(timer: Optional[Dict[str, Any]]):
+    if timer and timer.get("kind") == "timer" and timer.get("endsAt"):
+        return parse_datetime(str(timer["endsAt"]))
+    return None
+
+
+def _current(user) -> Optional[Dict[str, Any]]:
+    return serialize_timer(ActiveTimer.objects.filter(user=user).first())
+
+
+def timer_event_stream(user, last_event_id: Optional[int]) -> Iterator[str]:
+    """
+    SSE frames for one connection: a snapshot (unless resuming cleanly from
+    Last-Event-ID), then events as they land. Ends after TIMER_STREAM_SECONDS
+    (kept under the WSGI worker timeout); the client reconnects with
+    Last-Event-ID.
+    """
+    from .services import auto_close_expired_if_any
+
+    last_id = _last_seq(user.id)
+    timer = _current(user)
+
+    if last_event_id is not None:
+        in_sync, missed = events_since(user.id, last_event_id)
+        if in_sync:
+            last_id = last_event_id
+            for event in missed:
+                last_id = event["id"]
+                yield _frame(event["type"], event["timer"], last_id)
+        else:
+            yield _frame("snapshot", timer, last_id)
+    else:
+        yield _frame("snapshot", timer, last_id)
+
+    now = time.monotonic()
+    deadline = now + _setting("TIMER_STREAM_SECONDS", 25)
+    next_heartbeat = now + HEARTBEAT_SECONDS
+    next_resync = now + _setting("TIMER_STREAM_RESYNC", 30)
+    closed_at = None
+
+    while time.monotonic() < deadline:
+        time.sleep(POLL_SECONDS)
+
+        in_sync, events = events_since(user.id, last_id)
+        if not in_sync:
+            timer = _current(user)
+            last_id = _last_seq(user.id)
+            yield _frame("snapshot", timer, last_id)
+            continue
+        for event in events:
+            timer = event["timer"]
+            last_id = event["id"]
+            yield _frame(event["type"], timer, last_id)
+
+        ends_at = _expiry(timer)
+        if ends_at and ends_at != closed_at and timezone.now() >= ends_at:
+            # Scheduled close: one locking write at expiry instead of on every poll.
+            # Its post_delete publishes the "expire" event picked up next tick.
+            with transaction.atomic():
+                auto_close_expired_if_any(user=user)
+            closed_at = ends_at
+            continue
+
+        now = time.monotonic()
+        if now >= next_resync:
+            next_resync = now + _setting("TIMER_STREAM_RESYNC", 30)
+            fresh = _current(user)
+            if _state(fresh) != _state(timer):
+                log.info("[STREAM] resync user=%s: feed missed a change", user.id)
+                timer = fresh
+                yield _frame("snapshot", timer, last_id)
+        if now >= next_heartbeat:
+            next_heartbeat = now + HEARTBEAT_SECONDS
+            yield ": ping\n\n"
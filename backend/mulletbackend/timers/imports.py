@@ -0,0 +1,206 @@
+# timers/imports.py
+"""
+Bulk import of historic time entries (POST /time-entries/import).
+
+Rows come as a JSON array, JSON Lines or CSV, with the same camelCase names
+the API uses: startedAt, endedAt and/or seconds, kind, note, modeId, goalId,
+projectId, milestoneId, taskId. Every row is validated up front (all or
+nothing); lineage is completed by the same batched resolver the timer uses
+(timers.services.complete_paths), and the rows go in with chunked
+bulk_create.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import Goal, Milestone, Mode, Project, Task
+from core.services.mode_version import bump_mode_versions
+from .models import TimeEntry, fill_title_snapshots
+from .rollups import record_entries
+from .services import complete_paths, fetch_path_entities
+
+MAX_IMPORT_ROWS = 50_000
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+MAX_ENTRY_SECONDS = 24 * 3600
+# Slack between a row's `seconds` and its endedAt - startedAt (rounding in exports)
+SECONDS_TOLERANCE = 1
+
+# (row key, TimeEntry column, model), shallow to deep
+_PATH_FIELDS = (
+    ("modeId", "mode_id", Mode),
+    ("goalId", "goal_id", Goal),
+    ("projectId", "project_id", Project),
+    ("milestoneId", "milestone_id", Milestone),
+    ("taskId", "task_id", Task),
+)
+
+class ImportFileError(ValueError):
+    """The upload itself can't be read (as opposed to per-row errors)."""
+
+
+def read_rows(*, data, files) -> List[Dict[str, Any]]:
+    """Rows from an uploaded `file` (CSV, JSON Lines or JSON array) or a JSON body."""
+    upload = files.get("file") if files else None
+    if upload is None:
+        rows = data.get("entries") if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise ImportFileError("Send a JSON array (or {\"entries\": [...]}) or upload a file.")
+        return rows
+
+    try:
+        text = upload.read().decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ImportFileError("File must be UTF-8.")
+
+    name = (upload.name or "").lower()
+    if name.endswith(".csv") or upload.content_type in ("text/csv", "application/vnd.ms-excel"):
+        return [
+            {k.strip(): (v.strip() if v and v.strip() else None) for k, v in row.items() if k}
+            for row in csv.DictReader(io.StringIO(text))
+        ]
+
+    stripped = text.lstrip()
+    try:
+        if stripped.startswith("["):
+            return json.loads(stripped)
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    except json.JSONDecodeError as exc:
+        raise ImportFileError(f"Invalid JSON: {exc}")
+
+
+def _parse_row(row: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    if not isinstance(row, dict):
+        return None, "Each row must be an object."
+
+    started_at = parse_datetime(str(row.get("startedAt") or ""))
+    if not started_at:
+        return None, "startedAt must be an ISO 8601 datetime."
+    if timezone.is_naive(started_at):
+        started_at = timezone.make_aware(started_at, timezone.get_current_timezone())
+
+    ended_at = None
+    if row.get("endedAt"):
+        ended_at = parse_datetime(str(row["endedAt"]))
+        if not ended_at:
+            return None, "endedAt must be an ISO 8601 datetime."
+        if timezone.is_naive(ended_at):
+            ended_at = timezone.make_aware(ended_at, timezone.get_current_timezone())
+
+    if ended_at is not None and ended_at <= started_at:
+        return None, "endedAt must be after startedAt."
+
+    seconds = row.get("seconds")
+    if seconds is not None:
+        try:
+            seconds = int(seconds)
+        except (TypeError, ValueError):
+            return None, "seconds must be an integer."
+        if ended_at is not None:
+            span = (ended_at - started_at).total_seconds()
+            if abs(seconds - span) > SECONDS_TOLERANCE:
+                return None, "seconds doesn't match endedAt - startedAt."
+    elif ended_at:
+        seconds = round((ended_at - started_at).total_seconds())
+    else:
+        return None, "Either endedAt or seconds is required."
+    if seconds < 1:
+        return None, "Entries must be at least 1 second long."
+    if seconds > MAX_ENTRY_SECONDS:
+        return None, f"Entries can be at most {MAX_ENTRY_SECONDS // 3600} hours long."
+    if ended_at is None:
+        ended_at = started_at + timedelta(seconds=seconds)
+    if ended_at > timezone.now():
+        return None, "Entries can't end in the future."
+
+    kind = row.get("kind") or "stopwatch"
+    if kind not in dict(TimeEntry.KIND_CHOICES):
+        return None, "kind must be 'stopwatch' or 'timer'."
+
+    parsed = {
+        "kind": kind,
+        "started_at": started_at,
+        "ended_at": ended_at,
+        "seconds": seconds,
+        "note": str(row.get("note") or ""),
+    }
+    for key, column, _ in _PATH_FIELDS:
+        value = row.get(key)
+        try:
+            parsed[column] = int(value) if value not in (None, "") else None
+        except (TypeError, ValueError):
+            return None, f"{key} must be an integer."
+    if not any(parsed[column] for _, column, _ in _PATH_FIELDS):
+        return None, "At least one of modeId, goalId, projectId, milestoneId, taskId is required."
+    return parsed, None
+
+
+def import_time_entries(*, user, rows: Iterable[Any]) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Validate and insert rows for `user`. Returns (created, errors); nothing is
+    written if any row fails.
+    """
+    rows = list(rows)
+    if len(rows) > MAX_IMPORT_ROWS:
+        return 0, [{"row": None, "detail": f"At most {MAX_IMPORT_ROWS} rows per import."}]
+
+    errors: List[Dict[str, Any]] = []
+    paths: List[Dict[str, Any]] = []
+    for index, row in enumerate(rows, start=1):
+        parsed, error = _parse_row(row)
+        if error:
+            errors.append({"row": index, "detail": error})
+        else:
+            parsed["row"] = index
+            paths.append(parsed)
+
+    # One access-scoped lookup per entity type for the whole file.
+    entities = fetch_path_entities(user=user, paths=paths)
+    for p in paths:
+        for key, column, _ in _PATH_FIELDS:
+            if p[column] and p[column] not in entities[column]:
+                errors.append({"row": p["row"], "detail": f"{key} {p[column]} not found or no access."})
+                break
+
+    if errors:
+        errors.sort(key=lambda e: e["row"] or 0)
+        return 0, errors[:MAX_REPORTED_ERRORS]
+
+    resolved = complete_paths(paths, entities)
+    for p, lineage in zip(paths, resolved):
+        p.update(lineage)
+
+    entries = [
+        TimeEntry(
+            user=user,
+            kind=p["kind"],
+            started_at=p["started_at"],
+            ended_at=p["ended_at"],
+            seconds=p["seconds"],
+            note=p["note"],
+            mode_id=p["mode_id"],
+            goal_id=p["goal_id"],
+            project_id=p["project_id"],
+            milestone_id=p["milestone_id"],
+            task_id=p["task_id"],
+        )
+        for p in paths
+    ]
+    fill_title_snapshots(entries)
+
+    with transaction.atomic():
+        for start in range(0, len(entries), CHUNK_SIZE):
+            TimeEntry.objects.bulk_create(entries[start:start + CHUNK_SIZE])
+        # bulk_create skips post_save: do what the TimeEntry receivers would.
+        record_entries(entries)
+        bump_mode_versions({e.mode_id for e in entries}, stats=True)
+
+    return len(entries), []
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from timers.services import sweep_expired_timers
+
+class Command(BaseCommand):
+    help = "Close countdown timers whose end time has passed and log their time entries (run from cron, or with --every as a worker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Timers closed per transaction (default: 500)")
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running, sweeping every N seconds (default: sweep once and exit)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            closed = sweep_expired_timers(batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Closed {closed} expired timers"))
+            if not options["every"]:
+                return
+            time.sleep(options["every"])
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from timers.rollups import rebuild_rollups
+
+class Command(BaseCommand):
+    help = "Rebuild the TimeEntryDailyRollup table from TimeEntry rows (run after deploying, or if TIME_ZONE changes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, default=None, help="Only rebuild this user id")
+
+    def handle(self, *args, **options):
+        written = rebuild_rollups(user_id=options["user"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt time rollups ({written} buckets)"))
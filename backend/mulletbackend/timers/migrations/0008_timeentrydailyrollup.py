@@ -0,0 +1,34 @@
+# Generated by Django 5.0.14 on 2026-10-17 17:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_modeversion'),
+        ('timers', '0007_remove_timeentry_timers_time_started_d0734f_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimeEntryDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_kind', models.CharField(choices=[('mode', 'Mode'), ('goal', 'Goal'), ('project', 'Project'), ('milestone', 'Milestone'), ('task', 'Task')], max_length=10)),
+                ('entity_id', models.PositiveIntegerField()),
+                ('day', models.DateField()),
+                ('seconds', models.BigIntegerField(default=0)),
+                ('entry_count', models.IntegerField(default=0)),
+                ('mode', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='time_rollups', to='core.mode')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='time_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'entity_kind', 'day'], name='timers_time_user_id_e81c8c_idx'), models.Index(fields=['user', 'mode', 'entity_kind', 'day'], name='timers_time_user_id_121475_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'mode', 'entity_kind', 'entity_id', 'day'), name='unique_time_rollup_bucket')],
+            },
+        ),
+    ]
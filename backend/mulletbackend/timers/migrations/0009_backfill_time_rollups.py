@@ -0,0 +1,58 @@
+"""
+Data migration: seed TimeEntryDailyRollup from the existing entries.
+
+Same bucketing as timers.rollups (inlined so the migration doesn't import app
+code): one "mode" bucket per entry plus one per non-null goal / project /
+milestone / task, by local date of started_at.
+"""
+
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+LEVELS = (("task", "task_id"), ("milestone", "milestone_id"), ("project", "project_id"), ("goal", "goal_id"))
+
+def backfill_rollups(apps, schema_editor):
+    TimeEntry = apps.get_model("timers", "TimeEntry")
+    Rollup = apps.get_model("timers", "TimeEntryDailyRollup")
+
+    buckets = defaultdict(lambda: [0, 0])
+    rows = (
+        TimeEntry.objects.order_by()
+        .annotate(day=TruncDate("started_at"))
+        .values("user_id", "mode_id", "day", *(column for _, column in LEVELS))
+        .annotate(total=Sum("seconds"), n=Count("id"))
+    )
+    for row in rows.iterator(chunk_size=2000):
+        keys = [(row["user_id"], row["mode_id"], "mode", row["mode_id"] or 0, row["day"])]
+        keys += [
+            (row["user_id"], row["mode_id"], kind, row[column], row["day"])
+            for kind, column in LEVELS
+            if row[column] is not None
+        ]
+        for key in keys:
+            buckets[key][0] += row["total"] or 0
+            buckets[key][1] += row["n"]
+
+    Rollup.objects.bulk_create(
+        [
+            Rollup(user_id=u, mode_id=m, entity_kind=k, entity_id=e, day=d, seconds=s, entry_count=n)
+            for (u, m, k, e, d), (s, n) in buckets.items()
+        ],
+        batch_size=1000,
+    )
+
+def clear_rollups(apps, schema_editor):
+    apps.get_model("timers", "TimeEntryDailyRollup").objects.all().delete()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("timers", "0008_timeentrydailyrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, clear_rollups),
+    ]
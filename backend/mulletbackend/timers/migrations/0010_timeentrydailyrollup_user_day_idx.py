@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-17 18:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timers', '0009_backfill_time_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeentrydailyrollup',
+            index=models.Index(fields=['user', 'day'], name='timers_time_user_id_fa9d98_idx'),
+        ),
+    ]
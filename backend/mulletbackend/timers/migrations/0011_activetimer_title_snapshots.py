@@ -0,0 +1,62 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:10
+
+from django.db import migrations, models
+
+LINEAGE = (
+    ("mode_id", "mode_title_snapshot", "core", "Mode"),
+    ("goal_id", "goal_title_snapshot", "core", "Goal"),
+    ("project_id", "project_title_snapshot", "core", "Project"),
+    ("milestone_id", "milestone_title_snapshot", "core", "Milestone"),
+    ("task_id", "task_title_snapshot", "core", "Task"),
+)
+
+def backfill_active_titles(apps, schema_editor):
+    ActiveTimer = apps.get_model("timers", "ActiveTimer")
+    timers = list(ActiveTimer.objects.all())
+    if not timers:
+        return
+    fields = []
+    for column, field, app_label, model_name in LINEAGE:
+        Model = apps.get_model(app_label, model_name)
+        ids = {getattr(t, column) for t in timers if getattr(t, column)}
+        titles = dict(Model.objects.filter(id__in=ids).values_list("id", "title"))
+        for t in timers:
+            setattr(t, field, titles.get(getattr(t, column)) or "")
+        fields.append(field)
+    ActiveTimer.objects.bulk_update(timers, fields, batch_size=500)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timers', '0010_timeentrydailyrollup_user_day_idx'),
+        ('core', '0036_modeversion_stats_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activetimer',
+            name='goal_title_snapshot',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='activetimer',
+            name='milestone_title_snapshot',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='activetimer',
+            name='mode_title_snapshot',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='activetimer',
+            name='project_title_snapshot',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='activetimer',
+            name='task_title_snapshot',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_active_titles, migrations.RunPython.noop),
+    ]
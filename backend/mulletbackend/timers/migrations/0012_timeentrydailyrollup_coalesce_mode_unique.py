@@ -0,0 +1,45 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:10
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_null_mode_duplicates(apps, schema_editor):
+    """Fold buckets duplicated under mode=NULL (the old constraint let them through)."""
+    Rollup = apps.get_model("timers", "TimeEntryDailyRollup")
+    dupes = (
+        Rollup.objects.filter(mode__isnull=True)
+        .values("user_id", "entity_kind", "entity_id", "day")
+        .annotate(n=Count("id"), keep=Min("id"), seconds_total=Sum("seconds"), entries_total=Sum("entry_count"))
+        .filter(n__gt=1)
+    )
+    for row in dupes:
+        same = Rollup.objects.filter(
+            mode__isnull=True,
+            user_id=row["user_id"],
+            entity_kind=row["entity_kind"],
+            entity_id=row["entity_id"],
+            day=row["day"],
+        )
+        same.exclude(id=row["keep"]).delete()
+        same.filter(id=row["keep"]).update(seconds=row["seconds_total"], entry_count=row["entries_total"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timers', '0011_activetimer_title_snapshots'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='timeentrydailyrollup',
+            name='unique_time_rollup_bucket',
+        ),
+        migrations.RunPython(merge_null_mode_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='timeentrydailyrollup',
+            constraint=models.UniqueConstraint(models.F('user'), django.db.models.functions.comparison.Coalesce(models.F('mode'), models.Value(0, output_field=models.BigIntegerField())), models.F('entity_kind'), models.F('entity_id'), models.F('day'), name='unique_time_rollup_bucket'),
+        ),
+    ]
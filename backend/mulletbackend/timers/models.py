@@ -1,16 +1,37 @@
 # timer/models.py
 import uuid
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.conf import settings
 
 from core.models import Mode, Goal, Project, Milestone, Task
 
 
-def _get_label(obj) -> str:
-    if not obj:
-        return ""
-    return getattr(obj, "title", None) or getattr(obj, "name", None) or str(obj)
+# (FK column, frozen title field, model) for the lineage of an entry / active timer
+SNAPSHOT_FIELDS = (
+    ("mode_id", "mode_title_snapshot", Mode),
+    ("goal_id", "goal_title_snapshot", Goal),
+    ("project_id", "project_title_snapshot", Project),
+    ("milestone_id", "milestone_title_snapshot", Milestone),
+    ("task_id", "task_title_snapshot", Task),
+)
+
+
+def fill_title_snapshots(objs) -> None:
+    """
+    Set the *_title_snapshot fields of TimeEntry / ActiveTimer objects from
+    their FK ids: one titles query per entity type for the whole batch, no
+    per-object FK loads. Archived entities still give their title.
+    """
+    objs = list(objs)
+    for column, field, model in SNAPSHOT_FIELDS:
+        ids = {getattr(o, column) for o in objs if getattr(o, column)}
+        manager = model.objects if model is Mode else model.all_objects
+        titles = dict(manager.filter(id__in=ids).values_list("id", "title")) if ids else {}
+        for o in objs:
+            setattr(o, field, titles.get(getattr(o, column)) or "")
 
 
 class TimeEntry(models.Model):
@@ -65,22 +86,14 @@ class TimeEntry(models.Model):
         return f"{self.user_id} · {self.kind} · {self.started_at} → {self.ended_at} · {self.seconds}s"
 
     def fill_snapshots_from_lineage(self):
-        self.mode_title_snapshot = _get_label(self.mode)
-        self.goal_title_snapshot = _get_label(self.goal)
-        self.project_title_snapshot = _get_label(self.project)
-        self.milestone_title_snapshot = _get_label(self.milestone)
-        self.task_title_snapshot = _get_label(self.task)
+        fill_title_snapshots([self])
 
     @classmethod
     def from_active_timer(cls, active_timer: "ActiveTimer", *, ended_at, seconds, note: str = ""):
+        """Entry for a run of the timer; ids and titles are copied, nothing is read."""
         entry = cls(
-            user=active_timer.user,
+            user_id=active_timer.user_id,
             kind=active_timer.kind,
-            mode=active_timer.mode,
-            goal=active_timer.goal,
-            project=active_timer.project,
-            milestone=active_timer.milestone,
-            task=active_timer.task,
             started_at=active_timer.started_at,
             ended_at=ended_at,
             seconds=seconds,
@@ -88,7 +101,9 @@ class TimeEntry(models.Model):
             session_id=active_timer.session_id,
             planned_seconds=active_timer.planned_seconds,
         )
-        entry.fill_snapshots_from_lineage()
+        for column, field, _ in SNAPSHOT_FIELDS:
+            setattr(entry, column, getattr(active_timer, column))
+            setattr(entry, field, getattr(active_timer, field))
         return entry
 
 
@@ -115,6 +130,14 @@ class ActiveTimer(models.Model):
     session_id = models.UUIDField(null=True, blank=True, db_index=True)
     planned_seconds = models.IntegerField(null=True, blank=True)
 
+    # Lineage titles, set with the path (start / retarget) so closing the
+    # timer writes its TimeEntry without reading the entities again.
+    mode_title_snapshot = models.CharField(max_length=255, blank=True, default="")
+    goal_title_snapshot = models.CharField(max_length=255, blank=True, default="")
+    project_title_snapshot = models.CharField(max_length=255, blank=True, default="")
+    milestone_title_snapshot = models.CharField(max_length=255, blank=True, default="")
+    task_title_snapshot = models.CharField(max_length=255, blank=True, default="")
+
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["user"], name="unique_active_timer_per_user"),
@@ -127,3 +150,58 @@ class ActiveTimer(models.Model):
 
     def __str__(self):
         return f"{self.user_id} · {self.kind} · {self.started_at}"
+
+
+class TimeEntryDailyRollup(models.Model):
+    """
+    Seconds logged per (user, mode, entity, local day), kept in step with
+    TimeEntry by timers.rollups so the stats views read a handful of rollup
+    rows instead of scanning raw entries.
+
+    Each entry lands in one "mode" bucket (entity_id = mode id, 0 if none;
+    these give the totals) plus one bucket per non-null goal / project /
+    milestone / task on its path. Rebuild with `manage.py rebuild_time_rollups`.
+    """
+
+    ENTITY_KINDS = (
+        ("mode", "Mode"),
+        ("goal", "Goal"),
+        ("project", "Project"),
+        ("milestone", "Milestone"),
+        ("task", "Task"),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="time_rollups",
+    )
+    mode = models.ForeignKey(Mode, on_delete=models.CASCADE, null=True, blank=True, related_name="time_rollups")
+    entity_kind = models.CharField(max_length=10, choices=ENTITY_KINDS)
+    entity_id = models.PositiveIntegerField()
+    day = models.DateField()
+
+    seconds = models.BigIntegerField(default=0)
+    entry_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # mode is nullable and NULLs never collide in a plain unique
+            # constraint, so the key uses COALESCE(mode_id, 0).
+            models.UniqueConstraint(
+                "user",
+                Coalesce(models.F("mode"), Value(0, output_field=models.BigIntegerField())),
+                "entity_kind",
+                "entity_id",
+                "day",
+                name="unique_time_rollup_bucket",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "day"]),  # StatsSummaryView: all kinds in one pass
+            models.Index(fields=["user", "entity_kind", "day"]),
+            models.Index(fields=["user", "mode", "entity_kind", "day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} · {self.entity_kind}:{self.entity_id} · {self.day} · {self.seconds}s"
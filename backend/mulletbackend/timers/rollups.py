@@ -0,0 +1,158 @@
+# timer/rollups.py
+"""
+Incremental maintenance of TimeEntryDailyRollup.
+
+Every path that writes or removes TimeEntry rows goes through here:
+record_entries() / add_entries() after inserting, remove_entries() *before*
+deleting (or re-parenting) them. Days are local dates of started_at, the same bucketing
+TruncDate("started_at") gives the stats views.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import TimeEntry, TimeEntryDailyRollup
+
+# (entity kind, TimeEntry column) for the per-entity buckets
+ROLLUP_LEVELS = (
+    ("task", "task_id"),
+    ("milestone", "milestone_id"),
+    ("project", "project_id"),
+    ("goal", "goal_id"),
+)
+
+# (user_id, mode_id, entity_kind, entity_id, day)
+BucketKey = Tuple[int, int, str, int, object]
+
+
+class _Delta:
+    __slots__ = ("seconds", "count")
+
+    def __init__(self):
+        self.seconds = 0
+        self.count = 0
+
+    def __iadd__(self, other):
+        self.seconds += other[0]
+        self.count += other[1]
+        return self
+
+
+def _add_path(deltas, *, user_id, mode_id, day, path, seconds, count):
+    deltas[(user_id, mode_id, "mode", mode_id or 0, day)] += (seconds, count)
+    for kind, column in ROLLUP_LEVELS:
+        entity_id = path[column]
+        if entity_id is not None:
+            deltas[(user_id, mode_id, kind, entity_id, day)] += (seconds, count)
+
+
+def _deltas_for_entries(entries: Iterable[TimeEntry]) -> Dict[BucketKey, _Delta]:
+    deltas = defaultdict(_Delta)
+    for e in entries:
+        _add_path(
+            deltas,
+            user_id=e.user_id,
+            mode_id=e.mode_id,
+            day=timezone.localtime(e.started_at).date(),
+            path={column: getattr(e, column) for _, column in ROLLUP_LEVELS},
+            seconds=e.seconds,
+            count=1,
+        )
+    return deltas
+
+
+def _deltas_for_queryset(qs) -> Dict[BucketKey, _Delta]:
+    """One GROUP BY over the entries: a row per distinct (path, day)."""
+    deltas = defaultdict(_Delta)
+    rows = (
+        qs.order_by()
+        .annotate(day=TruncDate("started_at"))
+        .values("user_id", "mode_id", "day", *(column for _, column in ROLLUP_LEVELS))
+        .annotate(total=Sum("seconds"), n=Count("id"))
+    )
+    for row in rows:
+        _add_path(
+            deltas,
+            user_id=row["user_id"],
+            mode_id=row["mode_id"],
+            day=row["day"],
+            path=row,
+            seconds=row["total"] or 0,
+            count=row["n"],
+        )
+    return deltas
+
+
+def _bucket_filter(key: BucketKey) -> dict:
+    user_id, mode_id, kind, entity_id, day = key
+    return dict(user_id=user_id, mode_id=mode_id, entity_kind=kind, entity_id=entity_id, day=day)
+
+
+@transaction.atomic
+def _apply(deltas: Dict[BucketKey, _Delta], sign: int) -> None:
+    emptied = []
+    for key, delta in deltas.items():
+        filters = _bucket_filter(key)
+        seconds, count = sign * delta.seconds, sign * delta.count
+        bucket = TimeEntryDailyRollup.objects.filter(**filters)
+        if bucket.update(seconds=F("seconds") + seconds, entry_count=F("entry_count") + count):
+            if sign < 0:
+                emptied.append(key)
+            continue
+        if sign < 0:
+            continue  # nothing rolled up for it (e.g. before a rebuild); nothing to take away
+        try:
+            with transaction.atomic():
+                TimeEntryDailyRollup.objects.create(**filters, seconds=seconds, entry_count=count)
+        except IntegrityError:
+            # Lost a race to create the bucket: it exists now.
+            bucket.update(seconds=F("seconds") + seconds, entry_count=F("entry_count") + count)
+
+    for key in emptied:
+        TimeEntryDailyRollup.objects.filter(**_bucket_filter(key), entry_count__lte=0).delete()
+
+
+def record_entries(entries: Iterable[TimeEntry]) -> None:
+    """Add freshly saved entries to their buckets."""
+    deltas = _deltas_for_entries(entries)
+    if deltas:
+        _apply(deltas, +1)
+
+
+def add_entries(qs) -> None:
+    """Add a TimeEntry queryset to its buckets (grouped in SQL, no rows loaded)."""
+    deltas = _deltas_for_queryset(qs)
+    if deltas:
+        _apply(deltas, +1)
+
+
+def remove_entries(qs) -> None:
+    """Take a TimeEntry queryset out of its buckets. Call before deleting / re-parenting."""
+    deltas = _deltas_for_queryset(qs)
+    if deltas:
+        _apply(deltas, -1)
+
+
+@transaction.atomic
+def rebuild_rollups(*, user_id=None) -> int:
+    """Recompute rollups from TimeEntry (all users, or one). Returns buckets written."""
+    entries = TimeEntry.objects.all()
+    stale = TimeEntryDailyRollup.objects.all()
+    if user_id is not None:
+        entries = entries.filter(user_id=user_id)
+        stale = stale.filter(user_id=user_id)
+    stale.delete()
+
+    deltas = _deltas_for_queryset(entries)
+    TimeEntryDailyRollup.objects.bulk_create(
+        [
+            TimeEntryDailyRollup(**_bucket_filter(key), seconds=d.seconds, entry_count=d.count)
+            for key, d in deltas.items()
+        ],
+        batch_size=1000,
+    )
+    return len(deltas)
@@ -3,115 +3,140 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional
 
 from django.utils import timezone
 from django.db import transaction
 
 from core.models import Mode, Goal, Project, Milestone, Task
+from core.services import closure
+from core.services.mode_version import bump_mode_versions
 from .models import ActiveTimer, TimeEntry
+from .rollups import record_entries
+from .stats_cache import note_entry_appended
 
 log = logging.getLogger("timer")
 
 
-def _walk_project_for_goal(project):
-    """Walk up the project parent chain to find the first goal."""
-    visited = set()
-    cur = project
-    while cur:
-        if cur.goal_id is not None:
-            return cur.goal
-        if cur.parent_id is None or cur.parent_id in visited:
-            break
-        visited.add(cur.parent_id)
-        cur = cur.parent
-    return None
-
-
-def _walk_milestone_for_project(milestone):
-    """Walk up the milestone parent chain to find the first project."""
-    visited = set()
-    cur = milestone
-    while cur:
-        if cur.project_id is not None:
-            return cur.project
-        if cur.parent_id is None or cur.parent_id in visited:
-            break
-        visited.add(cur.parent_id)
-        cur = cur.parent
-    return None
-
-
-def _walk_milestone_for_goal(milestone):
-    """Walk up the milestone parent chain to find the first goal."""
-    visited = set()
-    cur = milestone
-    while cur:
-        if cur.goal_id is not None:
-            return cur.goal
-        if cur.parent_id is None or cur.parent_id in visited:
-            break
-        visited.add(cur.parent_id)
-        cur = cur.parent
-    return None
-
-
-def resolve_path(*, task=None, milestone=None, project=None, goal=None, mode=None) -> Dict[str, Optional[object]]:
-    # deepest wins: task > milestone > project > goal > mode
-    if task:
-        milestone = task.milestone or milestone
-        project = task.project or project
-        goal = task.goal or goal
-        mode = task.mode or mode
-
-    if milestone and not task:
-        project = milestone.project or _walk_milestone_for_project(milestone) or project
-        goal = milestone.goal or goal
-        mode = milestone.mode or mode
-
-    if project and not (task or milestone):
-        goal = project.goal or _walk_project_for_goal(project) or goal
-        mode = project.mode or mode
+# (TimeEntry / ActiveTimer column, model), shallow to deep
+PATH_COLUMNS = (
+    ("mode_id", Mode),
+    ("goal_id", Goal),
+    ("project_id", Project),
+    ("milestone_id", Milestone),
+    ("task_id", Task),
+)
 
-    # Walk parent chains for any remaining gaps
-    if project and not goal:
-        goal = _walk_project_for_goal(project)
+# Columns the lineage resolver reads off each entity
+_LINEAGE_COLUMNS = {
+    Mode: ("id",),
+    Goal: ("id", "mode_id"),
+    Project: ("id", "mode_id", "goal_id"),
+    Milestone: ("id", "mode_id", "project_id", "goal_id"),
+    Task: ("id", "mode_id", "milestone_id", "project_id", "goal_id"),
+}
 
-    if milestone and not project:
-        project = _walk_milestone_for_project(milestone)
-        if project and not goal:
-            goal = _walk_project_for_goal(project)
+Path = Dict[str, Optional[int]]
 
-    if milestone and not goal:
-        goal = _walk_milestone_for_goal(milestone)
 
-    if goal and not mode:
-        mode = goal.mode or mode
-
-    return dict(mode=mode, goal=goal, project=project, milestone=milestone, task=task)
-
-
-def fetch_entities_by_ids(
-    *,
-    user,
-    mode_id=None,
-    goal_id=None,
-    project_id=None,
-    milestone_id=None,
-    task_id=None,
-):
+def fetch_path_entities(*, user, paths: Iterable[Path]) -> Dict[str, Dict[int, object]]:
     """
-    Fetch entities scoped to modes the user can access (owns or collaborates on).
-    Prevents pointing a timer at entities in modes you have no access to.
+    {column: {id: entity}} for every id on the given paths, scoped to modes the
+    user can access (owns or collaborates on): one query per entity type
+    present, loading only the lineage columns. Ids that are missing or out of
+    reach are simply absent.
     """
     from collaboration.permissions import accessible_mode_ids
     modes = accessible_mode_ids(user)
-    mode = Mode.objects.filter(id=mode_id, id__in=modes).first() if mode_id else None
-    goal = Goal.objects.filter(id=goal_id, mode_id__in=modes).first() if goal_id else None
-    project = Project.objects.filter(id=project_id, mode_id__in=modes).first() if project_id else None
-    milestone = Milestone.objects.filter(id=milestone_id, mode_id__in=modes).first() if milestone_id else None
-    task = Task.objects.filter(id=task_id, mode_id__in=modes).first() if task_id else None
-    return dict(mode=mode, goal=goal, project=project, milestone=milestone, task=task)
+    paths = list(paths)
+
+    entities: Dict[str, Dict[int, object]] = {}
+    for column, model in PATH_COLUMNS:
+        ids = {p[column] for p in paths if p.get(column)}
+        if not ids:
+            entities[column] = {}
+            continue
+        if model is Mode:
+            qs = Mode.objects.filter(id__in=ids & modes)
+        else:
+            qs = model.objects.filter(id__in=ids, mode_id__in=modes)
+        entities[column] = {obj.id: obj for obj in qs.only(*_LINEAGE_COLUMNS[model])}
+    return entities
+
+
+def complete_paths(paths: Iterable[Path], entities: Dict[str, Dict[int, object]]) -> List[Path]:
+    """
+    Fill in each path's ancestors, deepest wins (task > milestone > project >
+    goal > mode). Ids not in `entities` are dropped first. Ancestors come from
+    the deepest entity's own FKs; remaining gaps (e.g. a milestone nested under
+    another milestone) are walked in the closure table, one query per gap kind
+    for all paths together.
+    """
+    out: List[Path] = []
+    for p in paths:
+        p = {column: (p.get(column) if p.get(column) in entities[column] else None) for column, _ in PATH_COLUMNS}
+        task = entities["task_id"].get(p["task_id"])
+        milestone = entities["milestone_id"].get(p["milestone_id"])
+        project = entities["project_id"].get(p["project_id"])
+        if task:
+            p["milestone_id"] = task.milestone_id or p["milestone_id"]
+            p["project_id"] = task.project_id or p["project_id"]
+            p["goal_id"] = task.goal_id or p["goal_id"]
+            p["mode_id"] = task.mode_id or p["mode_id"]
+        elif milestone:
+            p["project_id"] = milestone.project_id or p["project_id"]
+            p["goal_id"] = milestone.goal_id or p["goal_id"]
+            p["mode_id"] = milestone.mode_id or p["mode_id"]
+        elif project:
+            p["goal_id"] = project.goal_id or p["goal_id"]
+            p["mode_id"] = project.mode_id or p["mode_id"]
+        out.append(p)
+
+    # Nearest project above milestones still missing one, then nearest goals.
+    need = {("milestone", p["milestone_id"]) for p in out if p["milestone_id"] and not p["project_id"]}
+    found = closure.nearest_ancestor_ids(need, "project")
+    for p in out:
+        if p["milestone_id"] and not p["project_id"]:
+            p["project_id"] = found.get(("milestone", p["milestone_id"]))
+
+    need = set()
+    for p in out:
+        if not p["goal_id"]:
+            if p["project_id"]:
+                need.add(("project", p["project_id"]))
+            if p["milestone_id"]:
+                need.add(("milestone", p["milestone_id"]))
+    found = closure.nearest_ancestor_ids(need, "goal")
+    for p in out:
+        if not p["goal_id"]:
+            p["goal_id"] = found.get(("project", p["project_id"])) or found.get(("milestone", p["milestone_id"]))
+
+    goals = entities["goal_id"]
+    for p in out:
+        if p["goal_id"] and not p["mode_id"] and p["goal_id"] in goals:
+            p["mode_id"] = goals[p["goal_id"]].mode_id
+    return out
+
+
+def resolve_paths(*, user, paths: Iterable[Path]) -> List[Path]:
+    """Complete many (possibly partial) id paths at once; see complete_paths()."""
+    paths = list(paths)
+    return complete_paths(paths, fetch_path_entities(user=user, paths=paths))
+
+
+def resolve_path(*, user, mode_id=None, goal_id=None, project_id=None, milestone_id=None, task_id=None) -> Path:
+    """
+    Full lineage ids for the deepest accessible entity given. Prevents pointing
+    a timer at entities in modes you have no access to.
+    """
+    def _as_id(value):
+        try:
+            return int(value) if value not in (None, "") else None
+        except (TypeError, ValueError):
+            return None
+
+    path = dict(mode_id=mode_id, goal_id=goal_id, project_id=project_id, milestone_id=milestone_id, task_id=task_id)
+    return resolve_paths(user=user, paths=[{k: _as_id(v) for k, v in path.items()}])[0]
 
 
 def validate_duration_sec(duration_sec) -> int:
@@ -129,12 +154,8 @@ def effective_end_for(active: ActiveTimer) -> timezone.datetime:
     return now
 
 
-@transaction.atomic
-def close_active_into_entry(
-    active: ActiveTimer,
-    *,
-    force_end: Optional[timezone.datetime] = None,
-) -> TimeEntry:
+def _closing_entry(active: ActiveTimer, *, force_end: Optional[timezone.datetime] = None) -> TimeEntry:
+    """Unsaved TimeEntry for the active timer's run up to force_end / now / ends_at."""
     end = force_end or effective_end_for(active)
 
     if active.kind == "timer" and active.ends_at:
@@ -147,22 +168,70 @@ def close_active_into_entry(
     if seconds < 1:
         seconds = 1
 
-    entry = TimeEntry.from_active_timer(active, ended_at=end, seconds=seconds, note="")
+    return TimeEntry.from_active_timer(active, ended_at=end, seconds=seconds, note="")
+
+
+@transaction.atomic
+def close_active_into_entry(
+    active: ActiveTimer,
+    *,
+    force_end: Optional[timezone.datetime] = None,
+) -> TimeEntry:
+    entry = _closing_entry(active, force_end=force_end)
     entry.save()
+    record_entries([entry])
+    note_entry_appended(entry)
 
     active.delete()
     return entry
 
 
+def is_expired(active: ActiveTimer) -> bool:
+    return active.kind == "timer" and bool(active.ends_at) and timezone.now() >= active.ends_at
+
+
 def auto_close_expired_if_any(*, user) -> Optional[TimeEntry]:
     active = ActiveTimer.objects.select_for_update().filter(user=user).first()
     if not active:
         return None
-    if active.kind == "timer" and active.ends_at and timezone.now() >= active.ends_at:
+    if is_expired(active):
         return close_active_into_entry(active)
     return None
 
 
+def sweep_expired_timers(*, batch_size: int = 500) -> int:
+    """
+    Close every countdown whose ends_at has passed, batch_size at a time, so
+    users who never reopen the timer still get their entry (and stats).
+    Returns the number of timers closed.
+
+    Rows another request is closing right now are skipped (SKIP LOCKED) and
+    left to that request.
+    """
+    closed = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                ActiveTimer.objects.select_for_update(skip_locked=True, of=("self",))
+                .filter(kind="timer", ends_at__lte=timezone.now())
+                .order_by("ends_at")[:batch_size]
+            )
+            if not batch:
+                return closed
+
+            entries = TimeEntry.objects.bulk_create([_closing_entry(a) for a in batch])
+            # bulk_create skips post_save: do what the TimeEntry receivers would.
+            record_entries(entries)
+            bump_mode_versions([e.mode_id for e in entries], stats=True)
+
+            ActiveTimer.objects.filter(id__in=[a.id for a in batch]).delete()
+
+        closed += len(batch)
+        log.info("[SWEEP] closed %d expired timers", len(batch))
+        if len(batch) < batch_size:
+            return closed
+
+
 def slice_active_until(active: ActiveTimer, *, until=None, corr: str = "—"):
     """
     Write TimeEntry for [started_at, until] on the OLD path, then set started_at=until.
@@ -187,23 +256,10 @@ def slice_active_until(active: ActiveTimer, *, until=None, corr: str = "—"):
 
     entry_id = None
     if elapsed > 0:
-        te = TimeEntry(
-            user=active.user,
-            kind=active.kind,
-            session_id=active.session_id,
-            started_at=active.started_at,
-            ended_at=until,
-            seconds=elapsed,
-            planned_seconds=active.planned_seconds,
-            mode=active.mode,
-            goal=active.goal,
-            project=active.project,
-            milestone=active.milestone,
-            task=active.task,
-            note="",
-        )
-        te.fill_snapshots_from_lineage()
+        te = TimeEntry.from_active_timer(active, ended_at=until, seconds=elapsed)
         te.save()
+        record_entries([te])
+        note_entry_appended(te)
         entry_id = te.id
 
     active.started_at = until
@@ -0,0 +1,47 @@
+# timers/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Goal, Milestone, Mode, Project, Task
+from core.services.mode_version import bump_mode_versions
+from timers.events import publish, serialize_timer
+from timers.models import SNAPSHOT_FIELDS, ActiveTimer, TimeEntry
+
+_SNAPSHOT_BY_MODEL = {model: (column, field) for column, field, model in SNAPSHOT_FIELDS}
+
+
+@receiver(post_save, sender=TimeEntry)
+@receiver(post_delete, sender=TimeEntry)
+def bump_entry_mode_versions(sender, instance, **kwargs):
+    bump_mode_versions([instance.mode_id], stats=True)
+
+
+@receiver(post_save, sender=ActiveTimer)
+def publish_timer_saved(sender, instance, created, **kwargs):
+    publish(instance.user_id, "start" if created else "retarget", serialize_timer(instance))
+
+
+@receiver(post_delete, sender=ActiveTimer)
+def publish_timer_deleted(sender, instance, **kwargs):
+    expired = instance.kind == "timer" and instance.ends_at and timezone.now() >= instance.ends_at
+    publish(instance.user_id, "expire" if expired else "stop", None)
+
+
+@receiver(post_save, sender=Mode)
+@receiver(post_save, sender=Goal)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Milestone)
+@receiver(post_save, sender=Task)
+def refresh_active_title_snapshots(sender, instance, created, update_fields=None, **kwargs):
+    # Running timers carry their lineage titles (fill_title_snapshots at start /
+    # retarget); keep them current so the entry closed later gets the new name.
+    if created or (update_fields is not None and "title" not in update_fields):
+        return
+    loaded = getattr(instance, "_loaded_values", {})  # LoadedValuesMixin
+    if "title" in loaded and loaded["title"] == instance.title:
+        return
+    column, field = _SNAPSHOT_BY_MODEL[sender]
+    ActiveTimer.objects.filter(**{column: instance.id}).exclude(**{field: instance.title}).update(
+        **{field: instance.title}
+    )
@@ -0,0 +1,192 @@
+# timers/stats_cache.py
+"""
+Cache of built stats trees, keyed by (mode, user set, window, today).
+
+Each cached tree carries the mode's ModeVersion.stats_version it was built
+at; any time-entry write or entity rename / reparent bumps that counter, so a
+stale tree is simply never served (and expires on its own). That also keeps
+it correct with a per-process cache.
+
+Appending a single entry (stopping or slicing a timer) patches the cached
+trees of its mode in place instead of dropping them, as long as nothing else
+touched the mode's stats in between and the entry's node already exists.
+"""
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.services.mode_version import stats_version, stats_versions
+from .models import TimeEntry
+from .stats_tree import Scope, build_stats_trees, make_scope
+
+# Trees remembered per mode for patching; older ones just rebuild on a miss.
+MAX_INDEXED_TREES = 50
+
+# (TimeEntry column, child list in the tree dict), shallow to deep
+_PATH_LEVELS = (
+    ("goal_id", "goals"),
+    ("project_id", "projects"),
+    ("milestone_id", "milestones"),
+    ("task_id", "tasks"),
+)
+
+
+def _timeout() -> int:
+    return getattr(settings, "STATS_TREE_CACHE_TIMEOUT", 600)
+
+
+def _index_key(mode_id: int) -> str:
+    return f"stats_tree:index:{mode_id}"
+
+
+def _tree_key(mode_id: int, user_ids: List[int], from_dt: datetime, to_dt: datetime) -> str:
+    raw = "|".join([
+        ",".join(str(u) for u in user_ids),
+        from_dt.isoformat(),
+        to_dt.isoformat(),
+        timezone.localdate().isoformat(),  # lastDate is "today"
+    ])
+    return f"stats_tree:{mode_id}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+def _remember(mode_id: int, keys: List[str]) -> None:
+    index = cache.get(_index_key(mode_id)) or []
+    fresh = [key for key in keys if key not in index]
+    if not fresh:
+        return
+    index = (index + fresh)[-MAX_INDEXED_TREES:]
+    cache.set(_index_key(mode_id), index, _timeout())
+
+
+def cached_stats_tree(*, user, mode_id: int, from_dt: datetime, to_dt: datetime,
+                      user_ids: List[int] | None = None) -> Dict[str, Any]:
+    """
+    One mode's stats tree over [from_dt, to_dt), behind the cache. With
+    user_ids, aggregated across those users ("Everyone"); otherwise just user.
+    """
+    scope = make_scope(mode_id, user_ids or [user.id])
+    return cached_stats_trees([scope], from_dt=from_dt, to_dt=to_dt)[scope]
+
+
+def cached_stats_trees(scopes: Iterable[Scope], *, from_dt: datetime,
+                       to_dt: datetime) -> Dict[Scope, Dict[str, Any]]:
+    """build_stats_trees() behind the cache: only the misses are built, in one batch."""
+    scopes = list(dict.fromkeys(scopes))
+    keys = {scope: _tree_key(scope[0], list(scope[1]), from_dt, to_dt) for scope in scopes}
+
+    # Read the versions *before* building: a write landing mid-build leaves the
+    # tree tagged older than its data, which only costs a rebuild.
+    versions = stats_versions({mode_id for mode_id, _ in scopes})
+    cached = cache.get_many(list(keys.values()))
+
+    trees: Dict[Scope, Dict[str, Any]] = {}
+    misses: List[Scope] = []
+    for scope in scopes:
+        hit = cached.get(keys[scope])
+        if hit and hit["version"] == versions[scope[0]]:
+            trees[scope] = hit["tree"]
+        else:
+            misses.append(scope)
+    if not misses:
+        return trees
+
+    built = build_stats_trees(misses, from_dt=from_dt, to_dt=to_dt)
+    cache.set_many(
+        {
+            keys[scope]: {
+                "version": versions[scope[0]],
+                "tree": built[scope],
+                "user_ids": list(scope[1]),
+                "from": from_dt,
+                "to": to_dt,
+            }
+            for scope in misses
+        },
+        _timeout(),
+    )
+    keys_by_mode: Dict[int, List[str]] = {}
+    for scope in misses:
+        keys_by_mode.setdefault(scope[0], []).append(keys[scope])
+    for mode_id, mode_keys in keys_by_mode.items():
+        _remember(mode_id, mode_keys)
+
+    trees.update(built)
+    return trees
+
+
+def _path_to(tree: Dict[str, Any], entry: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """Nodes from the root down to the entry's deepest entity, or None if it isn't in the tree."""
+    target = None
+    for column, children in reversed(_PATH_LEVELS):
+        if entry[column]:
+            target = (children, entry[column])
+            break
+    if target is None:
+        return [tree]  # mode-level time
+
+    def walk(node, trail):
+        for _, children in _PATH_LEVELS:
+            for child in node.get(children, []):
+                if (children, child["id"]) == target:
+                    return trail + [child]
+                found = walk(child, trail + [child])
+                if found:
+                    return found
+        return None
+
+    return walk(tree, [tree])
+
+
+def _patch(entry: Dict[str, Any]) -> None:
+    mode_id = entry["mode_id"]
+    index = cache.get(_index_key(mode_id)) or []
+    if not index:
+        return
+    version = stats_version(mode_id)
+
+    for key in index:
+        cached = cache.get(key)
+        if not cached:
+            continue
+        if cached["version"] != version - 1:
+            continue  # something else changed too: leave it to rebuild
+
+        in_scope = (
+            entry["user_id"] in cached["user_ids"]
+            and cached["from"] <= entry["started_at"] < cached["to"]
+        )
+        if in_scope:
+            trail = _path_to(cached["tree"], entry)
+            if trail is None:
+                cache.delete(key)  # needs a new node: rebuild on next read
+                continue
+            trail[-1]["selfSeconds"] += entry["seconds"]
+            for node in trail:
+                node["seconds"] += entry["seconds"]
+
+        cached["version"] = version
+        cache.set(key, cached, _timeout())
+
+
+def note_entry_appended(entry: TimeEntry) -> None:
+    """
+    Patch cached trees for a freshly written entry. Runs on commit, after the
+    entry's own stats_version bump (registered earlier by its post_save).
+    """
+    if not entry.mode_id or entry.seconds <= 0:
+        return
+    snapshot = {
+        "mode_id": entry.mode_id,
+        "user_id": entry.user_id,
+        "started_at": entry.started_at,
+        "seconds": entry.seconds,
+        **{column: getattr(entry, column) for column, _ in _PATH_LEVELS},
+    }
+    transaction.on_commit(lambda: _patch(snapshot))
@@ -5,20 +5,24 @@ from __future__ import annotations
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple
 
 import logging
 
-from django.db.models import Min
+from django.db.models import Min, Sum
 from django.utils import timezone
 
 from core.models import Goal, Project, Milestone, Task
+from core.services.closure import lineage_ids
 from .models import TimeEntry
 
 log = logging.getLogger("timer.stats")
 
 Kind = Literal["goal", "project", "milestone", "task"]
 
+# (mode_id, user ids whose time is summed), the unit one tree is built for
+Scope = Tuple[int, Tuple[int, ...]]
+
 
 @dataclass
 class StatsNode:
@@ -61,75 +65,133 @@ def _title_for_task(t: Task) -> str:
     return t.title or ""
 
 
-def build_stats_tree(*, user, mode_id: int, from_dt: datetime, to_dt: datetime,
-                     user_ids: List[int] | None = None) -> Dict[str, Any]:
+def make_scope(mode_id: int, user_ids: Iterable[int]) -> Scope:
+    return (mode_id, tuple(sorted(set(user_ids))))
+
+
+def build_stats_trees(scopes: Iterable[Scope], *, from_dt: datetime,
+                      to_dt: datetime) -> Dict[Scope, Dict[str, Any]]:
     """
-    Core stats aggregator for a single Mode over a date range [from_dt, to_dt).
+    Stats trees for several (mode, users) scopes over [from_dt, to_dt).
 
-    When user_ids is provided, aggregates across all those users (for "Everyone" view).
-    Otherwise scopes to the single user.
+    All scopes share one bounds query, one entry aggregate, one closure lookup
+    and one fetch per entity type, however many modes / members they cover.
     """
+    scopes = list(dict.fromkeys(scopes))
+    if not scopes:
+        return {}
+    mode_ids = {mode_id for mode_id, _ in scopes}
+    all_user_ids = {uid for _, users in scopes for uid in users}
 
-    # Build user filter kwargs once
-    _user_filter = {"user_id__in": user_ids} if user_ids else {"user": user}
+    entries = TimeEntry.objects.filter(mode_id__in=mode_ids, user_id__in=all_user_ids).order_by()
 
     # --------------------------------------------------------------
-    # -1) Compute all-time bounds for this mode (independent of window)
+    # -1) All-time bounds per (mode, user), independent of window
     # --------------------------------------------------------------
-    bounds = TimeEntry.objects.filter(**_user_filter, mode_id=mode_id).aggregate(
-        first_started=Min("started_at")
-    )
-    first_started = bounds["first_started"]
-
-    if first_started:
-        first_date_iso = first_started.date().isoformat()
-    else:
-        # If no entries at all for this mode, fall back to "today"
-        first_date_iso = timezone.localdate().isoformat()
+    first_started: Dict[Tuple[int, int], datetime] = {
+        (row["mode_id"], row["user_id"]): row["first_started"]
+        for row in entries.values("mode_id", "user_id").annotate(first_started=Min("started_at"))
+    }
 
     # "To present" – your spec is "first time collection to present"
     last_date_iso = timezone.localdate().isoformat()
 
+    # --------------------------------------------------------------
+    # 0) Sum seconds per (mode, user, path) in the date window.
+    #    One row per distinct path, not per entry.
+    # --------------------------------------------------------------
+    paths_by_mode: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for row in (
+        entries.filter(started_at__gte=from_dt, started_at__lt=to_dt, seconds__gt=0)
+        .values("mode_id", "user_id", "goal_id", "project_id", "milestone_id", "task_id")
+        .annotate(total=Sum("seconds"))
+    ):
+        paths_by_mode[row["mode_id"]].append(row)
+
     log.info(
-        "[build_stats_tree] bounds mode_id=%s firstDate=%s lastDate=%s from_dt=%s to_dt=%s",
-        mode_id,
-        first_date_iso,
-        last_date_iso,
+        "[build_stats_trees] scopes=%d modes=%d paths=%d from_dt=%s to_dt=%s",
+        len(scopes),
+        len(mode_ids),
+        sum(len(rows) for rows in paths_by_mode.values()),
         from_dt.isoformat(),
         to_dt.isoformat(),
     )
 
     # --------------------------------------------------------------
-    # 0) Fetch entries in this mode & date window
+    # 1) Resolve every ancestor in one closure lookup, then fetch each
+    #    entity type once via .all_objects so archived still appear.
+    # --------------------------------------------------------------
+    seen: set[tuple[str, int]] = set()  # non-task entities on entries; ancestors added below
+    task_ids: set[int] = set()
+    for rows in paths_by_mode.values():
+        for row in rows:
+            if row["task_id"]:
+                task_ids.add(row["task_id"])
+            for kind in ("goal", "project", "milestone"):
+                if row[f"{kind}_id"]:
+                    seen.add((kind, row[f"{kind}_id"]))
+    lineage = lineage_ids(seen)
+
+    goals: Dict[int, Dict[int, Goal]] = defaultdict(dict)
+    for g in Goal.all_objects.filter(id__in=lineage["goal"], mode_id__in=mode_ids).only(
+        "id", "title", "mode_id"
+    ):
+        goals[g.mode_id][g.id] = g
+
+    projects: Dict[int, Dict[int, Project]] = defaultdict(dict)
+    for p in Project.all_objects.filter(id__in=lineage["project"], mode_id__in=mode_ids).only(
+        "id", "title", "mode_id", "parent_id", "goal_id"
+    ):
+        projects[p.mode_id][p.id] = p
+
+    milestones: Dict[int, Dict[int, Milestone]] = defaultdict(dict)
+    for m in Milestone.all_objects.filter(id__in=lineage["milestone"], mode_id__in=mode_ids).only(
+        "id", "title", "mode_id", "parent_id", "project_id", "goal_id"
+    ):
+        milestones[m.mode_id][m.id] = m
+
+    tasks: Dict[int, Dict[int, Task]] = defaultdict(dict)
+    for t in Task.all_objects.filter(id__in=task_ids, mode_id__in=mode_ids).only(
+        "id", "title", "mode_id", "milestone_id", "project_id", "goal_id"
+    ):
+        tasks[t.mode_id][t.id] = t
+
+    # --------------------------------------------------------------
+    # 2) One tree per scope, from its own slice of the shared rows
     # --------------------------------------------------------------
-    entries: List[TimeEntry] = list(
-        TimeEntry.objects.filter(
-            **_user_filter,
-            mode_id=mode_id,
-            started_at__gte=from_dt,
-            started_at__lt=to_dt,
-        ).only(
-            "id",
-            "seconds",
-            "mode_id",
-            "goal_id",
-            "project_id",
-            "milestone_id",
-            "task_id",
+    trees: Dict[Scope, Dict[str, Any]] = {}
+    for scope in scopes:
+        mode_id, users = scope
+        members = set(users)
+        starts = [first_started[(mode_id, uid)] for uid in members if (mode_id, uid) in first_started]
+        # If no entries at all for this mode, fall back to "today"
+        first_date_iso = min(starts).date().isoformat() if starts else last_date_iso
+
+        trees[scope] = _assemble_tree(
+            mode_id,
+            [row for row in paths_by_mode.get(mode_id, ()) if row["user_id"] in members],
+            goals_by_id=goals.get(mode_id, {}),
+            projects_by_id=projects.get(mode_id, {}),
+            milestones_by_id=milestones.get(mode_id, {}),
+            tasks_by_id=tasks.get(mode_id, {}),
+            first_date_iso=first_date_iso,
+            last_date_iso=last_date_iso,
         )
-    )
-    entry_ids = [e.id for e in entries]
-    log.info(
-        "[build_stats_tree] fetched %d entries for mode_id=%s (ids=%s)",
-        len(entries),
-        mode_id,
-        entry_ids,
-    )
+    return trees
+
+
+def _assemble_tree(mode_id: int, paths: List[Dict[str, Any]], *,
+                   goals_by_id: Dict[int, Goal],
+                   projects_by_id: Dict[int, Project],
+                   milestones_by_id: Dict[int, Milestone],
+                   tasks_by_id: Dict[int, Task],
+                   first_date_iso: str, last_date_iso: str) -> Dict[str, Any]:
+    """Nest one scope's path sums under the (already fetched) entities of its mode."""
 
     # If no entries for this *window*, still return bounds so "All time" works.
-    if not entries:
+    if not paths:
         log.info(
-            "[build_stats_tree] no entries in window → returning empty tree for mode_id=%s",
+            "[build_stats_trees] no entries in window → returning empty tree for mode_id=%s",
             mode_id,
         )
         return {
@@ -154,139 +216,33 @@ def build_stats_tree(*, user, mode_id: int, from_dt: datetime, to_dt: datetime,
     task_self: Dict[int, int] = defaultdict(int)
     mode_self: int = 0  # entries that only know about the Mode
 
-    goal_ids: set[int] = set()
-    project_ids: set[int] = set()
-    milestone_ids: set[int] = set()
-    task_ids: set[int] = set()
-
-    skipped_zero = 0
-
-    for e in entries:
-        seconds = e.seconds or 0
-        if seconds <= 0:
-            skipped_zero += 1
-            continue
+    for row in paths:
+        seconds = row["total"] or 0
 
         # deepest allocation
-        if e.task_id:
-            task_self[e.task_id] += seconds
-            task_ids.add(e.task_id)
-        elif e.milestone_id:
-            milestone_self[e.milestone_id] += seconds
-            milestone_ids.add(e.milestone_id)
-        elif e.project_id:
-            project_self[e.project_id] += seconds
-            project_ids.add(e.project_id)
-        elif e.goal_id:
-            goal_self[e.goal_id] += seconds
-            goal_ids.add(e.goal_id)
+        if row["task_id"]:
+            task_self[row["task_id"]] += seconds
+        elif row["milestone_id"]:
+            milestone_self[row["milestone_id"]] += seconds
+        elif row["project_id"]:
+            project_self[row["project_id"]] += seconds
+        elif row["goal_id"]:
+            goal_self[row["goal_id"]] += seconds
         else:
             mode_self += seconds
 
-        # Also track any ancestors that appear on entries,
-        # even if they aren't the deepest:
-        if e.goal_id:
-            goal_ids.add(e.goal_id)
-        if e.project_id:
-            project_ids.add(e.project_id)
-        if e.milestone_id:
-            milestone_ids.add(e.milestone_id)
-
     log.info(
-        "[build_stats_tree] allocation summary: mode_self=%s "
-        "goal_self_ids=%s project_self_ids=%s milestone_self_ids=%s "
-        "task_self_ids=%s skipped_zero=%s",
+        "[build_stats_trees] allocation summary: mode_id=%s mode_self=%s goals=%d projects=%d milestones=%d tasks=%d",
+        mode_id,
         mode_self,
-        sorted(goal_self.keys()),
-        sorted(project_self.keys()),
-        sorted(milestone_self.keys()),
-        sorted(task_self.keys()),
-        skipped_zero,
-    )
-
-    # --------------------------------------------------------------
-    # 2) Fetch entities via .all_objects so archived still appear
-    #    FIRST PASS – based only on ids we saw on entries
-    # --------------------------------------------------------------
-    goals_by_id: Dict[int, Goal] = {
-        g.id: g
-        for g in Goal.all_objects.filter(id__in=goal_ids, mode_id=mode_id)
-    }
-
-    projects_by_id: Dict[int, Project] = {
-        p.id: p
-        for p in Project.all_objects.filter(id__in=project_ids, mode_id=mode_id)
-    }
-
-    milestones_by_id: Dict[int, Milestone] = {
-        m.id: m
-        for m in Milestone.all_objects.filter(id__in=milestone_ids, mode_id=mode_id)
-    }
-
-    tasks_by_id: Dict[int, Task] = {
-        t.id: t
-        for t in Task.all_objects.filter(id__in=task_ids, mode_id=mode_id)
-    }
-
-
-    log.info(
-        "[build_stats_tree] entity fetch (first pass): goals=%d projects=%d milestones=%d tasks=%d",
-        len(goals_by_id),
-        len(projects_by_id),
-        len(milestones_by_id),
-        len(tasks_by_id),
-    )
-
-    # --------------------------------------------------------------
-    # 2b) Expand ancestor sets based on the entities we just loaded.
-    # --------------------------------------------------------------
-    changed = True
-    while changed:
-        changed = False
-
-        goals_by_id = {
-            g.id: g
-            for g in Goal.all_objects.filter(id__in=goal_ids, mode_id=mode_id)
-        }
-        projects_by_id = {
-            p.id: p
-            for p in Project.all_objects.filter(id__in=project_ids, mode_id=mode_id)
-        }
-        milestones_by_id = {
-            m.id: m
-            for m in Milestone.all_objects.filter(id__in=milestone_ids, mode_id=mode_id)
-        }
-
-
-        for p in projects_by_id.values():
-            if p.parent_id and p.parent_id not in project_ids:
-                project_ids.add(p.parent_id)
-                changed = True
-            if p.goal_id and p.goal_id not in goal_ids:
-                goal_ids.add(p.goal_id)
-                changed = True
-
-        for m in milestones_by_id.values():
-            if m.parent_id and m.parent_id not in milestone_ids:
-                milestone_ids.add(m.parent_id)
-                changed = True
-            if m.project_id and m.project_id not in project_ids:
-                project_ids.add(m.project_id)
-                changed = True
-            if m.goal_id and m.goal_id not in goal_ids:
-                goal_ids.add(m.goal_id)
-                changed = True
-
-    log.info(
-        "[build_stats_tree] entity fetch (after expansion): goals=%d projects=%d milestones=%d tasks=%d",
-        len(goals_by_id),
-        len(projects_by_id),
-        len(milestones_by_id),
-        len(tasks_by_id),
+        len(goal_self),
+        len(project_self),
+        len(milestone_self),
+        len(task_self),
     )
 
     # --------------------------------------------------------------
-    # 3) Build adjacency maps: parent → [children ids]
+    # 2) Build adjacency maps: parent → [children ids]
     # --------------------------------------------------------------
     project_children_by_goal: Dict[int, List[int]] = defaultdict(list)
     project_children_by_project: Dict[int, List[int]] = defaultdict(list)
@@ -330,16 +286,15 @@ def build_stats_tree(*, user, mode_id: int, from_dt: datetime, to_dt: datetime,
         else:
             task_top_level.append(t.id)
 
-    log.info(
-        "[build_stats_tree] adjacency: project_top_level=%s "
-        "milestone_top_level=%s task_top_level=%s",
-        project_top_level,
-        milestone_top_level,
-        task_top_level,
+    log.debug(
+        "[build_stats_trees] adjacency: top_level projects=%d milestones=%d tasks=%d",
+        len(project_top_level),
+        len(milestone_top_level),
+        len(task_top_level),
     )
 
     # --------------------------------------------------------------
-    # 4) Recursive builders
+    # 3) Recursive builders
     # --------------------------------------------------------------
     def build_task_node(task_id: int) -> Optional[StatsNode]:
         t = tasks_by_id.get(task_id)
@@ -499,7 +454,7 @@ def build_stats_tree(*, user, mode_id: int, from_dt: datetime, to_dt: datetime,
         return node
 
     # --------------------------------------------------------------
-    # 5) Build top-level collections for this mode
+    # 4) Build top-level collections for this mode
     # --------------------------------------------------------------
     goal_nodes: List[StatsNode] = []
     for g_id, g in goals_by_id.items():
@@ -534,7 +489,7 @@ def build_stats_tree(*, user, mode_id: int, from_dt: datetime, to_dt: datetime,
     mode_total_seconds += sum(t.seconds for t in top_level_task_nodes)
 
     log.info(
-        "[build_stats_tree] DONE mode_id=%s total_seconds=%s "
+        "[build_stats_trees] DONE mode_id=%s total_seconds=%s "
         "goals=%d top_projects=%d top_milestones=%d top_tasks=%d",
         mode_id,
         mode_total_seconds,
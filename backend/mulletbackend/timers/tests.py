@@ -1,3 +1,160 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import Goal, Mode, Project, Task
+from timers import stats_cache
+from timers.models import ActiveTimer, TimeEntry, TimeEntryDailyRollup
+from timers.rollups import add_entries, record_entries, rebuild_rollups, remove_entries
+from timers.services import close_active_into_entry
+from timers.stats_tree import build_stats_trees, make_scope
+
+
+def _at(day, hour=12):
+    return timezone.make_aware(datetime(2026, 10, day, hour))
+
+
+class TimerFixtureMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("tracker", password="x")
+        cls.mode = Mode.objects.create(user=cls.user, title="M", position=0)
+        cls.goal = Goal.objects.create(user=cls.user, mode=cls.mode, title="G")
+        cls.project = Project.objects.create(user=cls.user, mode=cls.mode, goal=cls.goal, title="P")
+        cls.task = Task.objects.create(user=cls.user, mode=cls.mode, project=cls.project, title="T1")
+        cls.other_task = Task.objects.create(user=cls.user, mode=cls.mode, goal=cls.goal, title="T2")
+
+    def entry(self, started_at, seconds, **path):
+        path.setdefault("mode", self.mode)
+        return TimeEntry.objects.create(
+            user=self.user, kind="stopwatch", started_at=started_at,
+            ended_at=started_at + timedelta(seconds=seconds), seconds=seconds, **path,
+        )
+
+
+class RollupTests(TimerFixtureMixin, TestCase):
+    def buckets(self):
+        return sorted(
+            TimeEntryDailyRollup.objects.values_list(
+                "user_id", "mode_id", "entity_kind", "entity_id", "day", "seconds", "entry_count"
+            ),
+            key=repr,
+        )
+
+    def assert_matches_rebuild(self):
+        incremental = self.buckets()
+        rebuild_rollups()
+        self.assertEqual(incremental, self.buckets())
+
+    def populate(self):
+        path = dict(goal=self.goal, project=self.project, task=self.task)
+        record_entries([self.entry(_at(1), 600, **path), self.entry(_at(1, 15), 300, **path)])
+        record_entries([self.entry(_at(2), 120, goal=self.goal, task=self.other_task)])
+        # No mode: every one of these lands in the same COALESCE(mode, 0) bucket.
+        record_entries([self.entry(_at(2), 60, mode=None), self.entry(_at(2, 14), 30, mode=None)])
+
+    def test_recorded_entries_match_rebuild(self):
+        self.populate()
+        self.assertEqual(
+            TimeEntryDailyRollup.objects.get(mode=None, entity_kind="mode").entry_count, 2
+        )
+        self.assert_matches_rebuild()
+
+    def test_reparent_and_delete_match_rebuild(self):
+        self.populate()
+        moved = TimeEntry.objects.filter(task=self.task, started_at=_at(1, 15))
+        moved_ids = list(moved.values_list("id", flat=True))
+        remove_entries(moved)
+        moved.update(project=None, task=self.other_task)
+        add_entries(TimeEntry.objects.filter(id__in=moved_ids))
+
+        gone = TimeEntry.objects.filter(mode=None)
+        remove_entries(gone)
+        gone.delete()
+
+        self.assertFalse(TimeEntryDailyRollup.objects.filter(mode=None).exists())
+        self.assert_matches_rebuild()
+
+    def test_lost_create_race_folds_into_the_existing_bucket(self):
+        # Another request creates the bucket between our UPDATE (0 rows) and INSERT.
+        TimeEntryDailyRollup.objects.create(
+            user=self.user, mode=None, entity_kind="mode", entity_id=0, day=_at(3).date(),
+            seconds=100, entry_count=1,
+        )
+        real_update = QuerySet.update
+        calls = []
+
+        def first_update_misses(qs, **kwargs):
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else real_update(qs, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", autospec=True, side_effect=first_update_misses):
+            record_entries([self.entry(_at(3), 100, mode=None)])
+        bucket = TimeEntryDailyRollup.objects.get(mode=None, entity_kind="mode")
+        self.assertEqual((bucket.seconds, bucket.entry_count), (200, 2))
+        self.assertEqual(len(calls), 2)
+
+
+class StatsCacheTests(TimerFixtureMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.window = dict(from_dt=_at(1, 0), to_dt=_at(10, 0))
+
+    def test_appended_entry_patches_cached_tree_like_a_rebuild(self):
+        self.entry(_at(1), 600, goal=self.goal, project=self.project, task=self.task)
+        stats_cache.cached_stats_tree(user=self.user, mode_id=self.mode.id, **self.window)
+
+        active = ActiveTimer.objects.create(
+            user=self.user, kind="stopwatch", mode=self.mode, goal=self.goal,
+            project=self.project, task=self.task, started_at=_at(2),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            close_active_into_entry(active, force_end=_at(2) + timedelta(seconds=900))
+
+        with mock.patch("timers.stats_cache.build_stats_trees") as build:
+            patched = stats_cache.cached_stats_tree(user=self.user, mode_id=self.mode.id, **self.window)
+        build.assert_not_called()
+
+        scope = make_scope(self.mode.id, [self.user.id])
+        self.assertEqual(patched, build_stats_trees([scope], **self.window)[scope])
+        self.assertEqual(patched["seconds"], 1500)
+
+    def test_other_stats_write_forces_a_rebuild(self):
+        stats_cache.cached_stats_tree(user=self.user, mode_id=self.mode.id, **self.window)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.entry(_at(3), 60, goal=self.goal)  # written without note_entry_appended
+        tree = stats_cache.cached_stats_tree(user=self.user, mode_id=self.mode.id, **self.window)
+        self.assertEqual(tree["seconds"], 60)
+
+
+class TitleSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("timer", password="x")
+        cls.mode = Mode.objects.create(user=cls.user, title="M", position=0)
+        cls.goal = Goal.objects.create(user=cls.user, mode=cls.mode, title="Goal")
+        cls.task = Task.objects.create(user=cls.user, mode=cls.mode, goal=cls.goal, title="Task")
+        ActiveTimer.objects.create(
+            user=cls.user, kind="stopwatch", mode=cls.mode, goal=cls.goal, task=cls.task,
+            goal_title_snapshot="Goal", task_title_snapshot="Task",
+        )
+
+    def test_rename_updates_running_timer(self):
+        task = Task.objects.get(id=self.task.id)
+        task.title = "Renamed"
+        task.save()
+        self.assertEqual(ActiveTimer.objects.get(user=self.user).task_title_snapshot, "Renamed")
 
-# Create your tests here.
+    def test_save_without_title_change_skips_the_update(self):
+        goal = Goal.objects.get(id=self.goal.id)
+        goal.description = "more"
+        with CaptureQueriesContext(connection) as queries:
+            goal.save()
+        self.assertFalse([q for q in queries if "timers_activetimer" in q["sql"]])
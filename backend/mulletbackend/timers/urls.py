@@ -3,11 +3,14 @@ from .views import (
     StartTimerView,
     StopTimerView,
     ActiveTimerView,
+    TimerStreamView,
     TimeEntriesView,
     TimeEntryDetailView,
+    TimeEntryImportView,
     StatsDailyView,
     StatsSummaryView,
     StatsTreeView,
+    StatsTreesView,
     StatsChainUpView,   # ⬅️ new
     ClearStatsView
 
@@ -18,8 +21,10 @@ urlpatterns = [
     path("timer/start", StartTimerView.as_view(), name="timer-start"),
     path("timer/stop", StopTimerView.as_view(), name="timer-stop"),
     path("timer/active", ActiveTimerView.as_view(), name="timer-active"),
+    path("timer/stream", TimerStreamView.as_view(), name="timer-stream"),
 
     path("time-entries", TimeEntriesView.as_view(), name="time-entries"),
+    path("time-entries/import", TimeEntryImportView.as_view(), name="time-entries-import"),
     path("time-entries/<int:pk>", TimeEntryDetailView.as_view(), name="time-entry-detail"),
     path("timer/complete-next", CompleteNextView.as_view(), name="timer-complete-next"),
 
@@ -27,6 +32,7 @@ urlpatterns = [
     path("stats/summary", StatsSummaryView.as_view(), name="stats-summary"),
     path("stats/daily", StatsDailyView.as_view(), name="stats-daily"),
     path("stats/tree", StatsTreeView.as_view(), name="stats-tree"),
+    path("stats/trees", StatsTreesView.as_view(), name="stats-trees"),
 
     # ⬇️ new chain-up endpoint
     path("stats/chain-up", StatsChainUpView.as_view(), name="stats-chain-up"),
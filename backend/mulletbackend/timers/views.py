@@ -2,34 +2,41 @@
 import logging
 import uuid
 from datetime import datetime, timedelta
-from itertools import chain
 
 from django.db import transaction
-from django.db.models import F, Q, Sum, Value
-from django.db.models.functions import Coalesce, TruncDate
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.utils.dateparse import parse_date
 
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from core.models import Goal, Milestone, Project, Task
+from core.conditional import etag_matches, mode_list_etag, not_modified
+from core.models import Goal, Milestone, Mode, Project, Task
+from core.services.mode_version import bump_mode_versions
 from core.utils.archive_guard import destroy_or_archive
 
-from .models import ActiveTimer, TimeEntry
+from .events import EventStreamRenderer, timer_event_stream
+from .imports import ImportFileError, import_time_entries, read_rows
+from .models import SNAPSHOT_FIELDS, ActiveTimer, TimeEntry, TimeEntryDailyRollup, fill_title_snapshots
+from .rollups import add_entries, remove_entries
 from .serializers import ActiveTimerSerializer, TimeEntrySerializer
 from .services import (
     auto_close_expired_if_any,
     close_active_into_entry,
-    fetch_entities_by_ids,
+    is_expired,
     resolve_path,
     slice_active_until,
     stop_active_if_targeting,
     validate_duration_sec,
 )
-from .stats_tree import build_stats_tree
+from .stats_cache import cached_stats_tree, cached_stats_trees
+from .stats_tree import make_scope
 from collaboration.permissions import accessible_mode_ids, writable_mode_ids
 
 log = logging.getLogger("timer")
@@ -127,7 +134,7 @@ class StartTimerView(APIView):
                     )
                 ends_at = now + timedelta(seconds=remaining)
 
-            active = ActiveTimer.objects.create(
+            active = ActiveTimer(
                 user=user,
                 kind=kind,
                 mode_id=seed.mode_id,
@@ -140,13 +147,15 @@ class StartTimerView(APIView):
                 session_id=session_id,
                 planned_seconds=planned_seconds,
             )
+            fill_title_snapshots([active])
+            active.save(force_insert=True)
             return Response(ActiveTimerSerializer(active).data, status=status.HTTP_201_CREATED)
 
         # ---- FRESH START FLOW ----
         kind = request.data.get("kind", "stopwatch")
         duration_sec = validate_duration_sec(request.data.get("durationSec"))
 
-        entities = fetch_entities_by_ids(
+        path = resolve_path(
             user=user,
             mode_id=request.data.get("modeId"),
             goal_id=request.data.get("goalId"),
@@ -154,8 +163,7 @@ class StartTimerView(APIView):
             milestone_id=request.data.get("milestoneId"),
             task_id=request.data.get("taskId"),
         )
-        path = resolve_path(**entities)
-        if not path.get("mode"):
+        if not path["mode_id"]:
             return Response(
                 {"detail": "A mode could not be resolved from the provided ids."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -174,19 +182,17 @@ class StartTimerView(APIView):
             planned_seconds = duration_sec
             ends_at = now + timedelta(seconds=duration_sec)
 
-        active = ActiveTimer.objects.create(
+        active = ActiveTimer(
             user=user,
             kind=kind,
-            mode=path["mode"],
-            goal=path.get("goal"),
-            project=path.get("project"),
-            milestone=path.get("milestone"),
-            task=path.get("task"),
+            **path,
             started_at=now,
             ends_at=ends_at,
             session_id=session_id,
             planned_seconds=planned_seconds,
         )
+        fill_title_snapshots([active])
+        active.save(force_insert=True)
         return Response(ActiveTimerSerializer(active).data, status=status.HTTP_201_CREATED)
 
 
@@ -207,15 +213,17 @@ class StopTimerView(APIView):
 class ActiveTimerView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
     def get(self, request):
         user = request.user
         corr = request.headers.get("X-Req-Id") or uuid.uuid4().hex[:8]
         log.info("[GET][%s] Enter /timer/active user=%s", corr, user.id)
 
-        auto_close_expired_if_any(user=user)
-
+        # Plain read; only lock (and close) when the countdown has actually run out.
         active = ActiveTimer.objects.filter(user=user).first()
+        if active and is_expired(active):
+            with transaction.atomic():
+                auto_close_expired_if_any(user=user)
+            active = ActiveTimer.objects.filter(user=user).first()
         if not active:
             return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -275,43 +283,29 @@ class ActiveTimerView(APIView):
         elif deepest == "milestoneId":
             ids.update(task_id=None)
 
-        entities = fetch_entities_by_ids(user=user, **ids)
-        new_path = resolve_path(**entities)
-        if not new_path.get("mode"):
+        new_path = resolve_path(user=user, **ids)
+        if not new_path["mode_id"]:
             return Response(
                 {"detail": "A mode could not be resolved from the provided ids."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        old_ids = dict(
-            mode=active.mode_id,
-            goal=active.goal_id,
-            project=active.project_id,
-            milestone=active.milestone_id,
-            task=active.task_id,
-        )
-        new_ids = dict(
-            mode=new_path["mode"].id if new_path["mode"] else None,
-            goal=new_path["goal"].id if new_path["goal"] else None,
-            project=new_path["project"].id if new_path["project"] else None,
-            milestone=new_path["milestone"].id if new_path["milestone"] else None,
-            task=new_path["task"].id if new_path["task"] else None,
-        )
-
-        if new_ids == old_ids:
+        old_path = {column: getattr(active, column) for column in new_path}
+        if new_path == old_path:
             return Response(ActiveTimerSerializer(active, context={"corr": corr}).data)
 
         # Close the “old segment” up to now, then start a new segment from now.
         now = timezone.now()
         slice_active_until(active, until=now, corr=corr)
 
-        active.mode = new_path["mode"]
-        active.goal = new_path["goal"]
-        active.project = new_path["project"]
-        active.milestone = new_path["milestone"]
-        active.task = new_path["task"]
+        for column, value in new_path.items():
+            setattr(active, column, value)
+        fill_title_snapshots([active])
         active.started_at = now  # ✅ make update_fields correct + segment semantics clear
-        active.save(update_fields=["mode", "goal", "project", "milestone", "task", "started_at"])
+        active.save(update_fields=[
+            "mode", "goal", "project", "milestone", "task", "started_at",
+            *(field for _, field, _ in SNAPSHOT_FIELDS),
+        ])
 
         return Response(
             ActiveTimerSerializer(active, context={"corr": corr}).data,
@@ -319,6 +313,31 @@ class ActiveTimerView(APIView):
         )
 
 
+class TimerStreamView(APIView):
+    """
+    GET /timer/stream — Server-Sent Events for the user's active timer
+    (snapshot, start, retarget, stop, expire). Replaces polling /timer/active;
+    reconnect with Last-Event-ID when the stream ends.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    def get(self, request):
+        raw = request.headers.get("Last-Event-ID") or request.query_params.get("lastEventId")
+        try:
+            last_event_id = int(raw) if raw else None
+        except ValueError:
+            last_event_id = None
+
+        response = StreamingHttpResponse(
+            timer_event_stream(request.user, last_event_id),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
 class TimeEntriesView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -327,11 +346,40 @@ class TimeEntriesView(APIView):
         if start is None:
             return Response({"detail": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Keyed on the local date too: with no ?from/?to the window is "today".
+        etag = mode_list_etag(request, accessible_mode_ids(request.user), timezone.localdate())
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
         qs = (
             TimeEntry.objects.filter(user=request.user, started_at__gte=start, started_at__lte=end)
             .order_by("started_at")
         )
-        return Response(TimeEntrySerializer(qs, many=True).data)
+        response = Response(TimeEntrySerializer(qs, many=True).data)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class TimeEntryImportView(APIView):
+    """
+    POST /time-entries/import — bulk-load historic entries (JSON array body,
+    or a CSV / JSON Lines `file` upload). All rows or none; see timers.imports.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            rows = read_rows(data=request.data, files=request.FILES)
+        except ImportFileError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        created, errors = import_time_entries(user=request.user, rows=rows)
+        if errors:
+            return Response({"detail": "Import rejected.", "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        log.info("[IMPORT] user=%s created=%d entries", request.user.id, created)
+        return Response({"created": created}, status=status.HTTP_201_CREATED)
 
 
 class TimeEntryDetailView(APIView):
@@ -353,7 +401,9 @@ class TimeEntryDetailView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        entry.delete()
+        with transaction.atomic():
+            remove_entries(TimeEntry.objects.filter(pk=entry.pk))
+            entry.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -365,19 +415,19 @@ class StatsSummaryView(APIView):
         to_raw = request.GET.get("to")
         mode_id_raw = request.GET.get("modeId")
 
-        qs = TimeEntry.objects.filter(user=request.user)
+        qs = TimeEntryDailyRollup.objects.filter(user=request.user)
 
         if from_raw:
             df = parse_date(from_raw)
             if not df:
                 return Response({"detail": "from must be a valid date in YYYY-MM-DD format."}, status=status.HTTP_400_BAD_REQUEST)
-            qs = qs.filter(started_at__date__gte=df)
+            qs = qs.filter(day__gte=df)
 
         if to_raw:
             dt = parse_date(to_raw)
             if not dt:
                 return Response({"detail": "to must be a valid date in YYYY-MM-DD format."}, status=status.HTTP_400_BAD_REQUEST)
-            qs = qs.filter(started_at__date__lte=dt)
+            qs = qs.filter(day__lte=dt)
 
         if from_raw and to_raw:
             if parse_date(to_raw) and parse_date(from_raw) and parse_date(to_raw) < parse_date(from_raw):
@@ -389,38 +439,47 @@ class StatsSummaryView(APIView):
             except (TypeError, ValueError):
                 return Response({"detail": "Invalid integer for modeId."}, status=status.HTTP_400_BAD_REQUEST)
 
-        tasks = (
-            qs.filter(task__isnull=False)
-            .values(entityId=F("task_id"))
-            .annotate(seconds=Coalesce(Sum("seconds"), 0))
-            .annotate(entityType=Value("task"))
-        )
-        milestones = (
-            qs.filter(milestone__isnull=False)
-            .values(entityId=F("milestone_id"))
-            .annotate(seconds=Coalesce(Sum("seconds"), 0))
-            .annotate(entityType=Value("milestone"))
-        )
-        projects = (
-            qs.filter(project__isnull=False)
-            .values(entityId=F("project_id"))
-            .annotate(seconds=Coalesce(Sum("seconds"), 0))
-            .annotate(entityType=Value("project"))
-        )
-        goals = (
-            qs.filter(goal__isnull=False)
-            .values(entityId=F("goal_id"))
-            .annotate(seconds=Coalesce(Sum("seconds"), 0))
-            .annotate(entityType=Value("goal"))
+        limit = None
+        limit_raw = request.GET.get("limit")
+        if limit_raw:
+            try:
+                limit = int(limit_raw)
+            except (TypeError, ValueError):
+                limit = 0
+            if limit < 1:
+                return Response({"detail": "limit must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One grouped pass over the daily rollups. Every "mode" bucket folds into
+        # a single total row (entity id 0) sorted ahead of the goal / project /
+        # milestone / task rows, so ?limit=N is just LIMIT N + 1 in SQL.
+        is_total = Q(entity_kind="mode")
+        rows = list(
+            qs.values(
+                entityType=F("entity_kind"),
+                entityId=Case(When(is_total, then=Value(0)), default=F("entity_id")),
+            )
+            .annotate(seconds=Sum("seconds"))
+            .order_by(
+                Case(When(is_total, then=Value(0)), default=Value(1), output_field=IntegerField()),
+                "-seconds",
+                "entityType",
+                "entityId",
+            )[: limit + 1 if limit else None]
         )
 
-        combined = list(chain(tasks, milestones, projects, goals))
-        combined_sorted = sorted(combined, key=lambda x: x["seconds"], reverse=True)
+        total = 0
+        if rows and rows[0]["entityType"] == "mode":
+            total = rows.pop(0)["seconds"]
+        if limit:
+            rows = rows[:limit]
 
         return Response(
             {
-                "total": int(qs.aggregate(total=Coalesce(Sum("seconds"), 0))["total"]),
-                "topEntities": combined_sorted,
+                "total": int(total or 0),
+                "topEntities": [
+                    {"entityId": r["entityId"], "seconds": int(r["seconds"]), "entityType": r["entityType"]}
+                    for r in rows
+                ],
             }
         )
 
@@ -540,7 +599,12 @@ class StatsDailyView(APIView):
         if start is None:
             return Response({"detail": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
 
-        qs = TimeEntry.objects.filter(user=request.user, started_at__gte=start, started_at__lte=end)
+        qs = TimeEntryDailyRollup.objects.filter(
+            user=request.user,
+            entity_kind="mode",
+            day__gte=timezone.localtime(start).date(),
+            day__lte=timezone.localtime(end).date(),
+        )
 
         mode_id = request.query_params.get("modeId")
         if mode_id:
@@ -550,8 +614,7 @@ class StatsDailyView(APIView):
                 return Response({"detail": "Invalid integer for modeId."}, status=status.HTTP_400_BAD_REQUEST)
 
         daily = (
-            qs.annotate(day=TruncDate("started_at"))
-            .values("day")
+            qs.values("day")
             .annotate(seconds=Coalesce(Sum("seconds"), 0))
             .order_by("day")
         )
@@ -559,6 +622,24 @@ class StatsDailyView(APIView):
         return Response([{"date": r["day"].isoformat(), "seconds": int(r["seconds"])} for r in daily])
 
 
+def _parse_tree_window(from_raw, to_raw):
+    """
+    Inclusive ?from / ?to dates → aware [from_dt, to_dt) bounds, or an error
+    Response as the third item.
+    """
+    from_date = parse_date(from_raw)
+    to_date = parse_date(to_raw)
+    if not from_date or not to_date:
+        return None, None, Response({"detail": "from/to must be valid dates in YYYY-MM-DD format."}, status=status.HTTP_400_BAD_REQUEST)
+    if to_date < from_date:
+        return None, None, Response({"detail": "to must be on or after from."}, status=status.HTTP_400_BAD_REQUEST)
+
+    tz = timezone.get_current_timezone()
+    from_dt = timezone.make_aware(datetime.combine(from_date, datetime.min.time()), tz)
+    to_dt = timezone.make_aware(datetime.combine(to_date + timedelta(days=1), datetime.min.time()), tz)
+    return from_dt, to_dt, None
+
+
 class StatsTreeView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -579,22 +660,14 @@ class StatsTreeView(APIView):
         except (TypeError, ValueError):
             return Response({"detail": "modeId must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
 
-        from_date = parse_date(from_raw)
-        to_date = parse_date(to_raw)
-        if not from_date or not to_date:
-            return Response({"detail": "from/to must be valid dates in YYYY-MM-DD format."}, status=status.HTTP_400_BAD_REQUEST)
-        if to_date < from_date:
-            return Response({"detail": "to must be on or after from."}, status=status.HTTP_400_BAD_REQUEST)
+        from_dt, to_dt, error = _parse_tree_window(from_raw, to_raw)
+        if error:
+            return error
 
         # Validate user has access to this mode
-        from core.models import Mode
         if not Mode.objects.filter(id=mode_id, id__in=accessible_mode_ids(request.user)).exists():
             return Response({"detail": "Mode not found or no access."}, status=status.HTTP_404_NOT_FOUND)
 
-        tz = timezone.get_current_timezone()
-        from_dt = timezone.make_aware(datetime.combine(from_date, datetime.min.time()), tz)
-        to_dt = timezone.make_aware(datetime.combine(to_date + timedelta(days=1), datetime.min.time()), tz)
-
         # Determine which user(s) to fetch stats for
         tree_kwargs = {"mode_id": mode_id, "from_dt": from_dt, "to_dt": to_dt}
 
@@ -633,10 +706,76 @@ class StatsTreeView(APIView):
             # Default — current user's stats
             tree_kwargs["user"] = request.user
 
-        tree = build_stats_tree(**tree_kwargs)
+        tree = cached_stats_tree(**tree_kwargs)
         return Response(tree, status=status.HTTP_200_OK)
 
 
+class StatsTreesView(APIView):
+    """
+    Stats trees for many modes in one call (dashboard load).
+
+    ?from&to as for StatsTreeView; ?modeIds=1,2,3 (default: every accessible
+    mode); ?memberId=all for the "Everyone" tree of each mode; ?breakdown=members
+    adds one tree per mode member. Everything is built in a single batch.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        from_raw = request.query_params.get("from")
+        to_raw = request.query_params.get("to")
+        if not from_raw or not to_raw:
+            return Response({"detail": "from and to are required query parameters."}, status=status.HTTP_400_BAD_REQUEST)
+        from_dt, to_dt, error = _parse_tree_window(from_raw, to_raw)
+        if error:
+            return error
+
+        member_raw = request.query_params.get("memberId")
+        if member_raw not in (None, "", "all"):
+            return Response({"detail": "memberId must be 'all' or omitted."}, status=status.HTTP_400_BAD_REQUEST)
+        breakdown = request.query_params.get("breakdown") == "members"
+
+        accessible = accessible_mode_ids(request.user)
+        modes_raw = request.query_params.get("modeIds")
+        if modes_raw:
+            try:
+                mode_ids = sorted({int(x) for x in modes_raw.split(",") if x.strip()})
+            except ValueError:
+                return Response({"detail": "modeIds must be a comma-separated list of integers."}, status=status.HTTP_400_BAD_REQUEST)
+            if not set(mode_ids) <= accessible:
+                return Response({"detail": "Mode not found or no access."}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            mode_ids = sorted(accessible)
+
+        # Owner + collaborators of every mode, in two queries
+        members = {mode_id: {owner_id} for mode_id, owner_id in Mode.objects.filter(id__in=mode_ids).values_list("id", "user_id")}
+        if member_raw == "all" or breakdown:
+            from collaboration.models import ModeCollaborator
+            for mode_id, user_id in ModeCollaborator.objects.filter(mode_id__in=mode_ids).values_list("mode_id", "user_id"):
+                members[mode_id].add(user_id)
+        mode_ids = [mode_id for mode_id in mode_ids if mode_id in members]
+
+        main = {
+            mode_id: make_scope(mode_id, members[mode_id] if member_raw == "all" else [request.user.id])
+            for mode_id in mode_ids
+        }
+        scopes = list(main.values())
+        if breakdown:
+            scopes += [make_scope(mode_id, [uid]) for mode_id in mode_ids for uid in sorted(members[mode_id])]
+
+        trees = cached_stats_trees(scopes, from_dt=from_dt, to_dt=to_dt)
+
+        results = []
+        for mode_id in mode_ids:
+            item = {"modeId": mode_id, "tree": trees[main[mode_id]]}
+            if breakdown:
+                item["members"] = [
+                    {"userId": uid, "tree": trees[make_scope(mode_id, [uid])]}
+                    for uid in sorted(members[mode_id])
+                ]
+            results.append(item)
+        return Response(results, status=status.HTTP_200_OK)
+
+
 class StatsChainUpView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -667,7 +806,15 @@ class StatsChainUpView(APIView):
             qs = qs.filter(goal_id=entity_id, project__isnull=True, milestone__isnull=True, task__isnull=True)
             update_kwargs = {"goal": None}
 
-        updated = qs.update(**update_kwargs)
+        # Re-parented entries move to other rollup buckets.
+        with transaction.atomic():
+            ids = list(qs.values_list("id", flat=True))
+            moved = TimeEntry.objects.filter(id__in=ids)
+            remove_entries(moved)
+            mode_ids = set(moved.order_by().values_list("mode_id", flat=True).distinct())
+            updated = moved.update(**update_kwargs)
+            add_entries(moved)
+        bump_mode_versions(mode_ids, stats=True)
 
         log.info("[CHAIN-UP] user=%s entity_type=%s entity_id=%s updated=%s", request.user.id, entity_type, entity_id, updated)
         return Response({"updated": int(updated)}, status=status.HTTP_200_OK)
@@ -690,7 +837,9 @@ class ClearStatsView(APIView):
             except (TypeError, ValueError):
                 return Response({"detail": "Invalid integer for modeId."}, status=status.HTTP_400_BAD_REQUEST)
 
-        deleted_count, _ = qs.delete()
+        with transaction.atomic():
+            remove_entries(qs)
+            deleted_count, _ = qs.delete()
 
         log.info(
             "[CLEAR-STATS] user=%s from=%s to=%s mode_id=%s deleted=%s",
@@ -0,0 +1,34 @@
+import api from "./axios";
+
+type Page<T> = { results: T[]; next: string | null };
+
+/**
+ * Fetch every row of a keyset-paginated list endpoint
+ * (/goals/, /projects/, /milestones/, /tasks/).
+ *
+ * Follows `next` until the server says there are no more pages, so large
+ * workspaces are never truncated. `onPage` sees each page as it arrives,
+ * for callers that want to render progressively.
+ */
+export async function fetchAllPages<T = any>(
+  path: string,
+  {
+    pageSize = 500,
+    onPage,
+  }: { pageSize?: number; onPage?: (rows: T[]) => void } = {}
+): Promise<T[]> {
+  const rows: T[] = [];
+  let cursor: string | null = null;
+
+  do {
+    const params: Record<string, string | number> = { pageSize };
+    if (cursor) params.cursor = cursor;
+
+    const res = await api.get<Page<T>>(path, { params });
+    rows.push(...res.data.results);
+    onPage?.(res.data.results);
+    cursor = res.data.next;
+  } while (cursor);
+
+  return rows;
+}
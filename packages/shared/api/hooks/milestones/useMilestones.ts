@@ -1,14 +1,14 @@
 import { useQuery } from "@tanstack/react-query";
 import { Milestone } from "@shared/types/Milestone";
 import { mapMilestoneFromApi } from "../../mappers/milestoneMapper";
-import api from "../../axios";
+import { fetchAllPages } from "../../fetchAllPages";
 
 export function useMilestones() {
   const query = useQuery<Milestone[]>({
     queryKey: ["milestones"],
     queryFn: async () => {
-      const res = await api.get("/milestones/");
-      return res.data.map(mapMilestoneFromApi);
+      const rows = await fetchAllPages("/milestones/");
+      return rows.map(mapMilestoneFromApi);
     },
   });
 
@@ -1,14 +1,14 @@
 import { useQuery } from "@tanstack/react-query";
 import { Project } from "../../../types/Project";
 import { mapProjectFromApi } from "../../mappers/projectMapper";
-import api from "../../axios";
+import { fetchAllPages } from "../../fetchAllPages";
 
 export function useProjects() {
   const query = useQuery<Project[]>({
     queryKey: ["projects"],
     queryFn: async () => {
-      const res = await api.get("/projects/");
-      return res.data.map(mapProjectFromApi);
+      const rows = await fetchAllPages("/projects/");
+      return rows.map(mapProjectFromApi);
     },
   });
 
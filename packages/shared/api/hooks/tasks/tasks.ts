@@ -1,9 +1,9 @@
 import api from "../../axios";
+import { fetchAllPages } from "../../fetchAllPages";
 import { ensureCsrf } from "../auth/ensureCsrf";
 
 export const fetchTasks = async () => {
-  const res = await api.get("/tasks/");
-  return res.data;
+  return fetchAllPages("/tasks/");
 };
 
 export const createTask = async (task: {
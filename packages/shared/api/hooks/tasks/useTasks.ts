@@ -4,7 +4,7 @@ import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { mapTaskFromApi } from "@shared/api/mappers/taskMapper";
 import { createTask } from "./tasks";
 import { Task } from "../../../types/Task";
-import api from "../../axios";
+import { fetchAllPages } from "../../fetchAllPages";
 
 export const useTasks = () => {
   const queryClient = useQueryClient();
@@ -12,8 +12,8 @@ export const useTasks = () => {
   const query = useQuery<Task[], Error>({
     queryKey: ["tasks"],
     queryFn: async () => {
-      const res = await api.get("/tasks/");
-      return res.data.map(mapTaskFromApi);
+      const rows = await fetchAllPages("/tasks/");
+      return rows.map(mapTaskFromApi);
     },
   });
 